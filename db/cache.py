@@ -0,0 +1,431 @@
+import json
+import time
+import asyncio
+import logging
+from datetime import datetime
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.models import UserModel, TokenModel
+from db.database_protocol import UsersBase, GoogleTokensBase
+from utils.const import (
+    REPO_CACHE_SIZE,
+    REPO_CACHE_TTL,
+    REPO_CACHE_NEGATIVE_TTL,
+    REPO_CACHE_REDIS,
+    REPO_CACHE_REDIS_TTL,
+)
+
+# returned by RepoCache.get when nothing is cached, None is a cached "not found"
+MISS = object()
+
+_MODELS = {"user": UserModel, "token": TokenModel}
+
+# Session.info key of the (kind, key) entries a session has written
+_WRITTEN = "repo_cache_written"
+
+
+class RepoCache:
+    """
+    Read-through cache of users by tg_id and tokens by user_id.
+
+    The in-process tier is an LRU with a short TTL, so writes made by other
+    processes show up after at most ``ttl`` seconds. The optional Redis tier
+    is shared by all processes and invalidated on every write. Unknown users
+    are cached as None for ``negative_ttl`` seconds.
+
+    Writes invalidate twice: right away, and again once their transaction
+    committed, since a concurrent reader may have re-cached the old row in
+    between. Every invalidation bumps ``version``; readers take it before
+    going to the database and a put with an outdated version is dropped.
+    """
+
+    def __init__(
+        self,
+        max_size: int = REPO_CACHE_SIZE,
+        ttl: float = REPO_CACHE_TTL,
+        negative_ttl: float = REPO_CACHE_NEGATIVE_TTL,
+        use_redis: bool = REPO_CACHE_REDIS,
+        redis_ttl: int = REPO_CACHE_REDIS_TTL,
+    ):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.use_redis = use_redis
+        self.redis_ttl = redis_ttl
+        self._items: OrderedDict[tuple[str, int], tuple[float, Any]] = OrderedDict()
+        self._version = 0
+        self._background: set[asyncio.Task] = set()
+        self._stats = {
+            "hits": 0, "redis_hits": 0, "negative_hits": 0, "misses": 0,
+            "evictions": 0, "invalidations": 0, "stale_puts": 0, "redis_errors": 0,
+        }
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    @staticmethod
+    def _redis_key(kind: str, key: int) -> str:
+        return f"repo:{kind}:{key}"
+
+    @staticmethod
+    def _redis():
+        from data import get_config
+        return get_config().redis_client
+
+    def _get_local(self, kind: str, key: int) -> Any:
+        item = self._items.get((kind, key))
+        if item is None:
+            return MISS
+        expires_at, value = item
+        if time.monotonic() > expires_at:
+            del self._items[(kind, key)]
+            return MISS
+        self._items.move_to_end((kind, key))
+        return value
+
+    def _put_local(self, kind: str, key: int, value: Any) -> None:
+        ttl = self.ttl if value is not None else self.negative_ttl
+        self._items[(kind, key)] = (time.monotonic() + ttl, value)
+        self._items.move_to_end((kind, key))
+
+        while len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    async def get(self, kind: str, key: int) -> Any:
+        value = self._get_local(kind, key)
+        if value is not MISS:
+            self._stats["hits" if value is not None else "negative_hits"] += 1
+            return value
+
+        if self.use_redis:
+            try:
+                raw = await self._redis().get(self._redis_key(kind, key))
+            except Exception as e:
+                self._stats["redis_errors"] += 1
+                self.logger.warning(f"Redis tier read failed: {e}")
+                raw = None
+            if raw is not None:
+                data = json.loads(raw)
+                value = _MODELS[kind].model_validate(data) if data is not None else None
+                self._put_local(kind, key, value)
+                self._stats["redis_hits" if value is not None else "negative_hits"] += 1
+                return value
+
+        self._stats["misses"] += 1
+        return MISS
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    async def put(self, kind: str, key: int, value: Optional[Any], version: Optional[int] = None) -> None:
+        """Cache ``value``, unless something was invalidated since ``version`` was taken."""
+        if version is not None and version != self._version:
+            self._stats["stale_puts"] += 1
+            return
+        self._put_local(kind, key, value)
+        if not self.use_redis:
+            return
+        ttl = self.redis_ttl if value is not None else max(int(self.negative_ttl), 1)
+        data = value.model_dump(mode="json") if value is not None else None
+        try:
+            await self._redis().set(self._redis_key(kind, key), json.dumps(data), ex=ttl)
+        except Exception as e:
+            self._stats["redis_errors"] += 1
+            self.logger.warning(f"Redis tier write failed: {e}")
+
+    def _invalidate_local(self, entries: Iterable[tuple[str, int]]) -> None:
+        self._version += 1
+        for entry in entries:
+            if self._items.pop(entry, None) is not None:
+                self._stats["invalidations"] += 1
+
+    async def _invalidate_redis(self, entries: list[tuple[str, int]]) -> None:
+        if not self.use_redis or not entries:
+            return
+        try:
+            await self._redis().delete(*(self._redis_key(kind, key) for kind, key in entries))
+        except Exception as e:
+            self._stats["redis_errors"] += 1
+            self.logger.warning(f"Redis tier invalidation failed: {e}")
+
+    async def invalidate(self, kind: str, keys: Iterable[int]) -> None:
+        entries = [(kind, key) for key in keys]
+        self._invalidate_local(entries)
+        await self._invalidate_redis(entries)
+
+    async def written(self, session: Optional[AsyncSession], kind: str, keys: Iterable[int]) -> None:
+        """Invalidate entries written in ``session`` now and again after its commit."""
+        keys = list(keys)
+        await self.invalidate(kind, keys)
+        if session is None:
+            return
+        sync_session = session.sync_session
+        sync_session.info.setdefault(_WRITTEN, set()).update((kind, key) for key in keys)
+        if not event.contains(sync_session, "after_commit", self._after_commit):
+            event.listen(sync_session, "after_commit", self._after_commit)
+            event.listen(sync_session, "after_rollback", self._after_rollback)
+
+    @staticmethod
+    def has_writes(session: Optional[AsyncSession]) -> bool:
+        """Rows read in a session with uncommitted writes may never be committed."""
+        return session is not None and bool(session.sync_session.info.get(_WRITTEN))
+
+    def _after_commit(self, sync_session) -> None:
+        entries = list(sync_session.info.pop(_WRITTEN, ()))
+        if not entries:
+            return
+        self._invalidate_local(entries)
+        if self.use_redis:
+            # sync hook on the loop's thread, the Redis delete runs as a task
+            task = asyncio.get_running_loop().create_task(self._invalidate_redis(entries))
+            self._background.add(task)
+            task.add_done_callback(self._background.discard)
+
+    @staticmethod
+    def _after_rollback(sync_session) -> None:
+        # nothing was committed, the entries were invalidated when written
+        sync_session.info.pop(_WRITTEN, None)
+
+    def clear(self) -> None:
+        self._items.clear()
+
+    @property
+    def stats(self) -> dict:
+        hits = self._stats["hits"] + self._stats["redis_hits"] + self._stats["negative_hits"]
+        lookups = hits + self._stats["misses"]
+        return {
+            **self._stats,
+            "size": len(self._items),
+            "redis": self.use_redis,
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+# the only instance of the cache
+repo_cache = RepoCache()
+
+
+class CachedUsersRepo(UsersBase):
+    """UsersBase in front of another implementation, caching lookups by tg_id."""
+
+    def __init__(self, inner: UsersBase, cache: RepoCache = repo_cache):
+        self.inner = inner
+        self.cache = cache
+        self.session: Optional[AsyncSession] = getattr(inner, "session", None)
+
+    async def _remember(self, tg_id: int, user: Optional[UserModel], version: int) -> None:
+        if not self.cache.has_writes(self.session):
+            await self.cache.put("user", tg_id, user, version)
+
+    async def create_tables(self) -> bool:
+        return await self.inner.create_tables()
+
+    async def add_user(
+        self,
+        tg_id: int,
+        *,
+        tg_nick: Optional[str] = None,
+        email: Optional[str] = None,
+        google_id: Optional[str] = None
+    ) -> Optional[UserModel]:
+        user = await self.inner.add_user(tg_id, tg_nick=tg_nick, email=email, google_id=google_id)
+        # drops a cached "unknown user"
+        await self.cache.written(self.session, "user", [tg_id])
+        return user
+
+    async def get_user_by_tg_id(self, tg_id: int) -> Optional[UserModel]:
+        user = await self.cache.get("user", tg_id)
+        if user is not MISS:
+            return user
+        version = self.cache.version
+        user = await self.inner.get_user_by_tg_id(tg_id)
+        await self._remember(tg_id, user, version)
+        return user
+
+    async def get_user_by_id(self, user_id: int) -> Optional[UserModel]:
+        return await self.inner.get_user_by_id(user_id)
+
+    async def get_user_by_google_id(self, google_id: str) -> Optional[UserModel]:
+        return await self.inner.get_user_by_google_id(google_id)
+
+    async def get_all_users(self) -> List[UserModel]:
+        return await self.inner.get_all_users()
+
+    async def get_active_users_page(self, after_id: int = 0, limit: int = 500) -> List[UserModel]:
+        return await self.inner.get_active_users_page(after_id, limit)
+
+    async def get_active_tg_ids_page(self, after_id: int = 0, limit: int = 1000) -> List[Tuple[int, int]]:
+        return await self.inner.get_active_tg_ids_page(after_id, limit)
+
+    async def get_users_by_tg_ids(self, tg_ids: List[int]) -> Dict[int, UserModel]:
+        users: Dict[int, UserModel] = {}
+        missing = []
+        for tg_id in dict.fromkeys(tg_ids):
+            user = await self.cache.get("user", tg_id)
+            if user is MISS:
+                missing.append(tg_id)
+            elif user is not None:
+                users[tg_id] = user
+        if missing:
+            version = self.cache.version
+            found = await self.inner.get_users_by_tg_ids(missing)
+            for tg_id in missing:
+                await self._remember(tg_id, found.get(tg_id), version)
+            users.update(found)
+        return users
+
+    def users_with_tokens_iter(self, batch_size: int = 1000) -> AsyncIterator[List[Tuple[UserModel, TokenModel]]]:
+        return self.inner.users_with_tokens_iter(batch_size)
+
+    async def user_exists(self, tg_id: int) -> bool:
+        return await self.get_user_by_tg_id(tg_id) is not None
+
+    async def google_id_exists(self, google_id: str) -> bool:
+        return await self.inner.google_id_exists(google_id)
+
+    async def update_user(
+        self,
+        tg_id: int,
+        *,
+        tg_nick: Optional[str] = None,
+        email: Optional[str] = None,
+        google_id: Optional[str] = None,
+        timezone: Optional[str] = None
+    ) -> bool:
+        updated = await self.inner.update_user(
+            tg_id, tg_nick=tg_nick, email=email, google_id=google_id, timezone=timezone
+        )
+        await self.cache.written(self.session, "user", [tg_id])
+        return updated
+
+    async def delete_user(self, tg_id: int) -> bool:
+        user = await self.get_user_by_tg_id(tg_id)
+        deleted = await self.inner.delete_user(tg_id)
+        await self.cache.written(self.session, "user", [tg_id])
+        if user is not None:
+            # the token rows go with the user (ON DELETE CASCADE)
+            await self.cache.written(self.session, "token", [user.id])
+        return deleted
+
+    async def delete_all_tables(self) -> bool:
+        self.cache.clear()
+        return await self.inner.delete_all_tables()
+
+
+class CachedTokensRepo(GoogleTokensBase):
+    """GoogleTokensBase in front of another implementation, caching tokens by user_id."""
+
+    def __init__(self, inner: GoogleTokensBase, cache: RepoCache = repo_cache):
+        self.inner = inner
+        self.cache = cache
+        self.session: Optional[AsyncSession] = getattr(inner, "session", None)
+
+    async def _remember(self, user_id: int, token: TokenModel, version: int) -> None:
+        if not self.cache.has_writes(self.session):
+            await self.cache.put("token", user_id, token, version)
+
+    async def create_tables(self) -> bool:
+        return await self.inner.create_tables()
+
+    async def save_token(
+        self,
+        user_id: int,
+        access_token: str,
+        refresh_token: Optional[str] = None,
+        token_type: str = "Bearer",
+        token_expiry: Optional[datetime] = None,
+        scopes: Optional[str] = None
+    ) -> bool:
+        saved = await self.inner.save_token(
+            user_id, access_token, refresh_token, token_type, token_expiry, scopes
+        )
+        await self.cache.written(self.session, "token", [user_id])
+        return saved
+
+    async def get_token(self, user_id: int) -> Optional[TokenModel]:
+        token = await self.cache.get("token", user_id)
+        if token is not MISS:
+            return token
+        version = self.cache.version
+        token = await self.inner.get_token(user_id)
+        if token is not None:
+            # a missing token is not cached, the OAuth callback may be writing it
+            await self._remember(user_id, token, version)
+        return token
+
+    async def get_token_by_tg_id(self, tg_id: int) -> Optional[TokenModel]:
+        user = await self.cache.get("user", tg_id)
+        if user is None:
+            return None
+        if user is not MISS:
+            return await self.get_token(user.id)
+        version = self.cache.version
+        token = await self.inner.get_token_by_tg_id(tg_id)
+        if token is not None:
+            await self._remember(token.user_id, token, version)
+        return token
+
+    async def get_tokens_for_users(self, user_ids: List[int]) -> Dict[int, TokenModel]:
+        tokens: Dict[int, TokenModel] = {}
+        missing = []
+        for user_id in dict.fromkeys(user_ids):
+            token = await self.cache.get("token", user_id)
+            if token is MISS or token is None:
+                missing.append(user_id)
+            else:
+                tokens[user_id] = token
+        if missing:
+            version = self.cache.version
+            found = await self.inner.get_tokens_for_users(missing)
+            for user_id, token in found.items():
+                await self._remember(user_id, token, version)
+            tokens.update(found)
+        return tokens
+
+    async def upsert_tokens_bulk(self, tokens: List[TokenModel]) -> int:
+        saved = await self.inner.upsert_tokens_bulk(tokens)
+        await self.cache.written(self.session, "token", {token.user_id for token in tokens})
+        return saved
+
+    async def get_tokens_expiring_before(
+        self,
+        moment: datetime,
+        limit: int = 100,
+        now: Optional[datetime] = None
+    ) -> List[TokenModel]:
+        return await self.inner.get_tokens_expiring_before(moment, limit, now)
+
+    async def mark_renew_failed(self, user_id: int, retry_at: datetime) -> bool:
+        marked = await self.inner.mark_renew_failed(user_id, retry_at)
+        await self.cache.written(self.session, "token", [user_id])
+        return marked
+
+    async def update_token(
+        self,
+        user_id: int,
+        *,
+        access_token: Optional[str] = None,
+        refresh_token: Optional[str] = None,
+        token_expiry: Optional[datetime] = None
+    ) -> bool:
+        updated = await self.inner.update_token(
+            user_id, access_token=access_token, refresh_token=refresh_token, token_expiry=token_expiry
+        )
+        await self.cache.written(self.session, "token", [user_id])
+        return updated
+
+    async def delete_token(self, user_id: int) -> bool:
+        deleted = await self.inner.delete_token(user_id)
+        await self.cache.written(self.session, "token", [user_id])
+        return deleted
+
+    async def token_exists(self, user_id: int) -> bool:
+        return await self.get_token(user_id) is not None
+
+    async def delete_all_tables(self) -> bool:
+        self.cache.clear()
+        return await self.inner.delete_all_tables()
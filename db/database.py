@@ -1,4 +1,5 @@
 import logging
+from pathlib import Path
 from typing import Optional
 from contextlib import asynccontextmanager
 
@@ -6,11 +7,17 @@ from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from db.sqlalchemy.models import Base
-from db.database_protocol import UsersBase, GoogleTokensBase
+from db.database_protocol import UsersBase, GoogleTokensBase, EventsBase
 
 from src.enum import DatabaseType
 from src.factories import repository_factory
 
+MIGRATIONS_DIR = Path(__file__).resolve().parent / "migrations"
+ALEMBIC_INI = MIGRATIONS_DIR.parent.parent / "alembic.ini"
+# pg_advisory_lock key, services starting together migrate one at a time
+_MIGRATION_LOCK = 0x50_41_4D_47
+
+
 class Database:
     def __init__(self):
         self.sqlalchemy_manager = None
@@ -58,13 +65,41 @@ class Database:
             session = self.get_session()
         return repository_factory.create_tokens_repo(session)
 
-    async def create_tables(self):
+    def get_events_repo(self, session: Optional[AsyncSession] = None) -> EventsBase:
+        if session is None:
+            session = self.get_session()
+        return repository_factory.create_events_repo(session)
+
+    async def migrate(self):
+        """Upgrade the schema to the latest Alembic revision."""
         if not self._initialized:
             raise RuntimeError("Database not initialized")
         engine = self.sqlalchemy_manager.get_engine()
-        async with engine.begin() as conn:
-            await conn.run_sync(Base.metadata.create_all)
-        self.logger.info("✅ All tables created")
+        async with engine.connect() as conn:
+            postgres = conn.dialect.name == "postgresql"
+            if postgres:
+                await conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": _MIGRATION_LOCK})
+            try:
+                await conn.run_sync(self._upgrade)
+                await conn.commit()
+            except Exception:
+                await conn.rollback()
+                raise
+            finally:
+                if postgres:
+                    await conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": _MIGRATION_LOCK})
+                    await conn.commit()
+        self.logger.info("✅ Database schema is up to date")
+
+    @staticmethod
+    def _upgrade(conn) -> None:
+        from alembic import command
+        from alembic.config import Config
+
+        config = Config(str(ALEMBIC_INI))
+        config.set_main_option("script_location", str(MIGRATIONS_DIR))
+        config.attributes["connection"] = conn
+        command.upgrade(config, "head")
 
     async def drop_tables(self):
         if not self._initialized:
@@ -78,6 +113,7 @@ class Database:
         else:
             async with engine.begin() as conn:
                 await conn.run_sync(Base.metadata.drop_all)
+                await conn.execute(text("DROP TABLE IF EXISTS alembic_version"))
 
         self.logger.info("✅ All tables dropped")
 
@@ -1,8 +1,8 @@
 from datetime import datetime
-from typing import Optional, List
+from typing import AsyncIterator, Dict, Optional, List, Tuple
 from abc import ABC, abstractmethod
 
-from src.models import UserModel, TokenModel
+from src.models import UserModel, TokenModel, EventModel, SyncStateModel
 
 
 class UsersBase(ABC):
@@ -48,6 +48,42 @@ class UsersBase(ABC):
         """Get all users"""
         ...
 
+    @abstractmethod
+    async def get_active_users_page(self, after_id: int = 0, limit: int = 500) -> List[UserModel]:
+        """
+        Get users that have a Google token, keyset-paged by internal ID.
+
+        Note:
+            Pass the last returned id as after_id to get the next page.
+            Raises on database errors, an empty page always means the end.
+        """
+        ...
+
+    @abstractmethod
+    async def get_active_tg_ids_page(self, after_id: int = 0, limit: int = 1000) -> List[Tuple[int, int]]:
+        """
+        Get (id, tg_id) of users that have a Google token, keyset-paged by
+        internal ID, without loading full rows. Raises on database errors,
+        an empty page always means the end.
+        """
+        ...
+
+    @abstractmethod
+    async def get_users_by_tg_ids(self, tg_ids: List[int]) -> Dict[int, UserModel]:
+        """Get users by Telegram IDs in one query per chunk, keyed by tg_id; unknown ids are absent"""
+        ...
+
+    @abstractmethod
+    def users_with_tokens_iter(self, batch_size: int = 1000) -> AsyncIterator[List[Tuple[UserModel, TokenModel]]]:
+        """
+        Stream (user, latest token) pairs of authorized users in batches.
+
+        Note:
+            Uses a server-side cursor, the session must not run other
+            queries until the iteration is finished.
+        """
+        ...
+
     @abstractmethod
     async def user_exists(self, tg_id: int) -> bool:
         """Check if a user exists by Telegram ID"""
@@ -65,7 +101,8 @@ class UsersBase(ABC):
         *,
         tg_nick: Optional[str] = None,
         email: Optional[str] = None,
-        google_id: Optional[str] = None
+        google_id: Optional[str] = None,
+        timezone: Optional[str] = None
     ) -> bool:
         """
         Update user data.
@@ -106,7 +143,7 @@ class GoogleTokensBase(ABC):
         scopes: Optional[str] = None
     ) -> bool:
         """
-        Save or update a token.
+        Save or update the user's token, a user has at most one.
 
         Note:
             scopes is used only in PostgreSQL.
@@ -129,10 +166,45 @@ class GoogleTokensBase(ABC):
         Get a token by Telegram ID.
 
         Note:
-            Requires a JOIN with the users table.
+            Resolves the user's id from the users table first.
         """
         ...
 
+    @abstractmethod
+    async def get_tokens_for_users(self, user_ids: List[int]) -> Dict[int, TokenModel]:
+        """Get the latest token of every given user, keyed by user_id"""
+        ...
+
+    @abstractmethod
+    async def upsert_tokens_bulk(self, tokens: List[TokenModel]) -> int:
+        """
+        Save many tokens at once, updating the token of users that have one
+        and inserting the rest. Returns the number of tokens saved.
+        """
+        ...
+
+    @abstractmethod
+    async def get_tokens_expiring_before(
+        self,
+        moment: datetime,
+        limit: int = 100,
+        now: Optional[datetime] = None
+    ) -> List[TokenModel]:
+        """
+        Get refreshable tokens whose expiry is earlier than moment.
+
+        Note:
+            Used by the background renewer, soonest expiry first. Tokens
+            whose renewal failed are skipped until their renew_after has
+            passed ``now``.
+        """
+        ...
+
+    @abstractmethod
+    async def mark_renew_failed(self, user_id: int, retry_at: datetime) -> bool:
+        """Count a failed renewal and skip the token until retry_at"""
+        ...
+
     @abstractmethod
     async def update_token(
         self,
@@ -158,4 +230,86 @@ class GoogleTokensBase(ABC):
     @abstractmethod
     async def delete_all_tables(self) -> bool:
         """Delete token tables (used for testing)"""
-        ...
\ No newline at end of file
+        ...
+
+
+class EventsBase(ABC):
+    """Base interface for the local calendar event store"""
+
+    @abstractmethod
+    async def get_sync_state(self, user_id: int) -> Optional[SyncStateModel]:
+        """Get the last syncToken and sync time of a user"""
+        ...
+
+    @abstractmethod
+    async def save_sync_state(self, user_id: int, sync_token: Optional[str], synced_at: Optional[datetime]) -> bool:
+        """Save or update the sync state of a user"""
+        ...
+
+    @abstractmethod
+    async def get_sync_state_by_channel(self, channel_id: str) -> Optional[SyncStateModel]:
+        """Get the sync state that owns a push notification channel"""
+        ...
+
+    @abstractmethod
+    async def save_channel(
+        self,
+        user_id: int,
+        channel_id: Optional[str],
+        resource_id: Optional[str] = None,
+        token: Optional[str] = None,
+        expires_at: Optional[datetime] = None
+    ) -> bool:
+        """
+        Save the push notification channel of a user.
+
+        Note:
+            channel_id=None removes the channel.
+        """
+        ...
+
+    @abstractmethod
+    async def mark_stale(self, user_id: int) -> bool:
+        """Force the next read of a user to sync with Google"""
+        ...
+
+    @abstractmethod
+    async def upsert_events(self, user_id: int, events: List[dict]) -> bool:
+        """
+        Insert or update raw Google events.
+
+        Note:
+            Rows are matched by (user_id, event_id).
+        """
+        ...
+
+    @abstractmethod
+    async def delete_events(self, user_id: int, event_ids: List[str]) -> bool:
+        """Delete events by Google event ID"""
+        ...
+
+    @abstractmethod
+    async def clear_events(self, user_id: int) -> bool:
+        """
+        Delete all stored events of a user and forget the syncToken.
+
+        Note:
+            The push notification channel is kept.
+        """
+        ...
+
+    @abstractmethod
+    async def get_events_range(
+        self,
+        user_id: int,
+        start: datetime,
+        end: datetime,
+        query: Optional[str] = None
+    ) -> List[EventModel]:
+        """
+        Get events overlapping [start, end), ordered by start.
+
+        Note:
+            start and end are naive UTC, query matches summary or description.
+        """
+        ...
@@ -0,0 +1,146 @@
+"""baseline: the schema create_all used to build on startup
+
+Creates the tables that are missing, so databases created by
+Base.metadata.create_all before migrations existed are adopted as they
+are: the users.timezone column they may lack is added and google_tokens
+is de-duplicated to one row per user before its unique index is created.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# keeps the newest token row per user, older rows predate uq_google_tokens_user
+_DEDUPE_TOKENS = """
+DELETE FROM google_tokens WHERE id NOT IN (
+    SELECT id FROM (
+        SELECT id, row_number() OVER (
+            PARTITION BY user_id ORDER BY created_at DESC, id DESC
+        ) AS rn
+        FROM google_tokens
+    ) ranked
+    WHERE rn = 1
+)
+"""
+
+
+def _timestamps() -> list[sa.Column]:
+    return [
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    ]
+
+
+def _create_users() -> None:
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("tg_id", sa.Integer(), nullable=False),
+        sa.Column("tg_nick", sa.String(), nullable=True),
+        sa.Column("email", sa.String(), nullable=True),
+        sa.Column("google_id", sa.String(), nullable=True),
+        sa.Column("timezone", sa.String(), nullable=True),
+        *_timestamps(),
+    )
+    op.create_index("ix_users_tg_id", "users", ["tg_id"], unique=True)
+    op.create_index("ix_users_google_id", "users", ["google_id"])
+
+
+def _create_google_tokens() -> None:
+    op.create_table(
+        "google_tokens",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("access_token", sa.Text(), nullable=False),
+        sa.Column("refresh_token", sa.Text(), nullable=True),
+        sa.Column("token_expiry", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("token_type", sa.String(), nullable=True),
+        sa.Column("scopes", sa.Text(), nullable=True),
+        *_timestamps(),
+        sa.UniqueConstraint("user_id", name="uq_google_tokens_user"),
+    )
+
+
+def _create_calendar_events() -> None:
+    op.create_table(
+        "calendar_events",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("event_id", sa.String(), nullable=False),
+        sa.Column("status", sa.String(), nullable=True),
+        sa.Column("summary", sa.Text(), nullable=True),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.Column("start_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("end_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("payload", sa.Text(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.UniqueConstraint("user_id", "event_id", name="uq_calendar_events_user_event"),
+    )
+    op.create_index("ix_calendar_events_user_start", "calendar_events", ["user_id", "start_at"])
+
+
+def _create_calendar_sync_state() -> None:
+    op.create_table(
+        "calendar_sync_state",
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("sync_token", sa.Text(), nullable=True),
+        sa.Column("synced_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("channel_id", sa.String(), nullable=True, unique=True),
+        sa.Column("channel_resource_id", sa.String(), nullable=True),
+        sa.Column("channel_token", sa.String(), nullable=True),
+        sa.Column("channel_expires_at", sa.DateTime(timezone=True), nullable=True),
+    )
+
+
+def _adopt_users(inspector) -> None:
+    if "timezone" not in {c["name"] for c in inspector.get_columns("users")}:
+        op.add_column("users", sa.Column("timezone", sa.String(), nullable=True))
+
+
+def _adopt_google_tokens(inspector) -> None:
+    unique = [c["column_names"] for c in inspector.get_unique_constraints("google_tokens")]
+    unique += [i["column_names"] for i in inspector.get_indexes("google_tokens") if i["unique"]]
+    if ["user_id"] not in unique:
+        op.execute(_DEDUPE_TOKENS)
+        # a unique index is enough for ON CONFLICT (user_id)
+        op.create_index("uq_google_tokens_user", "google_tokens", ["user_id"], unique=True)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    existing = set(inspector.get_table_names())
+
+    for table, create in (
+        ("users", _create_users),
+        ("google_tokens", _create_google_tokens),
+        ("calendar_events", _create_calendar_events),
+        ("calendar_sync_state", _create_calendar_sync_state),
+    ):
+        if table not in existing:
+            create()
+
+    if "users" in existing:
+        _adopt_users(inspector)
+    if "google_tokens" in existing:
+        _adopt_google_tokens(inspector)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("calendar_sync_state")
+    op.drop_table("calendar_events")
+    op.drop_table("google_tokens")
+    op.drop_table("users")
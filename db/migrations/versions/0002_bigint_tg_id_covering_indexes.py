@@ -0,0 +1,67 @@
+"""bigint tg_id, covering indexes for the token/user lookups
+
+- users.tg_id becomes BIGINT, Telegram ids no longer fit into 32 bits.
+  SQLite's INTEGER is 64-bit already, only Postgres is altered.
+- ix_users_tg_id includes id, resolving tg_id -> id is index-only.
+- ix_google_tokens_user_created (user_id, created_at DESC) INCLUDE (id)
+  serves "newest token of a user" and the token_exists check; the old
+  single-column ix_google_tokens_user_id is covered by it and dropped.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 10:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, Sequence[str], None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _is_postgres() -> bool:
+    return op.get_bind().dialect.name == "postgresql"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if _is_postgres():
+        op.alter_column(
+            "users", "tg_id",
+            type_=sa.BigInteger(),
+            existing_type=sa.Integer(),
+            existing_nullable=False,
+        )
+        op.drop_index("ix_users_tg_id", table_name="users")
+        op.create_index("ix_users_tg_id", "users", ["tg_id"], unique=True, postgresql_include=["id"])
+
+    # created by create_all before uq_google_tokens_user existed
+    op.execute("DROP INDEX IF EXISTS ix_google_tokens_user_id")
+    op.create_index(
+        "ix_google_tokens_user_created",
+        "google_tokens",
+        ["user_id", sa.text("created_at DESC")],
+        postgresql_include=["id"],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_google_tokens_user_created", table_name="google_tokens")
+    op.create_index("ix_google_tokens_user_id", "google_tokens", ["user_id"])
+
+    if _is_postgres():
+        op.drop_index("ix_users_tg_id", table_name="users")
+        op.create_index("ix_users_tg_id", "users", ["tg_id"], unique=True)
+        op.alter_column(
+            "users", "tg_id",
+            type_=sa.Integer(),
+            existing_type=sa.BigInteger(),
+            existing_nullable=False,
+        )
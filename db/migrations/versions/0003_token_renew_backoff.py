@@ -0,0 +1,41 @@
+"""token renewal backoff
+
+google_tokens.renew_failures / renew_after: the background renewer skips
+tokens whose refresh failed until renew_after, so revoked grants no longer
+head every ORDER BY token_expiry batch and starve the live tokens.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, Sequence[str], None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "google_tokens",
+        sa.Column("renew_failures", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.add_column(
+        "google_tokens",
+        sa.Column("renew_after", sa.DateTime(timezone=True), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table("google_tokens") as batch:
+        batch.drop_column("renew_after")
+        batch.drop_column("renew_failures")
@@ -0,0 +1,41 @@
+from typing import Iterable, Iterator, Sequence
+from sqlalchemy import ARRAY, any_, bindparam
+from sqlalchemy.sql import ColumnElement
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.dialects import postgresql, sqlite
+
+# SQLite's default SQLITE_MAX_VARIABLE_NUMBER on older builds is 999
+SQLITE_MAX_VARIABLES = 900
+
+
+def is_postgres(session: AsyncSession) -> bool:
+    return session.bind.dialect.name == "postgresql"
+
+
+def dialect_insert(session: AsyncSession, entity):
+    """INSERT construct of the session's dialect, the one with ``on_conflict_do_update``."""
+    if is_postgres(session):
+        return postgresql.insert(entity)
+    return sqlite.insert(entity)
+
+
+def chunked(values: Sequence, size: int) -> Iterator[Sequence]:
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+
+def in_values(session: AsyncSession, column, values: Iterable) -> Iterator[ColumnElement]:
+    """
+    Membership predicates for ``values``, one query each.
+
+    Postgres gets a single ``column = ANY(:array)`` with the whole list in
+    one parameter; SQLite gets IN lists under its bound-variable limit.
+    """
+    values = list(dict.fromkeys(values))
+    if not values:
+        return
+    if is_postgres(session):
+        yield column == any_(bindparam(None, values, type_=ARRAY(column.type)))
+        return
+    for chunk in chunked(values, SQLITE_MAX_VARIABLES):
+        yield column.in_(chunk)
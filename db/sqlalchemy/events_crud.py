@@ -0,0 +1,190 @@
+import json
+import logging
+from typing import Optional, List
+from datetime import datetime
+from sqlalchemy import select, update, delete, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.models import EventModel, SyncStateModel
+from db.database_protocol import EventsBase
+from db.sqlalchemy.models import CalendarEvent, CalendarSyncState
+from utils.helpers import DateTimeNormalizer
+
+class EventsORM(EventsBase):
+    def __init__(self, session: AsyncSession):
+        self.session = session
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    async def get_sync_state(self, user_id: int) -> Optional[SyncStateModel]:
+        try:
+            state = await self.session.get(CalendarSyncState, user_id)
+            return SyncStateModel.model_validate(state) if state else None
+        except Exception as e:
+            self.logger.error(f"❌ Error when receiving the sync state for user {user_id}: {e}")
+            return None
+
+    async def save_sync_state(self, user_id: int, sync_token: Optional[str], synced_at: Optional[datetime]) -> bool:
+        try:
+            state = await self.session.get(CalendarSyncState, user_id)
+            if state:
+                state.sync_token = sync_token
+                state.synced_at = synced_at
+            else:
+                self.session.add(CalendarSyncState(user_id=user_id, sync_token=sync_token, synced_at=synced_at))
+            await self.session.flush()
+            return True
+        except Exception as e:
+            self.logger.error(f"❌ Error saving the sync state for user {user_id}: {e}", exc_info=True)
+            return False
+
+    async def get_sync_state_by_channel(self, channel_id: str) -> Optional[SyncStateModel]:
+        try:
+            result = await self.session.execute(
+                select(CalendarSyncState).where(CalendarSyncState.channel_id == channel_id)
+            )
+            state = result.scalar_one_or_none()
+            return SyncStateModel.model_validate(state) if state else None
+        except Exception as e:
+            self.logger.error(f"❌ Error when receiving the sync state of channel {channel_id}: {e}")
+            return None
+
+    async def save_channel(
+        self,
+        user_id: int,
+        channel_id: Optional[str],
+        resource_id: Optional[str] = None,
+        token: Optional[str] = None,
+        expires_at: Optional[datetime] = None
+    ) -> bool:
+        try:
+            values = {
+                "channel_id": channel_id,
+                "channel_resource_id": resource_id,
+                "channel_token": token,
+                "channel_expires_at": expires_at,
+            }
+            state = await self.session.get(CalendarSyncState, user_id)
+            if state:
+                for key, value in values.items():
+                    setattr(state, key, value)
+            else:
+                self.session.add(CalendarSyncState(user_id=user_id, **values))
+            await self.session.flush()
+            return True
+        except Exception as e:
+            self.logger.error(f"❌ Error saving the channel for user {user_id}: {e}", exc_info=True)
+            return False
+
+    async def mark_stale(self, user_id: int) -> bool:
+        try:
+            await self.session.execute(
+                update(CalendarSyncState)
+                .where(CalendarSyncState.user_id == user_id)
+                .values(synced_at=None)
+            )
+            return True
+        except Exception as e:
+            self.logger.error(f"❌ Error marking the events of user {user_id} stale: {e}")
+            return False
+
+    @staticmethod
+    def _row_values(event: dict) -> dict:
+        payload = {k: event[k] for k in EventModel.model_fields if k in event}
+        return {
+            "status": event.get("status"),
+            "summary": event.get("summary"),
+            "description": event.get("description"),
+            "start_at": DateTimeNormalizer.event_time(event.get("start")),
+            "end_at": DateTimeNormalizer.event_time(event.get("end")),
+            "payload": json.dumps(payload, ensure_ascii=False),
+        }
+
+    async def upsert_events(self, user_id: int, events: List[dict]) -> bool:
+        if not events:
+            return True
+        try:
+            by_id = {event["id"]: event for event in events}
+            result = await self.session.execute(
+                select(CalendarEvent.id, CalendarEvent.event_id)
+                .where(
+                    CalendarEvent.user_id == user_id,
+                    CalendarEvent.event_id.in_(by_id)
+                )
+            )
+            existing = {event_id: row_id for row_id, event_id in result.all()}
+
+            for event_id, event in by_id.items():
+                values = self._row_values(event)
+                if event_id in existing:
+                    await self.session.execute(
+                        update(CalendarEvent)
+                        .where(CalendarEvent.id == existing[event_id])
+                        .values(**values)
+                    )
+                else:
+                    self.session.add(CalendarEvent(user_id=user_id, event_id=event_id, **values))
+
+            await self.session.flush()
+            return True
+        except Exception as e:
+            self.logger.error(f"❌ Error saving events for user {user_id}: {e}", exc_info=True)
+            return False
+
+    async def delete_events(self, user_id: int, event_ids: List[str]) -> bool:
+        if not event_ids:
+            return True
+        try:
+            await self.session.execute(
+                delete(CalendarEvent).where(
+                    CalendarEvent.user_id == user_id,
+                    CalendarEvent.event_id.in_(event_ids)
+                )
+            )
+            return True
+        except Exception as e:
+            self.logger.error(f"❌ Error deleting events for user {user_id}: {e}")
+            return False
+
+    async def clear_events(self, user_id: int) -> bool:
+        try:
+            await self.session.execute(delete(CalendarEvent).where(CalendarEvent.user_id == user_id))
+            await self.session.execute(
+                update(CalendarSyncState)
+                .where(CalendarSyncState.user_id == user_id)
+                .values(sync_token=None, synced_at=None)
+            )
+            self.logger.info(f"✅ Local events of user {user_id} have been cleared")
+            return True
+        except Exception as e:
+            self.logger.error(f"❌ Error clearing events for user {user_id}: {e}")
+            return False
+
+    async def get_events_range(
+        self,
+        user_id: int,
+        start: datetime,
+        end: datetime,
+        query: Optional[str] = None
+    ) -> List[EventModel]:
+        try:
+            stmt = (
+                select(CalendarEvent.payload)
+                .where(
+                    CalendarEvent.user_id == user_id,
+                    CalendarEvent.start_at < end,
+                    CalendarEvent.end_at > start,
+                )
+                .order_by(CalendarEvent.start_at)
+            )
+            if query:
+                pattern = f"%{query}%"
+                stmt = stmt.where(or_(
+                    CalendarEvent.summary.ilike(pattern),
+                    CalendarEvent.description.ilike(pattern)
+                ))
+
+            result = await self.session.execute(stmt)
+            return [EventModel.model_validate(json.loads(payload)) for payload in result.scalars().all()]
+        except Exception as e:
+            self.logger.error(f"❌ Error when receiving events for user {user_id}: {e}")
+            return []
@@ -1,14 +1,33 @@
 import json
 import logging
-from typing import Optional
+from typing import Dict, Optional, List
 from datetime import datetime
-from sqlalchemy import select, update, delete
+from sqlalchemy import select, update, delete, func, or_
+from sqlalchemy.orm import aliased
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.models import TokenModel
 from db.database_protocol import GoogleTokensBase
+from db.sqlalchemy.bulk import in_values, dialect_insert
 from db.sqlalchemy.models import GoogleToken, Users
 
+
+def latest_tokens(*criteria):
+    """GoogleToken alias over the newest token row per user, optionally filtered."""
+    ranked = (
+        select(
+            GoogleToken,
+            func.row_number().over(
+                partition_by=GoogleToken.user_id,
+                order_by=GoogleToken.created_at.desc()
+            ).label("rn")
+        )
+        .where(*criteria)
+        .subquery()
+    )
+    return aliased(GoogleToken, select(ranked).where(ranked.c.rn == 1).subquery())
+
+
 class GoogleTokensORM(GoogleTokensBase):
     def __init__(self, session: AsyncSession):
         self.session = session
@@ -17,6 +36,26 @@ class GoogleTokensORM(GoogleTokensBase):
     async def create_tables(self) -> bool:
         ...
 
+    def _upsert(self):
+        """
+        INSERT that updates the user's row on ``uq_google_tokens_user`` instead.
+
+        Like the old update path, a missing refresh token or expiry keeps the
+        stored one; token_type and scopes are only set on insert.
+        """
+        stmt = dialect_insert(self.session, GoogleToken)
+        return stmt.on_conflict_do_update(
+            index_elements=[GoogleToken.user_id],
+            set_={
+                "access_token": stmt.excluded.access_token,
+                "refresh_token": func.coalesce(stmt.excluded.refresh_token, GoogleToken.refresh_token),
+                "token_expiry": func.coalesce(stmt.excluded.token_expiry, GoogleToken.token_expiry),
+                "renew_failures": 0,
+                "renew_after": None,
+                "updated_at": datetime.now(),
+            }
+        )
+
     async def save_token(
         self,
         user_id: int,
@@ -27,17 +66,9 @@ class GoogleTokensORM(GoogleTokensBase):
         scopes: Optional[str] = None
     ) -> bool:
         try:
-            existing_token = await self.get_token(user_id)
-
-            if existing_token:
-                return await self._update_token_by_id(
-                    token_id=existing_token.id,
-                    access_token=access_token,
-                    refresh_token=refresh_token,
-                    token_expiry=token_expiry
-                )
-            else:
-                token = GoogleToken(
+            result = await self.session.execute(
+                self._upsert()
+                .values(
                     user_id=user_id,
                     access_token=access_token,
                     refresh_token=refresh_token,
@@ -45,10 +76,11 @@ class GoogleTokensORM(GoogleTokensBase):
                     token_type=token_type,
                     scopes=json.dumps(scopes) if scopes is not None else None
                 )
-                self.session.add(token)
-                await self.session.flush()
-                self.logger.info(f"✅ The token for user {user_id} has been successfully saved")
-                return True
+                .returning(GoogleToken.id)
+            )
+            token_id = result.scalar_one()
+            self.logger.info(f"✅ The token for user {user_id} has been successfully saved (id={token_id})")
+            return True
 
         except Exception as e:
             self.logger.error(f"❌ Error saving the token for the user {user_id}: {e}", exc_info=True)
@@ -70,10 +102,11 @@ class GoogleTokensORM(GoogleTokensBase):
 
     async def get_token_by_tg_id(self, tg_id: int) -> Optional[TokenModel]:
         try:
+            # tg_id -> id is an index-only lookup on ix_users_tg_id, no join
+            user_id = select(Users.id).where(Users.tg_id == tg_id).scalar_subquery()
             result = await self.session.execute(
                 select(GoogleToken)
-                .join(Users, GoogleToken.user_id == Users.id)  
-                .where(Users.tg_id == tg_id)
+                .where(GoogleToken.user_id == user_id)
                 .order_by(GoogleToken.created_at.desc())
                 .limit(1)
             )
@@ -83,6 +116,83 @@ class GoogleTokensORM(GoogleTokensBase):
             self.logger.error(f"❌ Error when receiving the token by tg_id {tg_id}: {e}")
             return None
 
+    async def get_tokens_for_users(self, user_ids: List[int]) -> Dict[int, TokenModel]:
+        tokens: Dict[int, TokenModel] = {}
+        try:
+            for predicate in in_values(self.session, GoogleToken.user_id, user_ids):
+                token = latest_tokens(predicate)
+                result = await self.session.execute(select(token))
+                for row in result.scalars().all():
+                    tokens[row.user_id] = TokenModel.model_validate(row)
+            return tokens
+        except Exception as e:
+            self.logger.error(f"❌ Error when receiving tokens of {len(user_ids)} users: {e}")
+            return tokens
+
+    async def upsert_tokens_bulk(self, tokens: List[TokenModel]) -> int:
+        if not tokens:
+            return 0
+        try:
+            # the last token given for a user wins, like consecutive save_token calls;
+            # a statement can't upsert the same row twice anyway
+            by_user = {token.user_id: token for token in tokens}
+            rows = [
+                {
+                    "user_id": user_id,
+                    "access_token": token.access_token,
+                    "refresh_token": token.refresh_token,
+                    "token_expiry": token.token_expiry,
+                    "token_type": token.token_type,
+                    "scopes": token.scopes,
+                }
+                for user_id, token in by_user.items()
+            ]
+            # executemany of the upsert, batched into multi-row VALUES by SQLAlchemy
+            await self.session.execute(self._upsert(), rows)
+            await self.session.flush()
+            self.logger.info(f"✅ {len(rows)} tokens saved")
+            return len(rows)
+        except Exception as e:
+            self.logger.error(f"❌ Error saving {len(tokens)} tokens: {e}", exc_info=True)
+            return 0
+
+    async def get_tokens_expiring_before(
+        self,
+        moment: datetime,
+        limit: int = 100,
+        now: Optional[datetime] = None
+    ) -> List[TokenModel]:
+        try:
+            now = now or datetime.now()
+            result = await self.session.execute(
+                select(GoogleToken)
+                .where(
+                    GoogleToken.refresh_token.is_not(None),
+                    GoogleToken.token_expiry.is_not(None),
+                    GoogleToken.token_expiry < moment,
+                    # failed renewals wait out their backoff instead of heading every batch
+                    or_(GoogleToken.renew_after.is_(None), GoogleToken.renew_after <= now),
+                )
+                .order_by(GoogleToken.token_expiry, GoogleToken.id)
+                .limit(limit)
+            )
+            return [TokenModel.model_validate(t) for t in result.scalars().all()]
+        except Exception as e:
+            self.logger.error(f"❌ Error when receiving expiring tokens: {e}")
+            return []
+
+    async def mark_renew_failed(self, user_id: int, retry_at: datetime) -> bool:
+        try:
+            await self.session.execute(
+                update(GoogleToken)
+                .where(GoogleToken.user_id == user_id)
+                .values(renew_failures=GoogleToken.renew_failures + 1, renew_after=retry_at)
+            )
+            return True
+        except Exception as e:
+            self.logger.error(f"❌ Error when marking the renewal of user {user_id} as failed: {e}")
+            return False
+
     async def update_token(
         self,
         user_id: int,
@@ -108,7 +218,7 @@ class GoogleTokensORM(GoogleTokensBase):
         token_expiry: Optional[datetime] = None
     ) -> bool:
         try:
-            update_data: dict = {"updated_at": datetime.now()}
+            update_data: dict = {"updated_at": datetime.now(), "renew_failures": 0, "renew_after": None}
             if access_token is not None:
                 update_data["access_token"] = access_token
             if refresh_token is not None:
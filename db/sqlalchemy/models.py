@@ -1,6 +1,6 @@
 from datetime import datetime
 from typing import Annotated, Optional
-from sqlalchemy import Integer, String, DateTime, func, ForeignKey, Text
+from sqlalchemy import Integer, BigInteger, String, DateTime, func, ForeignKey, Text, Index, UniqueConstraint
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
 strnullable = Annotated[Optional[str], mapped_column(String, nullable=True)]
@@ -15,12 +15,19 @@ class Base(DeclarativeBase):
 
 class Users(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        # covers tg_id -> id, user_exists and the token-by-tg_id lookup are index-only on Postgres
+        Index("ix_users_tg_id", "tg_id", unique=True, postgresql_include=["id"]),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
-    tg_id: Mapped[int] = mapped_column(Integer, unique=True, index=True)
+    # Telegram ids no longer fit into 32 bits
+    tg_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
     tg_nick: Mapped[strnullable]
     email: Mapped[strnullable]
     google_id: Mapped[strnullable] = mapped_column(String, nullable=True, index=True)  # + index
+    # IANA name of the primary calendar's zone, drives the local digest time
+    timezone: Mapped[strnullable]
 
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
@@ -44,12 +51,15 @@ class Users(Base):
 
 class GoogleToken(Base):
     __tablename__ = "google_tokens"
+    __table_args__ = (
+        # one token row per user, save_token upserts on it
+        UniqueConstraint("user_id", name="uq_google_tokens_user"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     user_id: Mapped[int] = mapped_column(
         ForeignKey("users.id", ondelete="CASCADE"),
-        nullable=False,
-        index=True
+        nullable=False
     )
 
     access_token: Mapped[str] = mapped_column(Text, nullable=False)
@@ -57,6 +67,9 @@ class GoogleToken(Base):
     token_expiry: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)  
     token_type: Mapped[strnullable]
     scopes: Mapped[textnullable]
+    # background renewal backoff, reset by every successful save/update
+    renew_failures: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    renew_after: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
 
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
@@ -70,4 +83,62 @@ class GoogleToken(Base):
         nullable=False
     )
 
-    user: Mapped["Users"] = relationship(back_populates="google_tokens", lazy="noload")
\ No newline at end of file
+    user: Mapped["Users"] = relationship(back_populates="google_tokens", lazy="noload")
+
+
+# newest token per user (ORDER BY / row_number() over user_id), id for the token_exists check
+Index(
+    "ix_google_tokens_user_created",
+    GoogleToken.user_id,
+    GoogleToken.created_at.desc(),
+    postgresql_include=["id"],
+)
+
+
+class CalendarEvent(Base):
+    """Local copy of a user's Google Calendar events, kept current via syncToken."""
+    __tablename__ = "calendar_events"
+    __table_args__ = (
+        UniqueConstraint("user_id", "event_id", name="uq_calendar_events_user_event"),
+        Index("ix_calendar_events_user_start", "user_id", "start_at"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"),
+        nullable=False
+    )
+    event_id: Mapped[str] = mapped_column(String, nullable=False)
+
+    status: Mapped[strnullable]
+    summary: Mapped[textnullable]
+    description: Mapped[textnullable]
+    # naive UTC bounds used for range queries, all-day events start at 00:00
+    start_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    end_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    # the event as returned by Google, projected to EventModel fields
+    payload: Mapped[str] = mapped_column(Text, nullable=False)
+
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False
+    )
+
+
+class CalendarSyncState(Base):
+    __tablename__ = "calendar_sync_state"
+
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"),
+        primary_key=True
+    )
+    sync_token: Mapped[textnullable]
+    synced_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    # events.watch push channel, notifications mark the user's store stale
+    channel_id: Mapped[strnullable] = mapped_column(String, nullable=True, unique=True)
+    channel_resource_id: Mapped[strnullable]
+    channel_token: Mapped[strnullable]
+    channel_expires_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
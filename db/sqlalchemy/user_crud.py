@@ -1,10 +1,12 @@
 import logging
-from typing import Optional, List
-from sqlalchemy import select, update, delete
+from typing import AsyncIterator, Dict, Optional, List, Tuple
+from sqlalchemy import select, update, delete, exists
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.models import UserModel
-from db.sqlalchemy.models import  Users
+from src.models import UserModel, TokenModel
+from db.sqlalchemy.models import  Users, GoogleToken
+from db.sqlalchemy.bulk import in_values
+from db.sqlalchemy.google_crud import latest_tokens
 from db.database_protocol import UsersBase
 
 class UsersORM(UsersBase):
@@ -81,6 +83,67 @@ class UsersORM(UsersBase):
             self.logger.error(f"❌Error when receiving the all users: {e}")
             return []
 
+    async def get_active_users_page(self, after_id: int = 0, limit: int = 500) -> List[UserModel]:
+        try:
+            result = await self.session.execute(
+                select(Users)
+                .where(
+                    Users.id > after_id,
+                    exists().where(GoogleToken.user_id == Users.id)
+                )
+                .order_by(Users.id)
+                .limit(limit)
+            )
+            return [UserModel.model_validate(u) for u in result.scalars().all()]
+        except Exception as e:
+            # an empty page would read as the end of the stream to a pager
+            self.logger.error(f"❌ Error when receiving active users after id {after_id}: {e}")
+            raise
+
+    async def get_active_tg_ids_page(self, after_id: int = 0, limit: int = 1000) -> List[Tuple[int, int]]:
+        try:
+            result = await self.session.execute(
+                select(Users.id, Users.tg_id)
+                .where(
+                    Users.id > after_id,
+                    exists().where(GoogleToken.user_id == Users.id)
+                )
+                .order_by(Users.id)
+                .limit(limit)
+            )
+            return [(row.id, row.tg_id) for row in result.all()]
+        except Exception as e:
+            # an empty page would read as the end of the stream to a pager
+            self.logger.error(f"❌ Error when receiving active tg_ids after id {after_id}: {e}")
+            raise
+
+    async def get_users_by_tg_ids(self, tg_ids: List[int]) -> Dict[int, UserModel]:
+        users: Dict[int, UserModel] = {}
+        try:
+            for predicate in in_values(self.session, Users.tg_id, tg_ids):
+                result = await self.session.execute(select(Users).where(predicate))
+                for user in result.scalars().all():
+                    users[user.tg_id] = UserModel.model_validate(user)
+            return users
+        except Exception as e:
+            self.logger.error(f"❌ Error when receiving {len(tg_ids)} users by tg_id: {e}")
+            return users
+
+    async def users_with_tokens_iter(self, batch_size: int = 1000) -> AsyncIterator[List[Tuple[UserModel, TokenModel]]]:
+        token = latest_tokens()
+        stmt = (
+            select(Users, token)
+            .join(token, token.user_id == Users.id)
+            .order_by(Users.id)
+            .execution_options(yield_per=batch_size)
+        )
+        result = await self.session.stream(stmt)
+        async for partition in result.partitions():
+            yield [
+                (UserModel.model_validate(user), TokenModel.model_validate(row_token))
+                for user, row_token in partition
+            ]
+
     async def user_exists(self, tg_id: int) -> bool:
         try:
             result = await self.session.execute(
@@ -106,7 +169,8 @@ class UsersORM(UsersBase):
         tg_id: int,
         tg_nick: Optional[str] = None,
         email: Optional[str] = None,
-        google_id: Optional[str] = None
+        google_id: Optional[str] = None,
+        timezone: Optional[str] = None
     ) -> bool:
         try:
             user = await self.get_user_by_tg_id(tg_id)
@@ -121,6 +185,8 @@ class UsersORM(UsersBase):
                 update_data["email"] = email
             if google_id is not None:
                 update_data["google_id"] = google_id
+            if timezone is not None:
+                update_data["timezone"] = timezone
             
             if not update_data:
                 return True
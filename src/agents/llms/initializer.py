@@ -46,7 +46,7 @@ class LLMInitializer:
     @classmethod
     async def initialize(cls) -> List[BaseChatModel]:
         if cls._initialized:
-            logger.warning("⚠ LLM is already initialized")
+            # called once per agent invocation from the workers, nothing to warn about
             return cls._llm_instances
 
         cls._load_modules()
@@ -63,4 +63,9 @@ async def close_calendar_client() -> None:
 async def get_calendar_tools() -> list[BaseTool]:
     if not _calendar_client_tools:
         raise RuntimeError("Call init_calendar_client() first")
-    return _calendar_client_tools
\ No newline at end of file
+    return _calendar_client_tools
+
+
+def calendar_client_alive() -> bool:
+    """Whether the MCP session is still open and its tools are loaded."""
+    return _keeper_task is not None and not _keeper_task.done() and bool(_calendar_client_tools)
@@ -64,4 +64,9 @@ async def close_reminders_client() -> None:
 async def get_reminders_tools() -> list[BaseTool]:
     if not _reminders_tools:
         raise RuntimeError("Call init_reminders_client() first")
-    return _reminders_tools
\ No newline at end of file
+    return _reminders_tools
+
+
+def reminders_client_alive() -> bool:
+    """Whether the MCP session is still open and its tools are loaded."""
+    return _keeper_task is not None and not _keeper_task.done() and bool(_reminders_tools)
@@ -1,5 +1,5 @@
 from .repo_exp import UserRepositoryException, TokenRepositoryException
 from .config_exp import ConfigNotInitializedError
-from .services_exp import CalendarServiceException
+from .services_exp import CalendarServiceException, CalendarApiError
 
-__all__ = ['UserRepositoryException', 'TokenRepositoryException', 'ConfigNotInitializedError', 'CalendarServiceException']
\ No newline at end of file
+__all__ = ['UserRepositoryException', 'TokenRepositoryException', 'ConfigNotInitializedError', 'CalendarServiceException', 'CalendarApiError']
\ No newline at end of file
@@ -35,3 +35,12 @@ class CalendarTokenException(ServiceException):
             original_error=original_error,
             status_code=400
         )
+
+
+class CalendarApiError(ServiceException):
+    def __init__(self, status_code: int, message: str = "Google Calendar API error", original_error: Exception = None):
+        super().__init__(
+            message=message,
+            original_error=original_error,
+            status_code=status_code
+        )
@@ -55,4 +55,16 @@ async def close_checkpointer() -> None:
         await _pool.close()
         _pool = None
         _checkpointer = None
-        logger.info("✅ AsyncPostgresSaver is closed")
\ No newline at end of file
+        logger.info("✅ AsyncPostgresSaver is closed")
+
+
+async def check_checkpointer() -> bool:
+    """Probe the pool, broken idle connections are replaced by psycopg_pool."""
+    if _pool is None or _pool.closed:
+        return False
+    try:
+        await _pool.check()
+        return True
+    except Exception as e:
+        logger.warning(f"Checkpointer pool check failed: {e}")
+        return False
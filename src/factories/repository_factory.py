@@ -1,11 +1,13 @@
 import logging
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from db.database_protocol import UsersBase, GoogleTokensBase
+from db.database_protocol import UsersBase, GoogleTokensBase, EventsBase
+from utils.const import REPO_CACHE_ENABLED
 
 
 class RepositoryFactory:
-    def __init__(self):
+    def __init__(self, cached: bool = REPO_CACHE_ENABLED):
+        self.cached = cached
         self.logger = logging.getLogger(self.__class__.__name__)
     
     def create_users_repo(
@@ -15,6 +17,9 @@ class RepositoryFactory:
         if isinstance(session, AsyncSession):
             from db.sqlalchemy.user_crud import UsersORM
             self.logger.debug("Creating PostgreSQL users repository")
+            if self.cached:
+                from db.cache import CachedUsersRepo
+                return CachedUsersRepo(UsersORM(session))
             return UsersORM(session)
         else:
             raise TypeError(
@@ -29,6 +34,9 @@ class RepositoryFactory:
         if isinstance(session, AsyncSession):
             from db.sqlalchemy.google_crud import GoogleTokensORM
             self.logger.debug("Creating PostgreSQL tokens repository")
+            if self.cached:
+                from db.cache import CachedTokensRepo
+                return CachedTokensRepo(GoogleTokensORM(session))
             return GoogleTokensORM(session)
         else:
             raise TypeError(
@@ -36,5 +44,19 @@ class RepositoryFactory:
                 f"Expected AsyncDatabaseManager or AsyncSession"
             )
 
+    def create_events_repo(
+        self, 
+        session: AsyncSession
+    ) -> EventsBase:
+        if isinstance(session, AsyncSession):
+            from db.sqlalchemy.events_crud import EventsORM
+            self.logger.debug("Creating PostgreSQL events repository")
+            return EventsORM(session)
+        else:
+            raise TypeError(
+                f"Unsupported session type: {type(session)}. "
+                f"Expected AsyncDatabaseManager or AsyncSession"
+            )
+
 
 repository_factory = RepositoryFactory()
\ No newline at end of file
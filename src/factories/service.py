@@ -2,16 +2,15 @@ from data import get_config
 from src.enum import DatabaseType
 from src.services.calendar.google_calendar import GoogleCalendarService
 from db.database_protocol import UsersBase, GoogleTokensBase
+from src.factories.repository_factory import repository_factory
 
 class ServiceFactory:
     @staticmethod
     async def create_google_calendar_service(session) -> GoogleCalendarService:
         cfg = get_config()
 
-        from db.sqlalchemy.user_crud import UsersORM
-        from db.sqlalchemy.google_crud import GoogleTokensORM
-        users_repo = UsersORM(session)
-        tokens_repo = GoogleTokensORM(session)
+        users_repo = repository_factory.create_users_repo(session)
+        tokens_repo = repository_factory.create_tokens_repo(session)
 
         return GoogleCalendarService(
             users_repo=users_repo,
@@ -22,10 +21,8 @@ class ServiceFactory:
 
     @staticmethod
     def create_users_repo(session) -> UsersBase:
-        from db.sqlalchemy.user_crud import UsersORM
-        return UsersORM(session)
+        return repository_factory.create_users_repo(session)
     
     @staticmethod
     def create_tokens_repo(session) -> GoogleTokensBase:
-        from db.sqlalchemy.google_crud import GoogleTokensORM
-        return GoogleTokensORM(session)
\ No newline at end of file
+        return repository_factory.create_tokens_repo(session)
\ No newline at end of file
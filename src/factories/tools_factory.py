@@ -18,4 +18,22 @@ async def get_tools() -> list[BaseTool]:
         *await get_calendar_tools(),
         *await get_reminders_tools(),
     ]
-    return _tools   
\ No newline at end of file
+    return _tools
+
+
+def tools_alive() -> bool:
+    from src.agents.tools.calendar import calendar_client_alive
+    from src.agents.tools.reminders import reminders_client_alive
+    return _tools is not None and calendar_client_alive() and reminders_client_alive()
+
+
+async def reset_tools() -> None:
+    """Close both MCP sessions so the next get_tools() reconnects."""
+    global _tools
+
+    from src.agents.tools.calendar import close_calendar_client
+    from src.agents.tools.reminders import close_reminders_client
+
+    _tools = None
+    await close_calendar_client()
+    await close_reminders_client()
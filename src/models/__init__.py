@@ -1,11 +1,13 @@
 from .user_model import UserModel
 from .token_model import TokenModel
+from .sync_state import SyncStateModel
 from .user_response import UserResponse, UserCreate
 from .return_message import health_check_message, status
 from .google import GoogleTokenResponse, GoogleTokenCreate, GoogleOAuthData
-from .events import EventsResponse, EventModel, EventCreator, EventDateTime, CreateEventRequest, UpdateEventRequest, SearchEventsRequest, EventsRangeRequest, EventResponse
+from .events import EventsResponse, EventModel, EventCreator, EventDateTime, CreateEventRequest, UpdateEventRequest, SearchEventsRequest, EventsRangeRequest, EventResponse, BatchEventOperation, BatchEventsRequest, BatchEventResult, BatchEventsResponse
 
-__all__ = ['UserModel', 'TokenModel', 'UserResponse', 'UserCreate', 'health_check_message',
+__all__ = ['UserModel', 'TokenModel', 'SyncStateModel', 'UserResponse', 'UserCreate', 'health_check_message',
            'status', 'GoogleTokenResponse', 'GoogleTokenCreate', 'GoogleOAuthData',
            'EventsResponse', 'EventModel', 'EventCreator', 'EventDateTime', 'CreateEventRequest',
-           'UpdateEventRequest', 'SearchEventsRequest', 'EventsRangeRequest', 'EventResponse']
\ No newline at end of file
+           'UpdateEventRequest', 'SearchEventsRequest', 'EventsRangeRequest', 'EventResponse',
+           'BatchEventOperation', 'BatchEventsRequest', 'BatchEventResult', 'BatchEventsResponse']
\ No newline at end of file
@@ -1,6 +1,8 @@
-from typing import Optional, List
+from typing import Literal, Optional, List
 from datetime import datetime, date
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, Field, field_validator, model_validator
+
+from utils.const import CALENDAR_BATCH_LIMIT
 
 
 class CreateEventRequest(BaseModel):
@@ -27,6 +29,7 @@ class EventCreator(BaseModel):
 
 class EventModel(BaseModel):
     id: str
+    etag: Optional[str] = None
     status: Optional[str] = None
     summary: Optional[str] = None
     description: Optional[str] = None
@@ -40,6 +43,7 @@ class EventsResponse(BaseModel):
 
 class UpdateEventRequest(BaseModel):
     user_id: int
+    etag: Optional[str] = Field(None, description="Only update if the event still has this ETag")
     title: Optional[str] = None
     start_time: Optional[datetime] = None
     end_time: Optional[datetime] = None
@@ -76,3 +80,41 @@ class EventsRangeRequest(BaseModel):
         if "start" in info.data and end <= info.data["start"]:
             raise ValueError("end must be after start")
         return end
+
+
+class BatchEventOperation(BaseModel):
+    action: Literal["create", "update", "delete"]
+    event_id: Optional[str] = None
+    title: Optional[str] = None
+    start_time: Optional[datetime] = None
+    end_time: Optional[datetime] = None
+    description: Optional[str] = None
+    location: Optional[str] = None
+    timezone: str = "UTC"
+
+    @model_validator(mode="after")
+    def check_action_fields(self):
+        if self.action == "create" and not (self.title and self.start_time and self.end_time):
+            raise ValueError("create needs title, start_time and end_time")
+        if self.action != "create" and not self.event_id:
+            raise ValueError(f"{self.action} needs event_id")
+        if self.start_time and self.end_time and self.end_time <= self.start_time:
+            raise ValueError("end_time must be after start_time")
+        return self
+
+
+class BatchEventsRequest(BaseModel):
+    user_id: int
+    operations: list[BatchEventOperation] = Field(..., min_length=1, max_length=CALENDAR_BATCH_LIMIT)
+
+
+class BatchEventResult(BaseModel):
+    index: int
+    action: str
+    status_code: int
+    event: Optional[dict] = None
+    error: Optional[str] = None
+
+
+class BatchEventsResponse(BaseModel):
+    results: list[BatchEventResult]
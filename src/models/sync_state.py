@@ -0,0 +1,16 @@
+from typing import Optional
+from datetime import datetime
+from pydantic import BaseModel
+
+class SyncStateModel(BaseModel):
+    user_id: int
+    sync_token: Optional[str] = None
+    synced_at: Optional[datetime] = None
+
+    channel_id: Optional[str] = None
+    channel_resource_id: Optional[str] = None
+    channel_token: Optional[str] = None
+    channel_expires_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
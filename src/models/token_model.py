@@ -12,6 +12,8 @@ class TokenModel(BaseModel):
     scopes: Optional[str] = None           
 
     token_expiry: Optional[datetime] = None  
+    renew_failures: int = 0
+    renew_after: Optional[datetime] = None
     created_at: Optional[datetime] = None    
     updated_at: Optional[datetime] = None    
 
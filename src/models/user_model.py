@@ -8,6 +8,7 @@ class UserModel(BaseModel):
     tg_nick: Optional[str] = None
     email: Optional[str] = None
     google_id: Optional[str] = None
+    timezone: Optional[str] = None
     created_at: datetime = None
     updated_at: datetime = None
 
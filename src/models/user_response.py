@@ -13,6 +13,7 @@ class UserResponse(BaseModel):
     tg_nick: Optional[str] = None
     email: Optional[str] = None
     google_id: Optional[str] = None
+    timezone: Optional[str] = None
     has_google_token: bool = False
 
     class Config:
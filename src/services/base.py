@@ -1,5 +1,6 @@
 from fastapi import FastAPI
 from contextlib import asynccontextmanager
+from typing import Awaitable, Callable, Sequence
 from fastapi.middleware.cors import CORSMiddleware
 
 from data import init
@@ -11,6 +12,8 @@ def create_app(
     title: str,
     routers: list,
     port: int = 8000,
+    on_startup: Sequence[Callable[[], Awaitable[None]]] = (),
+    on_shutdown: Sequence[Callable[[], Awaitable[None]]] = (),
 ) -> FastAPI:
 
     @asynccontextmanager
@@ -19,8 +22,12 @@ def create_app(
         init()
         
         await global_db_manager.setup()
-        await global_db_manager.create_tables()
+        await global_db_manager.migrate()
+        for hook in on_startup:
+            await hook()
         yield
+        for hook in on_shutdown:
+            await hook()
         await global_db_manager.close()
 
     app = FastAPI(title=title, lifespan=lifespan)
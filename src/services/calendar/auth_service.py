@@ -60,6 +60,7 @@ class GoogleAuthService:
             expiry=credentials.expiry,
             scopes=SCOPES,
         )
+        self.credentials_manager.invalidate(user.id)
 
         self.logger.info(f"Exchanged code for tg_id={tg_id}")
         return True
@@ -70,6 +71,7 @@ class GoogleAuthService:
             return False
 
         await self.token_service.delete_token(user.id)
+        self.credentials_manager.invalidate(user.id)
         self.logger.info(f"Revoked access for tg_id={tg_id}")
         return True
 
@@ -0,0 +1,112 @@
+import time
+import asyncio
+import logging
+from datetime import datetime
+from typing import AsyncIterator, Optional
+
+from src.models import UserModel, EventModel
+from src.services.calendar.range_cache import event_bounds
+
+from utils.helpers import DateTimeNormalizer
+from utils.const import CALENDAR_BULK_CONCURRENCY, CALENDAR_BULK_USER_TIMEOUT, CALENDAR_BULK_PAGE_SIZE
+
+
+class BulkEventsService:
+    """
+    Events of one keyset page of active users, for a time window.
+
+    Users are processed concurrently, each in its own session. Windows are
+    read from the local store past the range cache; users whose first full
+    sync has not finished yet are asked from Google with timeMin/timeMax
+    instead. Results are yielded as soon as a user is done. The last item
+    is a summary with ``next_cursor``, None once the last page was served.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = CALENDAR_BULK_CONCURRENCY,
+        user_timeout: float = CALENDAR_BULK_USER_TIMEOUT,
+    ):
+        self.concurrency = concurrency
+        self.user_timeout = user_timeout
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    async def _events_for_user(self, user: UserModel, start: datetime, end: datetime) -> list[EventModel]:
+        from db.database import global_db_manager
+        from src.factories import ServiceFactory
+
+        async with global_db_manager.transaction() as session:
+            calendar = await ServiceFactory.create_google_calendar_service(session)
+            ctx = await calendar.authorize(user.tg_id)
+            if ctx is None:
+                return []
+            return await calendar.get_events_window(ctx, start, end)
+
+    async def iter_user_events(
+        self,
+        start: datetime,
+        end: datetime,
+        cursor: int = 0,
+        limit: int = CALENDAR_BULK_PAGE_SIZE,
+    ) -> AsyncIterator[dict]:
+        """Yield {"tg_id", "events"} per user, users without events included."""
+        from db.database import global_db_manager
+
+        started = time.perf_counter()
+        async with global_db_manager.transaction() as session:
+            users = await global_db_manager.get_users_repo(session).get_active_users_page(cursor, limit)
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def _one(user: UserModel) -> tuple[UserModel, Optional[list[EventModel]]]:
+            async with semaphore:
+                try:
+                    events = await asyncio.wait_for(self._events_for_user(user, start, end), self.user_timeout)
+                    return user, events
+                except Exception as e:
+                    self.logger.warning(f"Events for tg_id={user.tg_id} failed: {e!r}")
+                    return user, None
+
+        tasks = [asyncio.create_task(_one(user)) for user in users]
+        failed = found = 0
+        try:
+            for task in asyncio.as_completed(tasks):
+                user, events = await task
+                if events is None:
+                    failed += 1
+                    continue
+                found += len(events)
+                yield {"tg_id": user.tg_id, "events": events}
+        finally:
+            # the client went away mid-stream
+            for task in tasks:
+                task.cancel()
+
+        duration = time.perf_counter() - started
+        self.logger.info(f"Bulk events: {len(users)} users, {found} events, {failed} failed in {duration:.2f}s")
+        yield {
+            "next_cursor": users[-1].id if len(users) == limit else None,
+            "users": len(users),
+            "failed": failed,
+            "events": found,
+            "duration": round(duration, 3),
+        }
+
+    async def iter_events_ending(
+        self,
+        start: datetime,
+        end: datetime,
+        cursor: int = 0,
+        limit: int = CALENDAR_BULK_PAGE_SIZE,
+    ) -> AsyncIterator[dict]:
+        """Flatten to (tg_id, event_id, title) of events whose end falls in [start, end)."""
+        window_start, window_end = DateTimeNormalizer.to_naive_utc(start), DateTimeNormalizer.to_naive_utc(end)
+
+        async for item in self.iter_user_events(start, end, cursor=cursor, limit=limit):
+            if "next_cursor" in item:
+                yield item
+                continue
+            for event in item["events"]:
+                event_end = event_bounds(event)[1]
+                if event_end is not None and window_start <= event_end < window_end:
+                    yield {"tg_id": item["tg_id"], "event_id": event.id, "title": event.summary or "event"}
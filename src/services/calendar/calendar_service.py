@@ -1,70 +1,164 @@
 import logging
-from typing import Optional, Union
+from typing import Any, AsyncIterator, Optional, Union
 from datetime import datetime, timedelta, timezone
 
 from src.enum import TimeFrame
-from src.models import EventModel
+from src.models import EventModel, BatchEventOperation, BatchEventResult
+from src.services.calendar.context import CalendarContext
 from src.services.calendar.creds_manager import CredentialsManager
+from src.services.calendar.followups import followup_scheduler
+from src.services.calendar.range_cache import event_range_cache
+from src.services.calendar.sync_service import CalendarSyncService, get_calendar_sync
+from src.services.calendar.transport import BatchCall, CalendarTransport, get_calendar_transport
 
 from utils.helpers import preprocess_event_data
-from db.database_protocol import UsersBase, GoogleTokensBase
+from utils.const import CALENDAR_PAGE_SIZE
+
+# partial response: only what EventModel keeps, plus the paging cursor
+EVENT_LIST_FIELDS = f"nextPageToken,items({','.join(EventModel.model_fields)})"
 
 class CalendarService:
     def __init__(
         self,
-        users_repo: UsersBase,
-        token_repo: GoogleTokensBase,
-        credentials_manager: CredentialsManager
+        credentials_manager: CredentialsManager,
+        transport: Optional[CalendarTransport] = None,
+        sync: Optional[CalendarSyncService] = None
     ):
-        self.users_repo = users_repo
-        self.token_repo = token_repo
         self.credentials_manager = credentials_manager
+        self.transport = transport or get_calendar_transport()
+        # reads are served from the local event store when it is enabled
+        self.sync = sync or get_calendar_sync()
         self.logger = logging.getLogger(self.__class__.__name__)
 
-    async def _get_user(self, tg_id: int):
-        return await self.users_repo.get_user_by_tg_id(tg_id)
+    async def iter_events(self, ctx: CalendarContext, **params: Any) -> AsyncIterator[EventModel]:
+        """
+        Stream events().list results page by page.
+
+        Pages are requested lazily with a fields projection matching
+        EventModel, so large calendars are complete without holding or
+        parsing full payloads.
+        """
+        page_token = None
+        while True:
+            result = await self.transport.list_events(
+                ctx,
+                maxResults=CALENDAR_PAGE_SIZE,
+                fields=EVENT_LIST_FIELDS,
+                pageToken=page_token,
+                **params
+            )
+            for event in preprocess_event_data(result.get("items", [])):
+                yield event
+
+            page_token = result.get("nextPageToken")
+            if not page_token:
+                return
+
+    async def _from_store(
+        self,
+        ctx: CalendarContext,
+        start: datetime,
+        end: datetime,
+        query: Optional[str] = None
+    ) -> Optional[list[EventModel]]:
+        if self.sync is None:
+            return None
+        return await self.sync.get_events(ctx, start, end, query=query)
+
+    async def _range(self, ctx: CalendarContext, start: datetime, end: datetime) -> list[EventModel]:
+        # overlapping windows asked in a row are answered from memory
+        events = event_range_cache.get(ctx.user_id, start, end)
+        if events is not None:
+            return events
+
+        events = await self._from_store(ctx, start, end)
+        if events is None:
+            events = await self._from_google(ctx, start, end)
+
+        event_range_cache.put(ctx.user_id, start, end, events)
+        await followup_scheduler.schedule(ctx.tg_id, events)
+        return events
+
+    async def _from_google(self, ctx: CalendarContext, start: datetime, end: datetime) -> list[EventModel]:
+        time_min = start.isoformat() + "Z" if start.tzinfo is None else start.isoformat()
+        time_max = end.isoformat() + "Z" if end.tzinfo is None else end.isoformat()
+        return [
+            event async for event in self.iter_events(
+                ctx,
+                timeMin=time_min,
+                timeMax=time_max,
+                singleEvents=True,
+                orderBy="startTime"
+            )
+        ]
+
+    async def get_events_window(self, ctx: CalendarContext, start: datetime, end: datetime) -> list[EventModel]:
+        """
+        Events of a short window for bulk readers.
+
+        Bypasses the range cache, which would only churn on many small
+        windows, and never waits for a user's first full sync: until it is
+        done in the background the window is asked from Google.
+        """
+        events = None
+        if self.sync is not None:
+            events = await self.sync.get_synced_events(ctx, start, end)
+        if events is None:
+            events = await self._from_google(ctx, start, end)
+
+        await followup_scheduler.schedule(ctx.tg_id, events)
+        return events
 
     async def get_events(
         self,
-        tg_id: int,
+        ctx: CalendarContext,
         days_ahead: Optional[Union[TimeFrame, int]] = TimeFrame.WEEK
     ) -> list[EventModel]:
-        user = await self._get_user(tg_id)
-        service = await self.credentials_manager.get_service(user.id)
-
         now = datetime.now(timezone.utc)
         days = days_ahead if isinstance(days_ahead, int) else days_ahead.value
         time_max = now + timedelta(days=days)
 
-        result: dict = await self.credentials_manager._run_sync(
-            service.events().list(
-                calendarId="primary",
-                timeMin=now.isoformat(),
-                timeMax=time_max.isoformat(),
-                singleEvents=True,
-                orderBy="startTime"
-            ).execute
-        )
+        events = await self._range(ctx, now, time_max)
 
-        self.logger.info(f"Fetched events for tg_id={tg_id}, days_ahead={days_ahead}")
-        return preprocess_event_data(result.get("items", []))
+        self.logger.info(f"Fetched events for tg_id={ctx.tg_id}, days_ahead={days_ahead}")
+        return events
 
-    async def get_event_by_id(self, tg_id: int, event_id: str) -> Optional[dict]:
-        user = await self._get_user(tg_id)
-        service = await self.credentials_manager.get_service(user.id)
+    async def get_timezone(self, ctx: CalendarContext) -> Optional[str]:
+        """IANA zone of the primary calendar, the events list carries it on every page."""
+        result = await self.transport.list_events(ctx, maxResults=1, fields="timeZone")
+        return result.get("timeZone")
 
-        event = await self.credentials_manager._run_sync(
-            service.events().get(
-                calendarId="primary",
-                eventId=event_id
-            ).execute
-        )
-        self.logger.info(f"Fetched event {event_id} for tg_id={tg_id}")
+    async def get_event_by_id(self, ctx: CalendarContext, event_id: str) -> Optional[dict]:
+        event = await self.transport.get_event(ctx, event_id)
+        self.logger.info(f"Fetched event {event_id} for tg_id={ctx.tg_id}")
         return event
 
+    @staticmethod
+    def _patch_body(
+        title: Optional[str] = None,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        description: Optional[str] = None,
+        location: Optional[str] = None,
+        timezone: str = "UTC"
+    ) -> dict:
+        """Event resource holding only the fields that were given"""
+        body = {}
+        if title:
+            body["summary"] = title
+        if description is not None:
+            body["description"] = description
+        if location is not None:
+            body["location"] = location
+        if start_time:
+            body["start"] = {"dateTime": start_time.isoformat(), "timeZone": timezone}
+        if end_time:
+            body["end"] = {"dateTime": end_time.isoformat(), "timeZone": timezone}
+        return body
+
     async def create_event(
         self,
-        tg_id: int,
+        ctx: CalendarContext,
         title: str,
         start_time: datetime,
         end_time: datetime,
@@ -72,123 +166,124 @@ class CalendarService:
         location: Optional[str] = None,
         timezone: str = "UTC"
     ) -> dict:
-        user = await self._get_user(tg_id)
-        service = await self.credentials_manager.get_service(user.id)
-
-        event_body = {
-            "summary": title,
-            "start": {"dateTime": start_time.isoformat(), "timeZone": timezone},
-            "end": {"dateTime": end_time.isoformat(), "timeZone": timezone},
-        }
-
-        if description:
-            event_body["description"] = description
-        if location:
-            event_body["location"] = location
-
-        result = await self.credentials_manager._run_sync(
-            service.events().insert(
-                calendarId="primary",
-                body=event_body
-            ).execute
-        )
-        self.logger.info(f"Created event '{title}' for tg_id={tg_id}")
+        event_body = self._patch_body(title, start_time, end_time, description or None, location or None, timezone)
+        result = await self.transport.insert_event(ctx, event_body)
+        if self.sync is not None:
+            await self.sync.store(ctx, result)
+        event_range_cache.invalidate(ctx.user_id)
+        await followup_scheduler.schedule(ctx.tg_id, preprocess_event_data([result]))
+        self.logger.info(f"Created event '{title}' for tg_id={ctx.tg_id}")
         return result
 
     async def update_event(
         self,
-        tg_id: int,
+        ctx: CalendarContext,
         event_id: str,
         title: Optional[str] = None,
         start_time: Optional[datetime] = None,
         end_time: Optional[datetime] = None,
         description: Optional[str] = None,
         location: Optional[str] = None,
-        timezone: str = "UTC"
+        timezone: str = "UTC",
+        etag: Optional[str] = None
     ) -> dict:
-        user = await self._get_user(tg_id)
-        service = await self.credentials_manager.get_service(user.id)
-
-        current = await self.credentials_manager._run_sync(
-            service.events().get(
-                calendarId="primary",
-                eventId=event_id
-            ).execute
-        )
+        """
+        PATCH only the given fields, no read of the event first.
 
-        if title:
-            current["summary"] = title
-        if description is not None:
-            current["description"] = description
-        if location is not None:
-            current["location"] = location
-        if start_time:
-            current["start"] = {"dateTime": start_time.isoformat(), "timeZone": timezone}
-        if end_time:
-            current["end"] = {"dateTime": end_time.isoformat(), "timeZone": timezone}
-
-        result = await self.credentials_manager._run_sync(
-            service.events().update(
-                calendarId="primary",
-                eventId=event_id,
-                body=current
-            ).execute
-        )
-        self.logger.info(f"Updated event {event_id} for tg_id={tg_id}")
-        return result
+        With ``etag`` the write only succeeds if the event was not changed
+        in between (If-Match, a 412 CalendarApiError otherwise). The PATCH is
+        always sent, the local store may be behind Google and cannot tell.
+        """
+        body = self._patch_body(title, start_time, end_time, description, location, timezone)
 
-    async def delete_event(self, tg_id: int, event_id: str) -> bool:
-        user = await self._get_user(tg_id)
-        service = await self.credentials_manager.get_service(user.id)
+        result = await self.transport.patch_event(ctx, event_id, body, etag=etag)
+        if self.sync is not None:
+            await self.sync.store(ctx, result)
+        event_range_cache.invalidate(ctx.user_id)
+        await followup_scheduler.schedule(ctx.tg_id, preprocess_event_data([result]))
+        self.logger.info(f"Patched event {event_id} ({', '.join(body) or 'no fields'}) for tg_id={ctx.tg_id}")
+        return result
 
-        await self.credentials_manager._run_sync(
-            service.events().delete(
-                calendarId="primary",
-                eventId=event_id
-            ).execute
-        )
-        self.logger.info(f"Deleted event {event_id} for tg_id={tg_id}")
+    async def delete_event(self, ctx: CalendarContext, event_id: str) -> bool:
+        await self.transport.delete_event(ctx, event_id)
+        if self.sync is not None:
+            await self.sync.forget(ctx, event_id)
+        event_range_cache.invalidate(ctx.user_id)
+        await followup_scheduler.unschedule(ctx.tg_id, [event_id])
+        self.logger.info(f"Deleted event {event_id} for tg_id={ctx.tg_id}")
         return True
 
     async def search_events(
         self,
-        tg_id: int,
+        ctx: CalendarContext,
         query: str,
         days_ahead: int = 30
     ) -> list[EventModel]:
-        user = await self._get_user(tg_id)
-        service = await self.credentials_manager.get_service(user.id)
-
         now = datetime.now(timezone.utc)
         time_max = now + timedelta(days=days_ahead)
 
-        result = await self.credentials_manager._run_sync(
-            service.events().list(
-                calendarId="primary",
+        events = await self._from_store(ctx, now, time_max, query=query)
+        if events is not None:
+            self.logger.info(f"Search '{query}' for tg_id={ctx.tg_id}: {len(events)} local results")
+            return events
+
+        events = [
+            event async for event in self.iter_events(
+                ctx,
                 q=query,
                 timeMin=now.isoformat(),
                 timeMax=time_max.isoformat(),
                 singleEvents=True,
                 orderBy="startTime"
-            ).execute
-        )
-        self.logger.info(f"Search '{query}' for tg_id={tg_id}: {len(result.get('items', []))} results")
-        return preprocess_event_data(result.get("items", []))
+            )
+        ]
+        self.logger.info(f"Search '{query}' for tg_id={ctx.tg_id}: {len(events)} results")
+        return events
 
-    async def get_events_range(self, tg_id: int, start: datetime, end: datetime) -> list[EventModel]:
-        user = await self._get_user(tg_id)
-        service = await self.credentials_manager.get_service(user.id)
+    async def get_events_range(self, ctx: CalendarContext, start: datetime, end: datetime) -> list[EventModel]:
+        return await self._range(ctx, start, end)
 
-        time_min = start.isoformat() + "Z" if start.tzinfo is None else start.isoformat()
-        time_max = end.isoformat() + "Z" if end.tzinfo is None else end.isoformat()
+    async def batch_events(self, ctx: CalendarContext, operations: list[BatchEventOperation]) -> list[BatchEventResult]:
+        """
+        Apply create/update/delete operations in one Google batch request.
 
-        result = await self.credentials_manager._run_sync(
-            service.events().list(
-                calendarId="primary",
-                timeMin=time_min,
-                timeMax=time_max,
-                singleEvents=True,
-                orderBy="startTime"
-            ).execute
+        Updates are sent as PATCH with only the given fields. Every operation
+        gets its own result, a failed item does not fail the others.
+        """
+        calls = []
+        for op in operations:
+            body = self._patch_body(op.title, op.start_time, op.end_time, op.description, op.location, op.timezone)
+            if op.action == "create":
+                calls.append(BatchCall("insert", body=body))
+            elif op.action == "update":
+                calls.append(BatchCall("patch", event_id=op.event_id, body=body))
+            else:
+                calls.append(BatchCall("delete", event_id=op.event_id))
+
+        responses = await self.transport.batch(ctx, calls)
+
+        results = []
+        for index, (op, (status_code, data)) in enumerate(zip(operations, responses)):
+            ok = status_code < 400
+            results.append(BatchEventResult(
+                index=index,
+                action=op.action,
+                status_code=status_code,
+                event=data if ok and isinstance(data, dict) and data else None,
+                error=None if ok else str(data),
+            ))
+
+            if ok and self.sync is not None:
+                if op.action == "delete":
+                    await self.sync.forget(ctx, op.event_id)
+                elif isinstance(data, dict) and data.get("id"):
+                    await self.sync.store(ctx, data)
+
+        event_range_cache.invalidate(ctx.user_id)
+        await followup_scheduler.schedule(ctx.tg_id, preprocess_event_data([r.event for r in results if r.event]))
+        await followup_scheduler.unschedule(
+            ctx.tg_id, [op.event_id for op, r in zip(operations, results) if op.action == "delete" and not r.error]
         )
-        return preprocess_event_data(result.get("items", []))
\ No newline at end of file
+        failed = sum(1 for r in results if r.error)
+        self.logger.info(f"Batch of {len(calls)} operations for tg_id={ctx.tg_id}: {failed} failed")
+        return results
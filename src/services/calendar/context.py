@@ -0,0 +1,25 @@
+from typing import Any, Optional
+from dataclasses import dataclass
+
+from google.oauth2.credentials import Credentials
+
+from src.models import TokenModel
+
+
+@dataclass(slots=True)
+class CalendarContext:
+    """
+    Authorized calendar state resolved once per request.
+
+    Built by CredentialsManager.authorize and passed through every
+    CalendarService call, so the user/token lookup, the refresh check and
+    the service build are not repeated inside a single request.
+
+    ``service`` is only built for transports that need a googleapiclient
+    resource and is None otherwise.
+    """
+    tg_id: int
+    user_id: int
+    token: TokenModel
+    credentials: Credentials
+    service: Optional[Any] = None
@@ -1,23 +1,28 @@
 import json
 import asyncio
-from typing import Any
-from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Optional
 
 from google.oauth2.credentials import Credentials
 from google.auth.transport.requests import Request
-from googleapiclient.discovery import build
 
+from src.services.calendar.context import CalendarContext
+from src.services.calendar.executor import google_executor
 from src.services.calendar.token_service import TokenService
+from src.services.calendar.transport import get_calendar_transport
+from src.services.calendar.service_cache import (
+    calendar_service_cache, token_fingerprint, build_calendar_service
+)
 
 from utils.const import SCOPES
 from utils.helpers import DataCreator, DateTimeNormalizer
 
+_inflight_refreshes: dict[int, asyncio.Task] = {}
+
 class CredentialsManager:
     def __init__(self, client_id: str, client_secret: str, token_service: TokenService):
         self.client_id = client_id
         self.client_secret = client_secret
         self.token_service = token_service
-        self.executor = ThreadPoolExecutor(max_workers=3)
     
     def _prepare_credentials_dict(self, token_data: Any) -> dict:
         expiry = DateTimeNormalizer.normalize_expiry_from_db(token_data.token_expiry)
@@ -36,47 +41,67 @@ class CredentialsManager:
         return credentials_dict
 
     async def _run_sync(self, func, *args, **kwargs):
-        loop = asyncio.get_running_loop()
-        return await loop.run_in_executor(self.executor, lambda: func(*args, **kwargs))
+        return await google_executor.run(func, *args, **kwargs)
 
     def build_credentials(self, token_data: Any) -> Credentials:
         credentials_dict = self._prepare_credentials_dict(token_data)
         return Credentials.from_authorized_user_info(credentials_dict, SCOPES)
 
-    async def get_service(self, user_id: int):
-        token_data = await self.token_service.get_token(user_id)
+    async def authorize(self, tg_id: int) -> Optional[CalendarContext]:
+        # a single JOIN query resolves both the user and the latest token
+        token_data = await self.token_service.get_token_by_tg_id(tg_id)
         if not token_data:
-            raise ValueError("Credentials missing")
+            return None
 
         credentials = self.build_credentials(token_data)
 
         if credentials.expired and credentials.refresh_token:
-            await self._run_sync(credentials.refresh, Request())
-            await self.token_service.update_token(
-                user_id=user_id,
-                access_token=credentials.token,
-                refresh_token=credentials.refresh_token,
-                expiry=credentials.expiry,
-            )
-            token_data = await self.token_service.get_token(user_id)
-            credentials = self.build_credentials(token_data)
-
-        return await self._run_sync(build, "calendar", "v3", credentials=credentials)
-
-    async def load_credentials(self, user_id: int) -> bool:
-        token_data = await self.token_service.get_token(user_id)
-        if not token_data:
-            return False
+            credentials = await self.refresh(token_data.user_id, credentials)
 
-        credentials = self.build_credentials(token_data)
+        service = None
+        if get_calendar_transport().needs_service:
+            service = await self._get_or_build_service(token_data.user_id, credentials)
+        return CalendarContext(
+            tg_id=tg_id,
+            user_id=token_data.user_id,
+            token=token_data,
+            credentials=credentials,
+            service=service,
+        )
 
-        if credentials.expired and credentials.refresh_token:
-            await self._run_sync(credentials.refresh, Request())
-            await self.token_service.update_token(
-                user_id=user_id,
-                access_token=credentials.token,
-                refresh_token=credentials.refresh_token,
-                expiry=credentials.expiry,
-            )
-
-        return True
\ No newline at end of file
+    async def refresh(self, user_id: int, credentials: Credentials) -> Credentials:
+        """
+        Refresh the user's token, at most one refresh in flight per user.
+
+        Concurrent callers await the leader's refresh and share its result
+        instead of each hitting the token endpoint and racing to update_token.
+        """
+        task = _inflight_refreshes.get(user_id)
+        if task is None:
+            task = asyncio.create_task(self._refresh(user_id, credentials))
+            _inflight_refreshes[user_id] = task
+            task.add_done_callback(lambda _: _inflight_refreshes.pop(user_id, None))
+        # shield: a cancelled waiter must not abort the refresh others await
+        return await asyncio.shield(task)
+
+    async def _refresh(self, user_id: int, credentials: Credentials) -> Credentials:
+        await self._run_sync(credentials.refresh, Request())
+        await self.token_service.update_token(
+            user_id=user_id,
+            access_token=credentials.token,
+            refresh_token=credentials.refresh_token,
+            expiry=credentials.expiry,
+        )
+        self.invalidate(user_id)
+        return credentials
+
+    async def _get_or_build_service(self, user_id: int, credentials: Credentials):
+        fingerprint = token_fingerprint(credentials.token, credentials.refresh_token)
+        service = calendar_service_cache.get(user_id, fingerprint)
+        if service is None:
+            service = await self._run_sync(build_calendar_service, credentials)
+            calendar_service_cache.put(user_id, fingerprint, service)
+        return service
+
+    def invalidate(self, user_id: int) -> None:
+        calendar_service_cache.invalidate(user_id)
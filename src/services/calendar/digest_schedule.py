@@ -0,0 +1,227 @@
+import time
+import asyncio
+import logging
+from typing import Optional
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from utils.const import (
+    DIGEST_LOCAL_HOUR,
+    DIGEST_SLOT,
+    DIGEST_SPREAD,
+    DIGEST_DEFAULT_TZ,
+    DIGEST_SCHEDULE_ENABLED,
+    CALENDAR_BULK_CONCURRENCY,
+    CALENDAR_BULK_PAGE_SIZE,
+)
+
+# atomically claims due users and their zones: each one is moved whole
+# days ahead, past now, and never leaves the set
+_POP_DUE = """
+local now = tonumber(ARGV[1])
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', now, 'WITHSCORES', 'LIMIT', 0, ARGV[2])
+if #due == 0 then return {} end
+local members = {}
+for i = 1, #due, 2 do
+    local score = tonumber(due[i + 1])
+    local days = math.floor((now - score) / 86400) + 1
+    redis.call('ZADD', KEYS[1], score + days * 86400, due[i])
+    members[#members + 1] = due[i]
+end
+local zones = redis.call('HMGET', KEYS[2], unpack(members))
+local out = {}
+for i, member in ipairs(members) do
+    out[#out + 1] = member
+    out[#out + 1] = zones[i] or ''
+end
+return out
+"""
+
+
+def resolve_zone(name: Optional[str]) -> ZoneInfo:
+    try:
+        return ZoneInfo(name or DIGEST_DEFAULT_TZ)
+    except (ZoneInfoNotFoundError, ValueError):
+        return ZoneInfo(DIGEST_DEFAULT_TZ)
+
+
+def local_day(tz: Optional[str], now: Optional[datetime] = None) -> tuple[datetime, datetime, str]:
+    """The user's current local day as aware [start, end) and its date."""
+    zone = resolve_zone(tz)
+    moment = (now or datetime.now(timezone.utc)).astimezone(zone)
+    start = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    # aware arithmetic is wall time, so DST days come out 23 or 25 hours long
+    end = start + timedelta(days=1)
+    return start, end, start.strftime("%Y-%m-%d")
+
+
+class DigestSchedule:
+    """
+    Morning digest due times per user in a Redis sorted set.
+
+    Each user is scored with the next local ``hour`` of their timezone plus
+    a stable per-user offset within ``spread``, rounded to ``slot`` seconds,
+    so users of one zone do not all land on the same minute and the
+    dispatcher drains one slot at a time. Popped users are re-scored for
+    the following day; ``reconcile`` re-adds anyone missing after a crash
+    and resolves zones of users who connected before zones were stored.
+    """
+
+    SCHEDULE_KEY = "digest:schedule"
+    ZONES_KEY = "digest:tz"
+
+    def __init__(
+        self,
+        hour: int = DIGEST_LOCAL_HOUR,
+        slot: int = DIGEST_SLOT,
+        spread: int = DIGEST_SPREAD,
+    ):
+        self.hour = hour
+        self.slot = slot
+        self.slots = max(1, spread // slot)
+        self._pop_script = None
+        self._task: Optional[asyncio.Task] = None
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    @staticmethod
+    def _redis():
+        from data import get_config
+        return get_config().redis_client
+
+    def next_due(self, tg_id: int, tz: Optional[str], now: Optional[float] = None) -> float:
+        """Next digest moment of a user as a UTC timestamp, strictly after ``now``."""
+        now = time.time() if now is None else now
+        zone = resolve_zone(tz)
+        offset = timedelta(seconds=(tg_id % self.slots) * self.slot)
+
+        day = datetime.fromtimestamp(now, zone).replace(hour=self.hour, minute=0, second=0, microsecond=0)
+        due = day + offset
+        if due.timestamp() <= now:
+            due = day + timedelta(days=1) + offset
+        return due.timestamp()
+
+    async def schedule(self, tg_id: int, tz: Optional[str], keep_existing: bool = False) -> None:
+        """(Re)schedule a user; with ``keep_existing`` a pending due time is left alone."""
+        tz = resolve_zone(tz).key
+        try:
+            async with self._redis().pipeline(transaction=False) as pipe:
+                pipe.hset(self.ZONES_KEY, str(tg_id), tz)
+                pipe.zadd(self.SCHEDULE_KEY, {str(tg_id): self.next_due(tg_id, tz)}, nx=keep_existing)
+                await pipe.execute()
+        except Exception as e:
+            self.logger.warning(f"Failed to schedule the digest of tg_id={tg_id}: {e}")
+
+    async def unschedule(self, tg_id: int) -> None:
+        try:
+            async with self._redis().pipeline(transaction=False) as pipe:
+                pipe.zrem(self.SCHEDULE_KEY, str(tg_id))
+                pipe.hdel(self.ZONES_KEY, str(tg_id))
+                await pipe.execute()
+        except Exception as e:
+            self.logger.warning(f"Failed to unschedule the digest of tg_id={tg_id}: {e}")
+
+    async def pop_due(self, limit: int = 500, now: Optional[float] = None) -> list[tuple[int, str]]:
+        """
+        Claim up to ``limit`` due users as (tg_id, tz) and score them for
+        their next day before returning.
+
+        The script already moved them 24 hours ahead; the follow-up ZADD only
+        corrects DST transitions and skips users unscheduled in between.
+        """
+        now = time.time() if now is None else now
+        redis = self._redis()
+        if self._pop_script is None:
+            self._pop_script = redis.register_script(_POP_DUE)
+
+        raw = await self._pop_script(keys=[self.SCHEDULE_KEY, self.ZONES_KEY], args=[now, limit])
+        due = [(int(member), tz or DIGEST_DEFAULT_TZ) for member, tz in zip(raw[::2], raw[1::2])]
+        if due:
+            try:
+                await redis.zadd(
+                    self.SCHEDULE_KEY,
+                    {str(tg_id): self.next_due(tg_id, tz, now) for tg_id, tz in due},
+                    xx=True,
+                )
+            except Exception as e:
+                # the claimed users are still scheduled, at most an hour off
+                self.logger.warning(f"Failed to correct the next digest times: {e}")
+        return due
+
+    async def pending(self) -> dict:
+        redis = self._redis()
+        now = time.time()
+        async with redis.pipeline(transaction=False) as pipe:
+            pipe.zcard(self.SCHEDULE_KEY)
+            pipe.zcount(self.SCHEDULE_KEY, "-inf", now)
+            pipe.zcount(self.SCHEDULE_KEY, now, now + self.slot)
+            total, overdue, next_slot = await pipe.execute()
+        return {"users": total, "overdue": overdue, "next_slot": next_slot}
+
+    async def reconcile(
+        self,
+        concurrency: int = CALENDAR_BULK_CONCURRENCY,
+        page_size: int = CALENDAR_BULK_PAGE_SIZE,
+    ) -> int:
+        """
+        Make sure every active user has a pending digest.
+
+        Users without a stored zone get it from their primary calendar.
+        Existing due times are kept, so this is safe to run on every start.
+        """
+        from db.database import global_db_manager
+        from src.factories import ServiceFactory
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def _one(tg_id: int, tz: Optional[str]) -> None:
+            async with semaphore:
+                if tz is None:
+                    try:
+                        async with global_db_manager.transaction() as session:
+                            calendar = await ServiceFactory.create_google_calendar_service(session)
+                            tz = await calendar.refresh_timezone(tg_id)
+                    except Exception as e:
+                        self.logger.warning(f"Timezone of tg_id={tg_id} is unknown: {e}")
+                await self.schedule(tg_id, tz, keep_existing=True)
+
+        cursor, scheduled = 0, 0
+        while True:
+            async with global_db_manager.transaction() as session:
+                users = await global_db_manager.get_users_repo(session).get_active_users_page(cursor, page_size)
+            if not users:
+                break
+
+            await asyncio.gather(*(_one(user.tg_id, user.timezone) for user in users))
+            scheduled += len(users)
+            if len(users) < page_size:
+                break
+            cursor = users[-1].id
+
+        self.logger.info(f"Digest schedule reconciled for {scheduled} users")
+        return scheduled
+
+    async def _reconcile_safely(self) -> None:
+        try:
+            await self.reconcile()
+        except Exception as e:
+            self.logger.error(f"Digest schedule reconcile failed: {e}", exc_info=True)
+
+    async def start(self) -> None:
+        """Server startup hook, reconciles in the background."""
+        if not DIGEST_SCHEDULE_ENABLED:
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._reconcile_safely(), name="digest-schedule-reconcile")
+
+    async def stop(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+
+# the only instance of the schedule
+digest_schedule = DigestSchedule()
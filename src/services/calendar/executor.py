@@ -0,0 +1,118 @@
+import time
+import asyncio
+import logging
+import threading
+from typing import Any, Callable, Optional
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from utils.const import GOOGLE_EXECUTOR_WORKERS, GOOGLE_CALL_TIMEOUT
+
+
+class BlockingExecutor:
+    """
+    Application-wide thread pool for blocking Google client calls.
+
+    Every ``.execute()``, token refresh and code exchange goes through one
+    sized pool, so the number of threads is capped for the whole process and
+    queue depth / wait time show when the pool is the bottleneck.
+    """
+
+    def __init__(self, max_workers: int = GOOGLE_EXECUTOR_WORKERS, timeout: float = GOOGLE_CALL_TIMEOUT):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._stats = {
+            "completed": 0,
+            "failed": 0,
+            "timeouts": 0,
+            "wait_seconds_total": 0.0,
+            "wait_seconds_max": 0.0,
+            "run_seconds_total": 0.0,
+        }
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix="google-api",
+            )
+            self.logger.info(f"Google API executor started: max_workers={self.max_workers}")
+        return self._executor
+
+    async def run(self, func: Callable, *args, _timeout: Optional[float] = None, **kwargs) -> Any:
+        """
+        Run ``func(*args, **kwargs)`` in the pool.
+
+        ``_timeout`` overrides the default timeout; it is underscored so it
+        never shadows a ``timeout`` keyword of ``func`` itself.
+        """
+        submitted = time.monotonic()
+        with self._lock:
+            self._queued += 1
+
+        def call():
+            started = time.monotonic()
+            wait = started - submitted
+            with self._lock:
+                self._queued -= 1
+                self._running += 1
+                self._stats["wait_seconds_total"] += wait
+                self._stats["wait_seconds_max"] = max(self._stats["wait_seconds_max"], wait)
+            try:
+                result = func(*args, **kwargs)
+            except Exception:
+                with self._lock:
+                    self._stats["failed"] += 1
+                raise
+            else:
+                with self._lock:
+                    self._stats["completed"] += 1
+                return result
+            finally:
+                with self._lock:
+                    self._running -= 1
+                    self._stats["run_seconds_total"] += time.monotonic() - started
+
+        def dequeue_unstarted(done: Future) -> None:
+            # cancelled before a worker picked it up: by a timeout or a
+            # cancelled caller while queued, or by shutdown(cancel_futures=True)
+            if done.cancelled():
+                with self._lock:
+                    self._queued -= 1
+
+        future = self._get_executor().submit(call)
+        future.add_done_callback(dequeue_unstarted)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), _timeout or self.timeout)
+        except asyncio.TimeoutError:
+            # the worker thread cannot be interrupted, only the caller is released
+            with self._lock:
+                self._stats["timeouts"] += 1
+            raise
+
+    async def shutdown(self) -> None:
+        if self._executor is None:
+            return
+        executor, self._executor = self._executor, None
+        await asyncio.to_thread(executor.shutdown, wait=True, cancel_futures=True)
+        self.logger.info(f"Google API executor stopped: {self.stats}")
+
+    @property
+    def stats(self) -> dict:
+        with self._lock:
+            finished = self._stats["completed"] + self._stats["failed"]
+            return {
+                **self._stats,
+                "max_workers": self.max_workers,
+                "queue_depth": self._queued,
+                "running": self._running,
+                "wait_seconds_avg": round(self._stats["wait_seconds_total"] / finished, 4) if finished else 0.0,
+            }
+
+
+# the only instance of the executor
+google_executor = BlockingExecutor()
@@ -0,0 +1,161 @@
+import time
+import logging
+from typing import Iterable, Optional
+
+from src.models import EventModel
+from src.services.calendar.range_cache import event_bounds
+
+from utils.helpers import DateTimeNormalizer
+from utils.const import FOLLOWUP_SHARDS, FOLLOWUP_DELAY, FOLLOWUP_HORIZON
+
+# atomically claims due members of one shard and their titles
+_POP_DUE = """
+local members = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+if #members == 0 then return {} end
+redis.call('ZREM', KEYS[1], unpack(members))
+local titles = redis.call('HMGET', KEYS[2], unpack(members))
+redis.call('HDEL', KEYS[2], unpack(members))
+local out = {}
+for i, member in ipairs(members) do
+    out[#out + 1] = member
+    out[#out + 1] = titles[i] or ''
+end
+return out
+"""
+
+
+class FollowupScheduler:
+    """
+    Follow-ups keyed by event end time in Redis sorted sets.
+
+    Every event the calendar service reads or writes is (re)scheduled with
+    score ``end + delay`` in the shard ``tg_id % shards``; moving an event
+    just updates its score and deleting it removes the entry. A dispatcher
+    pops due entries per shard, so the cost follows the number of events,
+    not users × ticks. Keys carry a {shard} hash tag so a shard's set and
+    its titles live in the same cluster slot.
+    """
+
+    def __init__(
+        self,
+        shards: int = FOLLOWUP_SHARDS,
+        delay: float = FOLLOWUP_DELAY,
+        horizon: float = FOLLOWUP_HORIZON,
+    ):
+        self.shards = shards
+        self.delay = delay
+        self.horizon = horizon
+        self._pop_script = None
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    @staticmethod
+    def _redis():
+        from data import get_config
+        return get_config().redis_client
+
+    @staticmethod
+    def _keys(shard: int) -> tuple[str, str]:
+        return f"followups:{{{shard}}}", f"followups:titles:{{{shard}}}"
+
+    def _shard(self, tg_id: int) -> int:
+        return tg_id % self.shards
+
+    async def schedule(self, tg_id: int, events: Iterable[EventModel]) -> int:
+        """
+        Schedule follow-ups for events ending between now and the horizon.
+
+        A cancelled event, or one moved past the horizon, loses a follow-up
+        scheduled for it earlier. Overdue entries are left for the
+        dispatcher, which may simply not have popped them yet.
+        """
+        now = time.time()
+        entries, dropped = [], []
+        for event in events:
+            member = f"{tg_id}:{event.id}"
+            if event.status == "cancelled":
+                dropped.append(member)
+                continue
+            end = event_bounds(event)[1]
+            if end is None:
+                continue
+            due = DateTimeNormalizer.normalize_expiry_from_db(end).timestamp() + self.delay
+            if due > now + self.horizon:
+                dropped.append(member)
+            elif due > now:
+                entries.append((member, due, event.summary or "event"))
+
+        if not entries and not dropped:
+            return 0
+
+        zset, titles = self._keys(self._shard(tg_id))
+        try:
+            async with self._redis().pipeline(transaction=False) as pipe:
+                if entries:
+                    pipe.zadd(zset, {member: due for member, due, _ in entries})
+                    pipe.hset(titles, mapping={member: title for member, _, title in entries})
+                if dropped:
+                    pipe.zrem(zset, *dropped)
+                    pipe.hdel(titles, *dropped)
+                await pipe.execute()
+        except Exception as e:
+            self.logger.warning(f"Failed to schedule follow-ups for tg_id={tg_id}: {e}")
+            return 0
+        return len(entries)
+
+    async def unschedule(self, tg_id: int, event_ids: Iterable[str]) -> None:
+        members = [f"{tg_id}:{event_id}" for event_id in event_ids]
+        if not members:
+            return
+
+        zset, titles = self._keys(self._shard(tg_id))
+        try:
+            async with self._redis().pipeline(transaction=False) as pipe:
+                pipe.zrem(zset, *members)
+                pipe.hdel(titles, *members)
+                await pipe.execute()
+        except Exception as e:
+            self.logger.warning(f"Failed to unschedule follow-ups for tg_id={tg_id}: {e}")
+
+    async def pop_due(self, shard: int, limit: int = 500, now: Optional[float] = None) -> list[tuple[int, str, str]]:
+        """Claim up to ``limit`` due follow-ups of a shard as (tg_id, event_id, title)."""
+        redis = self._redis()
+        if self._pop_script is None:
+            self._pop_script = redis.register_script(_POP_DUE)
+
+        raw = await self._pop_script(keys=list(self._keys(shard)), args=[now or time.time(), limit])
+        due = []
+        for member, title in zip(raw[::2], raw[1::2]):
+            tg_id, _, event_id = member.partition(":")
+            due.append((int(tg_id), event_id, title or "event"))
+        return due
+
+    async def requeue(self, due: Iterable[tuple[int, str, str]], delay: float) -> None:
+        """Put popped (tg_id, event_id, title) follow-ups back, due in ``delay`` seconds."""
+        at = time.time() + delay
+        by_shard: dict[int, list[tuple[str, str]]] = {}
+        for tg_id, event_id, title in due:
+            by_shard.setdefault(self._shard(tg_id), []).append((f"{tg_id}:{event_id}", title))
+        if not by_shard:
+            return
+
+        try:
+            async with self._redis().pipeline(transaction=False) as pipe:
+                for shard, entries in by_shard.items():
+                    zset, titles = self._keys(shard)
+                    pipe.zadd(zset, {member: at for member, _ in entries})
+                    pipe.hset(titles, mapping=dict(entries))
+                await pipe.execute()
+        except Exception as e:
+            self.logger.error(f"Failed to requeue {sum(map(len, by_shard.values()))} follow-ups: {e}")
+
+    async def pending(self) -> dict[int, int]:
+        redis = self._redis()
+        async with redis.pipeline(transaction=False) as pipe:
+            for shard in range(self.shards):
+                pipe.zcard(self._keys(shard)[0])
+            sizes = await pipe.execute()
+        return {shard: size for shard, size in enumerate(sizes) if size}
+
+
+# the only instance of the scheduler
+followup_scheduler = FollowupScheduler()
@@ -1,11 +1,15 @@
+import logging
 from typing import Optional
 from datetime import datetime
 
+from src.models import BatchEventOperation, BatchEventResult
 from db.database_protocol import UsersBase, GoogleTokensBase
+from src.services.calendar.context import CalendarContext
 from src.services.calendar.token_service import TokenService
 from src.services.calendar.auth_service import GoogleAuthService
 from src.services.calendar.creds_manager import CredentialsManager
 from src.services.calendar.calendar_service import CalendarService
+from src.services.calendar.digest_schedule import digest_schedule
 
 
 class GoogleCalendarService:
@@ -16,10 +20,12 @@ class GoogleCalendarService:
         client_id: str,
         client_secret: str
     ):
+        self.users_repo = users_repo
         self.token_service = TokenService(tokens_repo)
         self.credentials_manager = CredentialsManager(client_id, client_secret, self.token_service)
         self.auth = GoogleAuthService(users_repo, self.token_service, self.credentials_manager, client_id, client_secret)
-        self.calendar = CalendarService(users_repo, tokens_repo, self.credentials_manager)
+        self.calendar = CalendarService(self.credentials_manager)
+        self.logger = logging.getLogger(self.__class__.__name__)
 
     #  Auth 
 
@@ -27,31 +33,48 @@ class GoogleCalendarService:
         return await self.auth.get_auth_url(tg_id)
 
     async def exchange_code(self, tg_id: int, code: str) -> bool:
-        return await self.auth.exchange_code(tg_id, code)
+        exchanged = await self.auth.exchange_code(tg_id, code)
+        if exchanged:
+            try:
+                await digest_schedule.schedule(tg_id, await self.refresh_timezone(tg_id))
+            except Exception as e:
+                # the login itself succeeded, reconcile picks the user up later
+                self.logger.warning(f"Failed to schedule the digest of tg_id={tg_id}: {e}")
+        return exchanged
 
     async def revoke_access(self, tg_id: int) -> bool:
-        return await self.auth.revoke_access(tg_id)
+        revoked = await self.auth.revoke_access(tg_id)
+        if revoked:
+            await digest_schedule.unschedule(tg_id)
+        return revoked
+
+    async def refresh_timezone(self, tg_id: int) -> Optional[str]:
+        """Store the zone of the user's primary calendar in their profile."""
+        ctx = await self.authorize(tg_id)
+        if ctx is None:
+            return None
+        tz = await self.calendar.get_timezone(ctx)
+        if tz:
+            await self.users_repo.update_user(tg_id, timezone=tz)
+        return tz
 
     async def is_authorized(self, tg_id: int) -> bool:
         return await self.auth.is_authorized(tg_id)
 
-    async def load_credentials(self, tg_id: int) -> bool:
-        user = await self.auth.users_repo.get_user_by_tg_id(tg_id)
-        if not user:
-            return False
-        return await self.credentials_manager.load_credentials(user.id)
+    async def authorize(self, tg_id: int) -> Optional[CalendarContext]:
+        return await self.credentials_manager.authorize(tg_id)
 
     # Events
 
-    async def get_events(self, tg_id: int, **kwargs):
-        return await self.calendar.get_events(tg_id, **kwargs)
+    async def get_events(self, ctx: CalendarContext, **kwargs):
+        return await self.calendar.get_events(ctx, **kwargs)
 
-    async def get_event_by_id(self, tg_id: int, event_id: str):
-        return await self.calendar.get_event_by_id(tg_id, event_id)
+    async def get_event_by_id(self, ctx: CalendarContext, event_id: str):
+        return await self.calendar.get_event_by_id(ctx, event_id)
 
     async def create_event(
         self,
-        tg_id: int,
+        ctx: CalendarContext,
         title: str,
         start_time: datetime,
         end_time: datetime,
@@ -60,7 +83,7 @@ class GoogleCalendarService:
         timezone: str = "UTC"
     ) -> dict:
         return await self.calendar.create_event(
-            tg_id=tg_id,
+            ctx=ctx,
             title=title,
             start_time=start_time,
             end_time=end_time,
@@ -71,31 +94,39 @@ class GoogleCalendarService:
 
     async def update_event(
         self,
-        tg_id: int,
+        ctx: CalendarContext,
         event_id: str,
         title: Optional[str] = None,
         start_time: Optional[datetime] = None,
         end_time: Optional[datetime] = None,
         description: Optional[str] = None,
         location: Optional[str] = None,
-        timezone: str = "UTC"
+        timezone: str = "UTC",
+        etag: Optional[str] = None
     ) -> dict:
         return await self.calendar.update_event(
-            tg_id=tg_id,
+            ctx=ctx,
             event_id=event_id,
             title=title,
             start_time=start_time,
             end_time=end_time,
             description=description,
             location=location,
-            timezone=timezone
+            timezone=timezone,
+            etag=etag
         )
 
-    async def delete_event(self, tg_id: int, event_id: str) -> bool:
-        return await self.calendar.delete_event(tg_id, event_id)
+    async def delete_event(self, ctx: CalendarContext, event_id: str) -> bool:
+        return await self.calendar.delete_event(ctx, event_id)
+
+    async def search_events(self, ctx: CalendarContext, query: str, days_ahead: int = 30):
+        return await self.calendar.search_events(ctx, query, days_ahead)
+
+    async def get_events_range(self, ctx: CalendarContext, start: datetime, end: datetime):
+        return await self.calendar.get_events_range(ctx, start, end)
 
-    async def search_events(self, tg_id: int, query: str, days_ahead: int = 30):
-        return await self.calendar.search_events(tg_id, query, days_ahead)
+    async def get_events_window(self, ctx: CalendarContext, start: datetime, end: datetime):
+        return await self.calendar.get_events_window(ctx, start, end)
 
-    async def get_events_range(self, tg_id: int, start: datetime, end: datetime):
-        return await self.calendar.get_events_range(tg_id, start, end)
\ No newline at end of file
+    async def batch_events(self, ctx: CalendarContext, operations: list[BatchEventOperation]) -> list[BatchEventResult]:
+        return await self.calendar.batch_events(ctx, operations)
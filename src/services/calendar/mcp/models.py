@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Literal, Optional
 from datetime import datetime
 from pydantic import BaseModel, field_validator
 
@@ -23,6 +23,7 @@ class CreateEventParams(BaseModel):
 
 class UpdateEventParams(BaseModel):
     user_id: int
+    etag: Optional[str] = None
     title: Optional[str] = None
     start_time: Optional[datetime] = None
     end_time: Optional[datetime] = None
@@ -41,4 +42,15 @@ class EventsRangeParams(BaseModel):
     def end_after_start(cls, end, info):
         if "start" in info.data and end <= info.data["start"]:
             raise ValueError("the end time is less than the start time")
-        return end
\ No newline at end of file
+        return end
+
+
+class BatchOperationParams(BaseModel):
+    action: Literal["create", "update", "delete"]
+    event_id: Optional[str] = None
+    title: Optional[str] = None
+    start_time: Optional[datetime] = None
+    end_time: Optional[datetime] = None
+    description: Optional[str] = None
+    location: Optional[str] = None
+    timezone: str = "UTC"
@@ -1,13 +1,23 @@
+from contextlib import asynccontextmanager
 from mcp.server.fastmcp import FastMCP
-from utils.client_session import AsyncHTTPClient
+from utils.client_session import AsyncHTTPClient, http_pool
 from utils.helpers import format_event
 from src.services.calendar.mcp.models import (
     CreateEventParams, UpdateEventParams,
-    EventsRangeParams
+    EventsRangeParams, BatchOperationParams
 )
 from utils.const import MCP_CALENDAR_PORT
 
-mcp = FastMCP(name="Google Calendar", port=MCP_CALENDAR_PORT, host="0.0.0.0")
+
+@asynccontextmanager
+async def lifespan(server: FastMCP):
+    # SSE enters the lifespan once per client session; the pool is reference
+    # counted, so every session shares the same keep-alive connections
+    async with http_pool:
+        yield
+
+
+mcp = FastMCP(name="Google Calendar", port=MCP_CALENDAR_PORT, host="0.0.0.0", lifespan=lifespan)
 
 @mcp.resource(
         'calendar://events/{tg_id}',
@@ -256,7 +266,8 @@ async def update_event(
     end_time: str | None = None,
     description: str | None = None,
     location: str | None = None,
-    timezone: str = "UTC"
+    timezone: str = "UTC",
+    etag: str | None = None
 ) -> str:
     """
     Args:
@@ -268,9 +279,11 @@ async def update_event(
         description: New description (optional)
         location: New location (optional)
         timezone: Time zone (default UTC)
+        etag: Event ETag from a previous read, the update fails if the event changed since (optional)
     """
     payload = UpdateEventParams(
         user_id=tg_id,
+        etag=etag,
         title=title,
         start_time=start_time,
         end_time=end_time,
@@ -289,6 +302,8 @@ async def update_event(
         return "❌ The user is not logged in"
     if status == 404:
         return f"❌ Event {event_id} not found"
+    if status == 409:
+        return f"❌ Event {event_id} was changed by someone else, read it again before updating"
     if status != 200:
         return f"❌ Server error: {status}"
 
@@ -318,6 +333,44 @@ async def delete_event(tg_id: int, event_id: str) -> str:
     return f"Event {event_id} has been deleted"
 
 
+@mcp.tool(description="Create, update or delete several events in one request")
+async def batch_events(tg_id: int, operations: list[BatchOperationParams]) -> str:
+    """
+    Args:
+        tg_id: Telegram user ID
+        operations: Up to 50 operations, each with
+            action: "create", "update" or "delete"
+            event_id: Event ID (update and delete)
+            title, start_time, end_time: Required for create, optional for update
+            description, location, timezone: Optional
+    """
+    async with AsyncHTTPClient() as api:
+        status, data = await api.post(
+            "/calendar/events/batch",
+            json={
+                "user_id": tg_id,
+                "operations": [op.model_dump(mode="json", exclude_none=True) for op in operations],
+            }
+        )
+
+    if status == 401:
+        return "❌ The user is not logged in"
+    if status == 422:
+        return f"❌ Invalid operations: {data}"
+    if status != 200:
+        return f"❌ Server error: {status}"
+
+    lines = []
+    for item in data.get("results", []):
+        if item.get("error"):
+            lines.append(f"\n❌ #{item['index']} {item['action']}: {item['status_code']} — {item['error']}")
+        elif item["action"] == "delete":
+            lines.append(f"\n🗑 #{item['index']} deleted")
+        else:
+            lines.append(format_event(item.get("event", {})))
+    return "\n".join(lines)
+
+
 @mcp.tool(description="Get a link to authorize a user in Google Calendar")
 async def get_auth_url(tg_id: int) -> str:
     """
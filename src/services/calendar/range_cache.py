@@ -0,0 +1,130 @@
+import time
+import logging
+from datetime import datetime
+from dataclasses import dataclass
+from collections import OrderedDict
+from typing import Optional
+
+from src.models import EventModel
+from utils.helpers import DateTimeNormalizer
+from utils.const import CALENDAR_RANGE_CACHE_USERS, CALENDAR_RANGE_CACHE_TTL
+
+
+def event_bounds(event: EventModel) -> tuple[Optional[datetime], Optional[datetime]]:
+    """Naive UTC start/end of an event, None when Google did not send one."""
+    return tuple(
+        DateTimeNormalizer.event_time(value.model_dump(by_alias=True, mode="json")) if value else None
+        for value in (event.start, event.end)
+    )
+
+
+@dataclass(slots=True)
+class _Window:
+    start: datetime
+    end: datetime
+    fetched_at: float
+    events: dict[str, EventModel]
+
+
+class EventRangeCache:
+    """
+    Per-user cache of fetched [timeMin, timeMax) windows.
+
+    A lookup is answered from any cached window that covers it, filtered to
+    the events overlapping the requested range. Overlapping or adjacent
+    windows are merged on insert, so "today", "tomorrow" and "this week"
+    collapse into one window. Users are evicted LRU, windows by TTL, and a
+    write to a user's calendar drops all of that user's windows.
+    """
+
+    def __init__(self, max_users: int = CALENDAR_RANGE_CACHE_USERS, ttl: float = CALENDAR_RANGE_CACHE_TTL):
+        self.max_users = max_users
+        self.ttl = ttl
+        self._users: OrderedDict[int, list[_Window]] = OrderedDict()
+        self._stats = {"hits": 0, "misses": 0, "merges": 0, "evictions": 0, "invalidations": 0}
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    def _live_windows(self, user_id: int) -> list[_Window]:
+        now = time.monotonic()
+        windows = [w for w in self._users.get(user_id, []) if now - w.fetched_at <= self.ttl]
+        if windows:
+            self._users[user_id] = windows
+        else:
+            self._users.pop(user_id, None)
+        return windows
+
+    def get(self, user_id: int, start: datetime, end: datetime) -> Optional[list[EventModel]]:
+        start, end = DateTimeNormalizer.to_naive_utc(start), DateTimeNormalizer.to_naive_utc(end)
+
+        for window in self._live_windows(user_id):
+            if window.start <= start and end <= window.end:
+                self._users.move_to_end(user_id)
+                self._stats["hits"] += 1
+                return self._slice(window, start, end)
+
+        self._stats["misses"] += 1
+        return None
+
+    @staticmethod
+    def _slice(window: _Window, start: datetime, end: datetime) -> list[EventModel]:
+        selected = []
+        for event in window.events.values():
+            event_start, event_end = event_bounds(event)
+            if event_start is not None and event_start >= end:
+                continue
+            if event_end is not None and event_end <= start:
+                continue
+            selected.append((event_start or datetime.min, event))
+        selected.sort(key=lambda item: item[0])
+        return [event for _, event in selected]
+
+    def put(self, user_id: int, start: datetime, end: datetime, events: list[EventModel]) -> None:
+        window = _Window(
+            start=DateTimeNormalizer.to_naive_utc(start),
+            end=DateTimeNormalizer.to_naive_utc(end),
+            fetched_at=time.monotonic(),
+            events={event.id: event for event in events},
+        )
+
+        kept = []
+        for other in self._live_windows(user_id):
+            if other.start <= window.end and window.start <= other.end:
+                # the union of two complete windows is complete, the fresh copy wins
+                window.start = min(window.start, other.start)
+                window.end = max(window.end, other.end)
+                window.fetched_at = min(window.fetched_at, other.fetched_at)
+                window.events = {**other.events, **window.events}
+                self._stats["merges"] += 1
+            else:
+                kept.append(other)
+
+        kept.append(window)
+        kept.sort(key=lambda w: w.start)
+        self._users[user_id] = kept
+        self._users.move_to_end(user_id)
+
+        while len(self._users) > self.max_users:
+            self._users.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def invalidate(self, user_id: int) -> None:
+        if self._users.pop(user_id, None) is not None:
+            self._stats["invalidations"] += 1
+            self.logger.debug(f"Event windows invalidated for user_id={user_id}")
+
+    def clear(self) -> None:
+        self._users.clear()
+
+    @property
+    def stats(self) -> dict:
+        lookups = self._stats["hits"] + self._stats["misses"]
+        return {
+            **self._stats,
+            "users": len(self._users),
+            "windows": sum(len(windows) for windows in self._users.values()),
+            "hit_rate": round(self._stats["hits"] / lookups, 3) if lookups else 0.0,
+        }
+
+
+# the only instance of the cache
+event_range_cache = EventRangeCache()
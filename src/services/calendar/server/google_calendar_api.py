@@ -1,19 +1,45 @@
-from fastapi.responses import RedirectResponse
-from fastapi import APIRouter, Request, HTTPException, Depends
+import json
+from datetime import datetime
 
+from fastapi.responses import RedirectResponse, StreamingResponse
+from fastapi import APIRouter, Request, HTTPException, Depends, Query
+
+from src.exceptions import CalendarApiError
+from src.services.calendar.context import CalendarContext
 from src.services.calendar.google_calendar import GoogleCalendarService
+from src.services.calendar.executor import google_executor
+from src.services.calendar.service_cache import calendar_service_cache
+from src.services.calendar.range_cache import event_range_cache
+from src.services.calendar.bulk_service import BulkEventsService
+from src.services.calendar.sync_service import get_calendar_sync
+from src.services.calendar.digest_schedule import digest_schedule
+from utils.client_session import http_pool
 from src.models import (
     UserCreate, UserResponse,
     CreateEventRequest, UpdateEventRequest,
     EventsRangeRequest, EventsResponse, 
-    EventResponse, status
+    EventResponse, BatchEventsRequest, BatchEventsResponse, status
 )
 from src.services.calendar.server.dependencies import get_calendar_service, get_tokens_repo, get_users_repo
+from db.database import global_db_manager
 from db.database_protocol import UsersBase, GoogleTokensBase
+from db.cache import repo_cache
 
 router = APIRouter(prefix="/calendar", tags=["calendar"])
 
 
+async def _authorize(calendar: GoogleCalendarService, tg_id: int) -> CalendarContext:
+    ctx = await calendar.authorize(tg_id)
+    if ctx is None:
+        raise HTTPException(status_code=401, detail="Not authorized")
+    return ctx
+
+
+def _error_line(message: str, cursor: int) -> str:
+    # a stream has sent its 200 already, only the body can tell the client; cursor is where to resume
+    return json.dumps({"error": message, "cursor": cursor}) + "\n"
+
+
 #  Auth 
 
 @router.get("/auth_url")
@@ -75,13 +101,115 @@ async def revoke_access(
 async def success_url():
     return await status("Calendar connected!")
 
+@router.get("/metrics")
+async def metrics():
+    sync = get_calendar_sync()
+    return {
+        "local_store": sync.stats if sync else None,
+        "range_cache": event_range_cache.stats,
+        "service_cache": calendar_service_cache.stats,
+        "google_executor": google_executor.stats,
+        "http_pool": http_pool.stats,
+        "repo_cache": repo_cache.stats,
+        "digest_schedule": await digest_schedule.pending(),
+    }
+
+#  Push notifications 
+
+@router.post("/notifications", status_code=204)
+async def calendar_notification(request: Request):
+    """Webhook for events.watch channels, Google sends no body, only X-Goog-* headers."""
+    sync = get_calendar_sync()
+    channel_id = request.headers.get("X-Goog-Channel-ID")
+    if sync is None or not channel_id:
+        raise HTTPException(status_code=404, detail="Unknown channel")
+
+    accepted = await sync.handle_notification(
+        channel_id,
+        request.headers.get("X-Goog-Channel-Token"),
+        request.headers.get("X-Goog-Resource-State", "exists"),
+    )
+    if not accepted:
+        raise HTTPException(status_code=404, detail="Unknown channel")
+
+
+@router.post("/watch")
+async def watch_calendar(
+    tg_id: int,
+    calendar: GoogleCalendarService = Depends(get_calendar_service)
+):
+    sync = get_calendar_sync()
+    if sync is None or not sync.webhook_url:
+        raise HTTPException(status_code=400, detail="Push notifications are not configured")
+    try:
+        ctx = await _authorize(calendar, tg_id)
+        if not await sync.watch(ctx):
+            raise HTTPException(status_code=502, detail="Google refused the watch channel")
+        return await status("watching")
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to watch calendar: {e}")
+
+
+@router.delete("/watch")
+async def unwatch_calendar(
+    tg_id: int,
+    calendar: GoogleCalendarService = Depends(get_calendar_service)
+):
+    sync = get_calendar_sync()
+    if sync is None:
+        raise HTTPException(status_code=404, detail="No watch channel")
+    try:
+        ctx = await _authorize(calendar, tg_id)
+        if not await sync.unwatch(ctx):
+            raise HTTPException(status_code=404, detail="No watch channel")
+        return await status("unwatched")
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to stop watching calendar: {e}")
+
 @router.get("/users/active")
 async def get_active_users(
+    cursor: int = 0,
+    limit: int = Query(1000, ge=1, le=10000),
+    stream: bool = False,
     users_repo: UsersBase = Depends(get_users_repo)
 ):
+    """
+    Users with a Google token, keyset-paged by internal id.
+
+    Returns one page and its next_cursor (None on the last page). With
+    stream=true every page from cursor on is streamed as NDJSON lines of
+    {"tg_id"}, each page read in its own short transaction. A failed page
+    ends the stream with an {"error", "cursor"} line, the cursor to resume
+    from.
+    """
+    if stream:
+        async def _lines():
+            after = cursor
+            while True:
+                try:
+                    async with global_db_manager.transaction() as session:
+                        page = await global_db_manager.get_users_repo(session).get_active_tg_ids_page(after, limit)
+                except Exception as e:
+                    yield _error_line(f"Failed to get users: {e}", after)
+                    return
+                for _, tg_id in page:
+                    yield json.dumps({"tg_id": tg_id}) + "\n"
+                if len(page) < limit:
+                    return
+                after = page[-1][0]
+
+        return StreamingResponse(_lines(), media_type="application/x-ndjson")
+
     try:
-        users = await users_repo.get_all_users()
-        return {"users": [{"tg_id": u.tg_id} for u in users]}
+        page = await users_repo.get_active_tg_ids_page(cursor, limit)
+        return {
+            "users": [{"tg_id": tg_id} for _, tg_id in page],
+            "next_cursor": page[-1][0] if len(page) == limit else None,
+        }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get users: {e}")
     
@@ -139,9 +267,8 @@ async def get_events(
     calendar: GoogleCalendarService = Depends(get_calendar_service)
 ):
     try:
-        if not await calendar.load_credentials(tg_id):
-            raise HTTPException(status_code=401, detail="Not authorized")
-        events = await calendar.get_events(tg_id, days_ahead=days_ahead)
+        ctx = await _authorize(calendar, tg_id)
+        events = await calendar.get_events(ctx, days_ahead=days_ahead)
         return EventsResponse(events=events)
     except HTTPException:
         raise
@@ -159,9 +286,8 @@ async def search_events(
     calendar: GoogleCalendarService = Depends(get_calendar_service)
 ):
     try:
-        if not await calendar.load_credentials(tg_id):
-            raise HTTPException(status_code=401, detail="Not authorized")
-        events = await calendar.search_events(tg_id, query=query, days_ahead=days_ahead)
+        ctx = await _authorize(calendar, tg_id)
+        events = await calendar.search_events(ctx, query=query, days_ahead=days_ahead)
         return EventsResponse(events=events)
     except HTTPException:
         raise
@@ -175,9 +301,8 @@ async def get_events_range(
     calendar: GoogleCalendarService = Depends(get_calendar_service)
 ):
     try:
-        if not await calendar.load_credentials(data.user_id):
-            raise HTTPException(status_code=401, detail="Not authorized")
-        events = await calendar.get_events_range(data.user_id, start=data.start, end=data.end)
+        ctx = await _authorize(calendar, data.user_id)
+        events = await calendar.get_events_range(ctx, start=data.start, end=data.end)
         return EventsResponse(events=events)
     except HTTPException:
         raise
@@ -185,6 +310,78 @@ async def get_events_range(
         raise HTTPException(status_code=500, detail=f"Failed to get events range: {e}")
 
 
+@router.post("/events/batch", response_model=BatchEventsResponse, response_model_exclude_none=True)
+async def batch_events(
+    data: BatchEventsRequest,
+    calendar: GoogleCalendarService = Depends(get_calendar_service)
+):
+    try:
+        ctx = await _authorize(calendar, data.user_id)
+        results = await calendar.batch_events(ctx, data.operations)
+        return BatchEventsResponse(results=results)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Batch failed: {e}")
+
+
+@router.get("/events/ending")
+async def get_events_ending(
+    start: datetime,
+    end: datetime,
+    cursor: int = 0,
+    limit: int = Query(500, ge=1, le=5000)
+):
+    """
+    Stream (tg_id, event_id, title) of events ending in [start, end) for a
+    page of active users, as NDJSON. The last line holds next_cursor, or
+    {"error", "cursor"} when the page could not be read.
+    """
+    if end <= start:
+        raise HTTPException(status_code=400, detail="end must be after start")
+
+    async def _lines():
+        try:
+            async for item in BulkEventsService().iter_events_ending(start, end, cursor=cursor, limit=limit):
+                yield json.dumps(item, ensure_ascii=False) + "\n"
+        except Exception as e:
+            yield _error_line(f"Failed to get events: {e}", cursor)
+
+    return StreamingResponse(_lines(), media_type="application/x-ndjson")
+
+
+@router.get("/events/window")
+async def get_events_window(
+    start: datetime,
+    end: datetime,
+    cursor: int = 0,
+    limit: int = Query(500, ge=1, le=5000)
+):
+    """
+    Stream {tg_id, events} for every user of a page of active users, as
+    NDJSON, users without events included. The last line holds next_cursor,
+    or {"error", "cursor"} when the page could not be read.
+    """
+    if end <= start:
+        raise HTTPException(status_code=400, detail="end must be after start")
+
+    async def _lines():
+        try:
+            async for item in BulkEventsService().iter_user_events(start, end, cursor=cursor, limit=limit):
+                if "events" in item:
+                    item = {
+                        "tg_id": item["tg_id"],
+                        "events": [
+                            e.model_dump(mode="json", by_alias=True, exclude_none=True) for e in item["events"]
+                        ],
+                    }
+                yield json.dumps(item, ensure_ascii=False) + "\n"
+        except Exception as e:
+            yield _error_line(f"Failed to get events: {e}", cursor)
+
+    return StreamingResponse(_lines(), media_type="application/x-ndjson")
+
+
 @router.get("/events/{event_id}", response_model=EventResponse)
 async def get_event(
     event_id: str,
@@ -192,9 +389,8 @@ async def get_event(
     calendar: GoogleCalendarService = Depends(get_calendar_service)
 ):
     try:
-        if not await calendar.load_credentials(tg_id):
-            raise HTTPException(status_code=401, detail="Not authorized")
-        event = await calendar.get_event_by_id(tg_id, event_id)
+        ctx = await _authorize(calendar, tg_id)
+        event = await calendar.get_event_by_id(ctx, event_id)
         if not event:
             raise HTTPException(status_code=404, detail="Event not found")
         return EventResponse(event=event)
@@ -210,10 +406,9 @@ async def create_event(
     calendar: GoogleCalendarService = Depends(get_calendar_service)
 ):
     try:
-        if not await calendar.load_credentials(data.user_id):
-            raise HTTPException(status_code=401, detail="Not authorized")
+        ctx = await _authorize(calendar, data.user_id)
         event = await calendar.create_event(
-            tg_id=data.user_id,
+            ctx=ctx,
             title=data.title,
             start_time=data.start_time,
             end_time=data.end_time,
@@ -235,10 +430,9 @@ async def update_event(
     calendar: GoogleCalendarService = Depends(get_calendar_service)
 ):
     try:
-        if not await calendar.load_credentials(data.user_id):
-            raise HTTPException(status_code=401, detail="Not authorized")
+        ctx = await _authorize(calendar, data.user_id)
         event = await calendar.update_event(
-            tg_id=data.user_id,
+            ctx=ctx,
             event_id=event_id,
             title=data.title,
             start_time=data.start_time,
@@ -246,10 +440,17 @@ async def update_event(
             description=data.description,
             location=data.location,
             timezone=data.timezone,
+            etag=data.etag,
         )
         return EventResponse(event=event)
     except HTTPException:
         raise
+    except CalendarApiError as e:
+        if e.status_code == 412:
+            raise HTTPException(status_code=409, detail="Event was changed since the given etag")
+        if e.status_code == 404:
+            raise HTTPException(status_code=404, detail="Event not found")
+        raise HTTPException(status_code=502, detail=f"Failed to update event: {e.message}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to update event: {e}")
 
@@ -261,9 +462,8 @@ async def delete_event(
     calendar: GoogleCalendarService = Depends(get_calendar_service)
 ):
     try:
-        if not await calendar.load_credentials(tg_id):
-            raise HTTPException(status_code=401, detail="Not authorized")
-        await calendar.delete_event(tg_id, event_id)
+        ctx = await _authorize(calendar, tg_id)
+        await calendar.delete_event(ctx, event_id)
         return await status("deleted")
     except HTTPException:
         raise
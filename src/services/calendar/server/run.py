@@ -1,9 +1,20 @@
 import uvicorn
 from src.services.base import create_app
 from src.services.calendar.server.google_calendar_api import router
+from src.services.calendar.executor import google_executor
+from src.services.calendar.token_renewer import TokenRenewer
+from src.services.calendar.digest_schedule import digest_schedule
+from utils.client_session import http_pool
 from utils.const import FASTAPI_CALENDAR_PORT
 
-app = create_app(title="Google Calendar Service", routers=[router])
+token_renewer = TokenRenewer()
+
+app = create_app(
+    title="Google Calendar Service",
+    routers=[router],
+    on_startup=[http_pool.open, token_renewer.start, digest_schedule.start],
+    on_shutdown=[digest_schedule.stop, token_renewer.stop, google_executor.shutdown, http_pool.close],
+)
 
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=FASTAPI_CALENDAR_PORT)
\ No newline at end of file
@@ -0,0 +1,97 @@
+import time
+import hashlib
+import logging
+from typing import Any, Optional
+from collections import OrderedDict
+
+import httplib2
+from google_auth_httplib2 import AuthorizedHttp
+from google.oauth2.credentials import Credentials
+from googleapiclient.discovery import build
+from googleapiclient.http import HttpRequest
+
+from utils.const import CALENDAR_SERVICE_CACHE_SIZE, CALENDAR_SERVICE_CACHE_TTL
+
+
+def token_fingerprint(access_token: str, refresh_token: Optional[str] = None) -> str:
+    raw = f"{access_token}:{refresh_token or ''}".encode()
+    return hashlib.sha256(raw).hexdigest()[:16]
+
+
+def build_calendar_service(credentials: Credentials) -> Any:
+    """
+    Build a Calendar v3 resource that is safe to share between threads.
+
+    httplib2.Http is not thread-safe, so every request gets its own
+    authorized transport instead of the one bound at build time.
+    """
+    def request_builder(http, *args, **kwargs):
+        return HttpRequest(AuthorizedHttp(credentials, http=httplib2.Http()), *args, **kwargs)
+
+    return build(
+        "calendar", "v3",
+        credentials=credentials,
+        requestBuilder=request_builder,
+        cache_discovery=False,
+    )
+
+
+class CalendarServiceCache:
+    """
+    Process-wide LRU/TTL cache of built Calendar resources.
+
+    One entry per user; the entry is only served while the token fingerprint
+    it was built with still matches, so a refreshed token is a miss.
+    """
+
+    def __init__(self, max_size: int = CALENDAR_SERVICE_CACHE_SIZE, ttl: float = CALENDAR_SERVICE_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._items: OrderedDict[int, tuple[str, float, Any]] = OrderedDict()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    def get(self, user_id: int, fingerprint: str) -> Optional[Any]:
+        item = self._items.get(user_id)
+        if item is None:
+            self._stats["misses"] += 1
+            return None
+
+        cached_fingerprint, built_at, service = item
+        if cached_fingerprint != fingerprint or time.monotonic() - built_at > self.ttl:
+            del self._items[user_id]
+            self._stats["misses"] += 1
+            return None
+
+        self._items.move_to_end(user_id)
+        self._stats["hits"] += 1
+        return service
+
+    def put(self, user_id: int, fingerprint: str, service: Any) -> None:
+        self._items[user_id] = (fingerprint, time.monotonic(), service)
+        self._items.move_to_end(user_id)
+
+        while len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def invalidate(self, user_id: int) -> None:
+        if self._items.pop(user_id, None) is not None:
+            self._stats["invalidations"] += 1
+            self.logger.debug(f"Calendar service invalidated for user_id={user_id}")
+
+    def clear(self) -> None:
+        self._items.clear()
+
+    @property
+    def stats(self) -> dict:
+        lookups = self._stats["hits"] + self._stats["misses"]
+        return {
+            **self._stats,
+            "size": len(self._items),
+            "hit_rate": round(self._stats["hits"] / lookups, 3) if lookups else 0.0,
+        }
+
+
+# the only instance of the cache
+calendar_service_cache = CalendarServiceCache()
@@ -0,0 +1,443 @@
+import time
+import uuid
+import asyncio
+import secrets
+import logging
+from typing import AsyncIterator, Optional
+from dataclasses import dataclass
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+
+from src.models import EventModel, SyncStateModel
+from src.exceptions import CalendarApiError
+from src.services.calendar.context import CalendarContext
+from src.services.calendar.followups import followup_scheduler
+from src.services.calendar.range_cache import event_range_cache
+from src.services.calendar.transport import CalendarTransport, get_calendar_transport
+
+from utils.helpers import DateTimeNormalizer, preprocess_event_data
+from utils.const import (
+    CALENDAR_PAGE_SIZE,
+    CALENDAR_LOCAL_STORE,
+    CALENDAR_SYNC_TTL,
+    CALENDAR_SYNC_HISTORY_DAYS,
+    CALENDAR_WATCHED_SYNC_TTL,
+    CALENDAR_WEBHOOK_URL,
+    CALENDAR_WATCH_TTL,
+    CALENDAR_WATCH_RENEW_LEAD,
+    CALENDAR_WATCH_RETRY,
+)
+
+SYNC_FIELDS = f"nextPageToken,nextSyncToken,items({','.join(EventModel.model_fields)})"
+
+
+@dataclass(slots=True)
+class _UserLock:
+    lock: asyncio.Lock
+    # holders and waiters, the entry is dropped when it falls to 0
+    users: int = 0
+    # notifications seen while the entry exists, compared around a sync
+    generation: int = 0
+
+
+class CalendarSyncService:
+    """
+    Keeps a local copy of every user's events and serves reads from it.
+
+    The first read of a user pulls the calendar from ``history_days`` back
+    on, later reads send the stored syncToken and only apply the deltas.
+    Ranges starting before that are not answered from the store. While the
+    last sync is younger than ``ttl`` reads do not touch Google at all. A
+    410 from Google means the token expired and triggers a full resync.
+
+    Google is paged outside of any transaction, every page is committed on
+    its own and the sync token only once the last one is in. A full sync
+    clears the token first, so a half-done one is never trusted.
+
+    When ``webhook_url`` is set every synced user also gets an events.watch
+    channel. A notification on it marks the user's store stale, so while the
+    channel is open reads trust the store for ``watched_ttl`` instead of
+    ``ttl``. Channels are renewed on access ``renew_lead`` seconds before
+    they expire. A failed events.watch is retried after ``watch_retry``
+    seconds, doubled per consecutive failure up to ``watched_ttl``.
+
+    A notification that arrives while a sync is running (or waiting for the
+    user's lock) bumps the user's dirty generation, and the sync then stores its token without stamping
+    ``synced_at``, so the next read syncs again instead of trusting it.
+
+    Every store failure is logged and reported as None, so callers can fall
+    back to querying Google directly.
+    """
+
+    def __init__(
+        self,
+        transport: Optional[CalendarTransport] = None,
+        ttl: float = CALENDAR_SYNC_TTL,
+        history_days: int = CALENDAR_SYNC_HISTORY_DAYS,
+        watched_ttl: float = CALENDAR_WATCHED_SYNC_TTL,
+        webhook_url: str = CALENDAR_WEBHOOK_URL,
+        watch_ttl: int = CALENDAR_WATCH_TTL,
+        renew_lead: int = CALENDAR_WATCH_RENEW_LEAD,
+        watch_retry: float = CALENDAR_WATCH_RETRY,
+    ):
+        self._transport = transport
+        self.ttl = ttl
+        self.history_days = history_days
+        self.watched_ttl = watched_ttl
+        self.webhook_url = webhook_url
+        self.watch_ttl = watch_ttl
+        self.renew_lead = renew_lead
+        self.watch_retry = watch_retry
+        # only users with a holder or waiter have an entry
+        self._locks: dict[int, _UserLock] = {}
+        # user_id -> (consecutive failures, monotonic time of the next attempt)
+        self._watch_failures: dict[int, tuple[int, float]] = {}
+        # user_id -> first full sync started by get_synced_events
+        self._first_syncs: dict[int, asyncio.Task] = {}
+        self._stats = {
+            "local_reads": 0, "full_syncs": 0, "incremental_syncs": 0, "resyncs": 0, "fallbacks": 0,
+            "channels_opened": 0, "watch_failures": 0, "notifications": 0, "dirty_syncs": 0,
+        }
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    @property
+    def transport(self) -> CalendarTransport:
+        return self._transport or get_calendar_transport()
+
+    @property
+    def stats(self) -> dict:
+        return dict(self._stats)
+
+    async def get_events(
+        self,
+        ctx: CalendarContext,
+        start: datetime,
+        end: datetime,
+        query: Optional[str] = None
+    ) -> Optional[list[EventModel]]:
+        from db.database import global_db_manager
+
+        if DateTimeNormalizer.to_naive_utc(start) < self._history_start():
+            # older than any full sync reached, the store may miss events
+            self._stats["fallbacks"] += 1
+            return None
+        try:
+            await self.ensure_fresh(ctx)
+            async with global_db_manager.transaction() as session:
+                events_repo = global_db_manager.get_events_repo(session)
+                events = await events_repo.get_events_range(
+                    ctx.user_id,
+                    DateTimeNormalizer.to_naive_utc(start),
+                    DateTimeNormalizer.to_naive_utc(end),
+                    query=query
+                )
+            self._stats["local_reads"] += 1
+            return events
+        except Exception as e:
+            self._stats["fallbacks"] += 1
+            self.logger.warning(f"Local event store unavailable for user_id={ctx.user_id}: {e}")
+            return None
+
+    async def get_synced_events(self, ctx: CalendarContext, start: datetime, end: datetime) -> Optional[list[EventModel]]:
+        """
+        Like get_events, but only for users synced before.
+
+        For anyone else the first full sync is started in the
+        background and None is returned right away, so bulk readers can
+        query their window from Google instead of waiting for it.
+        """
+        from db.database import global_db_manager
+
+        try:
+            async with global_db_manager.transaction() as session:
+                state = await global_db_manager.get_events_repo(session).get_sync_state(ctx.user_id)
+        except Exception as e:
+            self.logger.warning(f"Local event store unavailable for user_id={ctx.user_id}: {e}")
+            return None
+
+        if state is None or not state.sync_token:
+            self._start_first_sync(ctx)
+            return None
+        return await self.get_events(ctx, start, end)
+
+    def _start_first_sync(self, ctx: CalendarContext) -> None:
+        task = self._first_syncs.get(ctx.user_id)
+        if task is not None and not task.done():
+            return
+        task = asyncio.create_task(self._first_sync(ctx), name=f"calendar-first-sync-{ctx.user_id}")
+        self._first_syncs[ctx.user_id] = task
+        task.add_done_callback(lambda _: self._first_syncs.pop(ctx.user_id, None))
+
+    async def _first_sync(self, ctx: CalendarContext) -> None:
+        try:
+            await self.ensure_fresh(ctx)
+        except Exception as e:
+            self.logger.warning(f"First sync for user_id={ctx.user_id} failed: {e}")
+
+    def _history_start(self) -> datetime:
+        # a full sync done earlier started even further back
+        return DateTimeNormalizer.to_naive_utc(datetime.now(timezone.utc) - timedelta(days=self.history_days))
+
+    @asynccontextmanager
+    async def _lock(self, user_id: int) -> AsyncIterator[_UserLock]:
+        # one writer per user at a time, a concurrent reader waits and reuses its sync
+        entry = self._locks.get(user_id)
+        if entry is None:
+            entry = self._locks[user_id] = _UserLock(asyncio.Lock())
+        entry.users += 1
+        try:
+            async with entry.lock:
+                yield entry
+        finally:
+            entry.users -= 1
+            if entry.users == 0:
+                del self._locks[user_id]
+
+    @staticmethod
+    def _channel_open(state: Optional[SyncStateModel], lead: float = 0) -> bool:
+        if not state or not state.channel_id or not state.channel_expires_at:
+            return False
+        expires_at = DateTimeNormalizer.normalize_expiry_from_db(state.channel_expires_at)
+        return expires_at > datetime.now(timezone.utc) + timedelta(seconds=lead)
+
+    def _is_fresh(self, state: Optional[SyncStateModel]) -> bool:
+        if not state or not state.sync_token or not state.synced_at:
+            return False
+        ttl = self.watched_ttl if self._channel_open(state) else self.ttl
+        age = datetime.now(timezone.utc) - DateTimeNormalizer.normalize_expiry_from_db(state.synced_at)
+        return age.total_seconds() < ttl
+
+    async def ensure_fresh(self, ctx: CalendarContext) -> None:
+        from db.database import global_db_manager
+
+        async with self._lock(ctx.user_id) as entry:
+            async with global_db_manager.transaction() as session:
+                state = await global_db_manager.get_events_repo(session).get_sync_state(ctx.user_id)
+
+            # open the channel before syncing so no change falls in between
+            if (
+                self.webhook_url
+                and not self._channel_open(state, lead=self.renew_lead)
+                and self._may_watch(ctx.user_id)
+            ):
+                await self._open_channel(ctx, state)
+
+            if self._is_fresh(state):
+                return
+
+            sync_token = state.sync_token if state else None
+            try:
+                await self._sync(ctx, entry, sync_token)
+            except CalendarApiError as e:
+                if e.status_code != 410 or sync_token is None:
+                    raise
+                self._stats["resyncs"] += 1
+                self.logger.info(f"Sync token expired for user_id={ctx.user_id}, running a full sync")
+                await self._sync(ctx, entry, None)
+
+    def _may_watch(self, user_id: int) -> bool:
+        failure = self._watch_failures.get(user_id)
+        return failure is None or time.monotonic() >= failure[1]
+
+    async def _open_channel(self, ctx: CalendarContext, state: Optional[SyncStateModel]) -> bool:
+        from db.database import global_db_manager
+
+        channel_id = str(uuid.uuid4())
+        token = secrets.token_urlsafe(24)
+        try:
+            channel = await self.transport.watch_events(ctx, {
+                "id": channel_id,
+                "type": "web_hook",
+                "address": self.webhook_url,
+                "token": token,
+                "params": {"ttl": str(self.watch_ttl)},
+            })
+        except Exception as e:
+            # the store still works without push, it just syncs on ttl
+            failures = self._watch_failures.get(ctx.user_id, (0, 0.0))[0] + 1
+            delay = min(self.watch_retry * 2 ** (failures - 1), self.watched_ttl)
+            self._watch_failures[ctx.user_id] = (failures, time.monotonic() + delay)
+            self._stats["watch_failures"] += 1
+            self.logger.warning(
+                f"Failed to open a watch channel for user_id={ctx.user_id}, retrying in {delay:.0f}s: {e}"
+            )
+            return False
+
+        self._watch_failures.pop(ctx.user_id, None)
+
+        expires_at = datetime.fromtimestamp(int(channel["expiration"]) / 1000, tz=timezone.utc)
+        async with global_db_manager.transaction() as session:
+            if not await global_db_manager.get_events_repo(session).save_channel(
+                ctx.user_id,
+                channel_id,
+                resource_id=channel.get("resourceId"),
+                token=token,
+                expires_at=DateTimeNormalizer.to_naive_utc(expires_at),
+            ):
+                raise RuntimeError("failed to save watch channel")
+
+        self._stats["channels_opened"] += 1
+        self.logger.info(f"Watch channel {channel_id} opened for user_id={ctx.user_id} until {expires_at}")
+
+        # the renewed channel replaces the old one, which is stopped best effort
+        if state and state.channel_id and state.channel_resource_id:
+            await self._stop_channel(ctx, state.channel_id, state.channel_resource_id)
+        return True
+
+    async def _stop_channel(self, ctx: CalendarContext, channel_id: str, resource_id: str) -> None:
+        try:
+            await self.transport.stop_channel(ctx, channel_id, resource_id)
+        except Exception as e:
+            self.logger.warning(f"Failed to stop watch channel {channel_id}: {e}")
+
+    async def watch(self, ctx: CalendarContext) -> bool:
+        """Open (or replace) the watch channel of a user right away."""
+        from db.database import global_db_manager
+
+        if not self.webhook_url:
+            return False
+        async with self._lock(ctx.user_id):
+            async with global_db_manager.transaction() as session:
+                state = await global_db_manager.get_events_repo(session).get_sync_state(ctx.user_id)
+            return await self._open_channel(ctx, state)
+
+    async def unwatch(self, ctx: CalendarContext) -> bool:
+        """Stop the watch channel of a user, reads fall back to the plain ttl."""
+        from db.database import global_db_manager
+
+        async with self._lock(ctx.user_id), global_db_manager.transaction() as session:
+            events_repo = global_db_manager.get_events_repo(session)
+            state = await events_repo.get_sync_state(ctx.user_id)
+            if not state or not state.channel_id:
+                return False
+
+            if state.channel_resource_id:
+                await self._stop_channel(ctx, state.channel_id, state.channel_resource_id)
+            return await events_repo.save_channel(ctx.user_id, None)
+
+    async def handle_notification(self, channel_id: str, token: Optional[str], resource_state: str) -> bool:
+        """
+        Apply a push notification from Google.
+
+        Returns False for unknown channels or a wrong channel token.
+        """
+        from db.database import global_db_manager
+
+        async with global_db_manager.transaction() as session:
+            events_repo = global_db_manager.get_events_repo(session)
+            state = await events_repo.get_sync_state_by_channel(channel_id)
+            if not state or not secrets.compare_digest(state.channel_token or "", token or ""):
+                return False
+
+            # "sync" only confirms that the channel was created
+            if resource_state != "sync":
+                self._stats["notifications"] += 1
+                # before the mark, a sync that stamps after it must see the bump;
+                # without an entry no sync is running or waiting
+                entry = self._locks.get(state.user_id)
+                if entry is not None:
+                    entry.generation += 1
+                await events_repo.mark_stale(state.user_id)
+                event_range_cache.invalidate(state.user_id)
+                self.logger.debug(f"Events of user_id={state.user_id} changed ({resource_state}), store marked stale")
+        return True
+
+    async def _sync(self, ctx: CalendarContext, entry: _UserLock, sync_token: Optional[str]) -> None:
+        from db.database import global_db_manager
+
+        started = time.perf_counter()
+        generation = entry.generation
+        if sync_token:
+            params = {"syncToken": sync_token}
+        else:
+            # the nextSyncToken of a bounded full sync keeps that bound
+            params = {"timeMin": self._history_start().isoformat() + "Z"}
+            async with global_db_manager.transaction() as session:
+                events_repo = global_db_manager.get_events_repo(session)
+                # nobody trusts the store until the last page is in
+                if not await events_repo.save_sync_state(ctx.user_id, None, None):
+                    raise RuntimeError("failed to reset sync state")
+                if not await events_repo.clear_events(ctx.user_id):
+                    raise RuntimeError("failed to clear local events")
+        page_token = None
+        changed = 0
+
+        while True:
+            page = await self.transport.list_events(
+                ctx,
+                maxResults=CALENDAR_PAGE_SIZE,
+                fields=SYNC_FIELDS,
+                singleEvents=True,
+                pageToken=page_token,
+                **params
+            )
+            items = page.get("items", [])
+            cancelled = [item["id"] for item in items if item.get("status") == "cancelled"]
+            live = [item for item in items if item.get("status") != "cancelled"]
+
+            # one short transaction per page, none is open while Google is paged
+            async with global_db_manager.transaction() as session:
+                events_repo = global_db_manager.get_events_repo(session)
+                if not await events_repo.upsert_events(ctx.user_id, live):
+                    raise RuntimeError("failed to store events")
+                if not await events_repo.delete_events(ctx.user_id, cancelled):
+                    raise RuntimeError("failed to delete events")
+            # deltas include moves and deletions made outside this service
+            await followup_scheduler.schedule(ctx.tg_id, preprocess_event_data(live))
+            await followup_scheduler.unschedule(ctx.tg_id, cancelled)
+            changed += len(items)
+
+            page_token = page.get("nextPageToken")
+            if not page_token:
+                break
+
+        synced_at = DateTimeNormalizer.to_naive_utc(datetime.now(timezone.utc))
+        if entry.generation != generation:
+            # a change was notified mid-sync and may be missing from these pages
+            self._stats["dirty_syncs"] += 1
+            synced_at = None
+        async with global_db_manager.transaction() as session:
+            if not await global_db_manager.get_events_repo(session).save_sync_state(
+                ctx.user_id, page.get("nextSyncToken"), synced_at
+            ):
+                raise RuntimeError("failed to save sync state")
+
+        self._stats["incremental_syncs" if sync_token else "full_syncs"] += 1
+        self.logger.info(
+            f"{'Incremental' if sync_token else 'Full'} sync for user_id={ctx.user_id}: "
+            f"{changed} changes in {time.perf_counter() - started:.2f}s"
+        )
+
+    async def store(self, ctx: CalendarContext, event: dict) -> None:
+        """Write-through of an event created or updated by this service."""
+        from db.database import global_db_manager
+
+        try:
+            async with self._lock(ctx.user_id), global_db_manager.transaction() as session:
+                await global_db_manager.get_events_repo(session).upsert_events(ctx.user_id, [event])
+        except Exception as e:
+            self.logger.warning(f"Failed to store event {event.get('id')} locally: {e}")
+
+    async def forget(self, ctx: CalendarContext, event_id: str) -> None:
+        """Write-through of an event deleted by this service."""
+        from db.database import global_db_manager
+
+        try:
+            async with self._lock(ctx.user_id), global_db_manager.transaction() as session:
+                await global_db_manager.get_events_repo(session).delete_events(ctx.user_id, [event_id])
+        except Exception as e:
+            self.logger.warning(f"Failed to delete event {event_id} locally: {e}")
+
+
+_sync_service: Optional[CalendarSyncService] = None
+
+
+def get_calendar_sync() -> Optional[CalendarSyncService]:
+    """Returns the process-wide sync service, or None when CALENDAR_LOCAL_STORE is off."""
+    global _sync_service
+
+    if not CALENDAR_LOCAL_STORE:
+        return None
+    if _sync_service is None:
+        _sync_service = CalendarSyncService()
+    return _sync_service
@@ -0,0 +1,117 @@
+import asyncio
+import logging
+from typing import Optional
+from datetime import datetime, timedelta, timezone
+
+from google.auth.exceptions import RefreshError
+
+from src.models import TokenModel
+from src.services.calendar.token_service import TokenService
+from src.services.calendar.creds_manager import CredentialsManager
+
+from utils.helpers import DateTimeNormalizer
+from utils.const import (
+    TOKEN_RENEW_LEAD_MINUTES, TOKEN_RENEW_INTERVAL, TOKEN_RENEW_BATCH_SIZE, TOKEN_RENEW_MAX_BACKOFF
+)
+
+
+class TokenRenewer:
+    """
+    Background task that refreshes Google tokens before they expire.
+
+    Tokens expiring within ``lead_minutes`` are refreshed every ``interval``
+    seconds, so request paths find a valid access token and do not block on
+    the token endpoint. Refreshes go through CredentialsManager.refresh and
+    therefore share the per-user single-flight with request paths. Failed
+    renewals back off exponentially (revoked grants straight to
+    ``max_backoff``), so dead tokens don't starve the live ones.
+    """
+
+    def __init__(
+        self,
+        lead_minutes: int = TOKEN_RENEW_LEAD_MINUTES,
+        interval: float = TOKEN_RENEW_INTERVAL,
+        batch_size: int = TOKEN_RENEW_BATCH_SIZE,
+        max_backoff: float = TOKEN_RENEW_MAX_BACKOFF,
+    ):
+        self.lead_minutes = lead_minutes
+        self.interval = interval
+        self.batch_size = batch_size
+        self.max_backoff = max_backoff
+        self._task: Optional[asyncio.Task] = None
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    async def start(self) -> None:
+        if self._task is not None and not self._task.done():
+            return
+        self._task = asyncio.create_task(self._loop(), name="google-token-renewer")
+        self.logger.info(f"Token renewer started: lead={self.lead_minutes}m, interval={self.interval}s")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self.logger.info("Token renewer stopped")
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                renewed = await self.renew_expiring()
+                if renewed:
+                    self.logger.info(f"Renewed {renewed} Google tokens")
+            except Exception as e:
+                self.logger.error(f"Token renewal failed: {e}", exc_info=True)
+            await asyncio.sleep(self.interval)
+
+    def _retry_at(self, token: TokenModel, error: Exception) -> datetime:
+        if isinstance(error, RefreshError) and "invalid_grant" in str(error):
+            # revoked or expired grant, only a new OAuth consent fixes it
+            backoff = self.max_backoff
+        else:
+            backoff = min(self.interval * 2 ** token.renew_failures, self.max_backoff)
+        return datetime.now(timezone.utc) + timedelta(seconds=backoff)
+
+    async def renew_expiring(self) -> int:
+        from data import get_config
+        from db.database import global_db_manager
+
+        cfg = get_config().GOOGLE_CONFIG
+        now = datetime.now(timezone.utc)
+        deadline = now + timedelta(minutes=self.lead_minutes)
+
+        async with global_db_manager.transaction() as session:
+            tokens = await global_db_manager.get_tokens_repo(session).get_tokens_expiring_before(
+                DateTimeNormalizer.normalize_expiry_for_db(deadline),
+                limit=self.batch_size,
+                now=DateTimeNormalizer.normalize_expiry_for_db(now),
+            )
+
+        renewed = 0
+        for token in tokens:
+            # one short transaction per token, a slow refresh holds no other rows
+            async with global_db_manager.transaction() as session:
+                tokens_repo = global_db_manager.get_tokens_repo(session)
+                manager = CredentialsManager(
+                    cfg.GOOGLE_CLIENT_ID,
+                    cfg.GOOGLE_CLIENT_SECRET,
+                    TokenService(tokens_repo),
+                )
+                try:
+                    await manager.refresh(token.user_id, manager.build_credentials(token))
+                    renewed += 1
+                except Exception as e:
+                    retry_at = self._retry_at(token, e)
+                    await tokens_repo.mark_renew_failed(
+                        token.user_id, DateTimeNormalizer.normalize_expiry_for_db(retry_at)
+                    )
+                    self.logger.warning(
+                        f"Failed to renew token for user_id={token.user_id} "
+                        f"(attempt {token.renew_failures + 1}, next after {retry_at:%Y-%m-%d %H:%M}): {e}"
+                    )
+
+        return renewed
@@ -12,6 +12,9 @@ class TokenService:
     async def get_token(self, user_id: int) -> Optional[TokenModel]:
         return await self.tokens_repo.get_token(user_id)
 
+    async def get_token_by_tg_id(self, tg_id: int) -> Optional[TokenModel]:
+        return await self.tokens_repo.get_token_by_tg_id(tg_id)
+
     async def save_token(self, user_id: int, access_token: str, refresh_token: Optional[str],
                          expiry: Optional[datetime], scopes: Any) -> bool:
         return await self.tokens_repo.save_token(
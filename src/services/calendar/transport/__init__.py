@@ -0,0 +1,30 @@
+from .base import BatchCall, CalendarTransport
+from .threaded import ThreadedCalendarTransport
+from .aiohttp_transport import AiohttpCalendarTransport
+
+from utils.const import GOOGLE_CALENDAR_TRANSPORT
+
+_TRANSPORTS: dict[str, type[CalendarTransport]] = {
+    "threaded": ThreadedCalendarTransport,
+    "aiohttp": AiohttpCalendarTransport,
+}
+
+_transport: CalendarTransport | None = None
+
+
+def get_calendar_transport() -> CalendarTransport:
+    """Returns the deployment-wide transport selected by GOOGLE_CALENDAR_TRANSPORT."""
+    global _transport
+
+    if _transport is None:
+        transport_cls = _TRANSPORTS.get(GOOGLE_CALENDAR_TRANSPORT)
+        if transport_cls is None:
+            raise ValueError(
+                f"Unknown GOOGLE_CALENDAR_TRANSPORT={GOOGLE_CALENDAR_TRANSPORT!r}, "
+                f"expected one of {list(_TRANSPORTS)}"
+            )
+        _transport = transport_cls()
+    return _transport
+
+
+__all__ = ['BatchCall', 'CalendarTransport', 'ThreadedCalendarTransport', 'AiohttpCalendarTransport', 'get_calendar_transport']
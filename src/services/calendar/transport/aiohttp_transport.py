@@ -0,0 +1,165 @@
+import json
+import uuid
+import email
+from typing import Any, Optional
+from urllib.parse import quote, urlparse
+
+from src.exceptions import CalendarApiError
+from src.services.calendar.context import CalendarContext
+from src.services.calendar.transport.base import BatchCall, CalendarTransport
+
+from utils.client_session import AsyncHTTPClient
+from utils.const import GOOGLE_CALENDAR_API_URL, GOOGLE_CALENDAR_BATCH_URL, GOOGLE_CALL_TIMEOUT
+
+_EVENTS_PATH = "calendars/primary/events"
+_STOP_CHANNEL_PATH = "channels/stop"
+
+
+def _query_value(value: Any) -> Any:
+    # aiohttp only accepts str/int/float query values
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return value
+
+
+_BATCH_METHODS = {"insert": "POST", "patch": "PATCH", "delete": "DELETE"}
+
+
+def _parse_batch_response(text: str, count: int) -> list[tuple[int, Any]]:
+    """Split a multipart/mixed batch response into (status, payload) per Content-ID."""
+    boundary = text.lstrip().splitlines()[0][2:].strip()
+    message = email.message_from_string(
+        f'Content-Type: multipart/mixed; boundary="{boundary}"\r\n\r\n{text}'
+    )
+
+    results: list[tuple[int, Any]] = [(500, "No response")] * count
+    for part in message.get_payload():
+        index = int(part.get("Content-ID", "").strip("<>").rsplit("-", 1)[-1])
+        status_line, _, rest = part.get_payload().replace("\r\n", "\n").partition("\n")
+        status = int(status_line.split()[1])
+        body = rest.partition("\n\n")[2].strip()
+
+        data: Any = json.loads(body) if body.startswith("{") else body
+        if status >= 400 and isinstance(data, dict):
+            data = data.get("error", {}).get("message", str(data))
+        results[index] = (status, data)
+    return results
+
+
+class AiohttpCalendarTransport(CalendarTransport):
+    """
+    Calendar v3 REST over aiohttp, no threads involved.
+
+    Requests borrow the process-wide keep-alive pool when it is open, and
+    authenticate with the access token already refreshed by authorize().
+    """
+
+    needs_service = False
+
+    def __init__(
+        self,
+        base_url: str = GOOGLE_CALENDAR_API_URL,
+        batch_url: str = GOOGLE_CALENDAR_BATCH_URL,
+        timeout: float = GOOGLE_CALL_TIMEOUT
+    ):
+        self.base_url = base_url
+        self.batch_url = batch_url
+        self.timeout = timeout
+
+    def _client(self, ctx: CalendarContext, base_url: Optional[str] = None) -> AsyncHTTPClient:
+        return AsyncHTTPClient(
+            base_url=base_url or self.base_url,
+            timeout=self.timeout,
+            headers={"Authorization": f"Bearer {ctx.credentials.token}"},
+        )
+
+    @staticmethod
+    def _event_path(event_id: str) -> str:
+        return f"{_EVENTS_PATH}/{quote(event_id, safe='')}"
+
+    @staticmethod
+    def _check(status: int, data: Any) -> Any:
+        if status >= 400:
+            message = data.get("error", {}).get("message", str(data)) if isinstance(data, dict) else str(data)
+            raise CalendarApiError(status_code=status, message=message)
+        return data
+
+    async def list_events(self, ctx: CalendarContext, **params: Any) -> dict:
+        query = {key: _query_value(value) for key, value in params.items() if value is not None}
+        async with self._client(ctx) as api:
+            status, data = await api.get(_EVENTS_PATH, params=query)
+        return self._check(status, data)
+
+    async def get_event(self, ctx: CalendarContext, event_id: str) -> dict:
+        async with self._client(ctx) as api:
+            status, data = await api.get(self._event_path(event_id))
+        return self._check(status, data)
+
+    async def insert_event(self, ctx: CalendarContext, body: dict) -> dict:
+        async with self._client(ctx) as api:
+            status, data = await api.post(_EVENTS_PATH, json=body)
+        return self._check(status, data)
+
+    async def update_event(self, ctx: CalendarContext, event_id: str, body: dict) -> dict:
+        async with self._client(ctx) as api:
+            status, data = await api.put(self._event_path(event_id), json=body)
+        return self._check(status, data)
+
+    async def patch_event(
+        self,
+        ctx: CalendarContext,
+        event_id: str,
+        body: dict,
+        etag: Optional[str] = None
+    ) -> dict:
+        headers = {"If-Match": etag} if etag else None
+        async with self._client(ctx) as api:
+            status, data = await api.patch(self._event_path(event_id), json=body, headers=headers)
+        return self._check(status, data)
+
+    async def delete_event(self, ctx: CalendarContext, event_id: str) -> None:
+        async with self._client(ctx) as api:
+            status, data = await api.delete(self._event_path(event_id))
+        self._check(status, data)
+
+    async def watch_events(self, ctx: CalendarContext, body: dict) -> dict:
+        async with self._client(ctx) as api:
+            status, data = await api.post(f"{_EVENTS_PATH}/watch", json=body)
+        return self._check(status, data)
+
+    async def stop_channel(self, ctx: CalendarContext, channel_id: str, resource_id: str) -> None:
+        async with self._client(ctx) as api:
+            status, data = await api.post(_STOP_CHANNEL_PATH, json={"id": channel_id, "resourceId": resource_id})
+        self._check(status, data)
+
+    def _batch_body(self, calls: list[BatchCall], boundary: str) -> str:
+        # inner requests carry absolute paths, e.g. /calendar/v3/calendars/primary/events
+        prefix = urlparse(self.base_url).path.rstrip("/")
+        parts = []
+        for index, call in enumerate(calls):
+            path = _EVENTS_PATH if call.method == "insert" else self._event_path(call.event_id)
+            lines = [
+                f"--{boundary}",
+                "Content-Type: application/http",
+                f"Content-ID: <item-{index}>",
+                "",
+                f"{_BATCH_METHODS[call.method]} {prefix}/{path} HTTP/1.1",
+            ]
+            if call.body is not None:
+                lines += ["Content-Type: application/json", "", json.dumps(call.body)]
+            else:
+                lines += [""]
+            parts.append("\r\n".join(lines))
+        parts.append(f"--{boundary}--")
+        return "\r\n".join(parts) + "\r\n"
+
+    async def batch(self, ctx: CalendarContext, calls: list[BatchCall]) -> list[tuple[int, Any]]:
+        boundary = f"batch_{uuid.uuid4().hex}"
+        async with self._client(ctx, base_url=self.batch_url) as api:
+            status, data = await api.post(
+                "",
+                data=self._batch_body(calls, boundary),
+                headers={"Content-Type": f"multipart/mixed; boundary={boundary}"},
+            )
+        self._check(status, data)
+        return _parse_batch_response(data, len(calls))
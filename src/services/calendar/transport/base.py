@@ -0,0 +1,86 @@
+from typing import Any, Literal, Optional
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+
+from src.services.calendar.context import CalendarContext
+
+
+@dataclass(slots=True)
+class BatchCall:
+    """One events mutation inside a batch request"""
+    method: Literal["insert", "patch", "delete"]
+    event_id: Optional[str] = None
+    body: Optional[dict] = None
+
+
+class CalendarTransport(ABC):
+    """
+    Wire-level access to the Calendar v3 ``events`` collection.
+
+    Implementations return Google's JSON payloads unchanged and raise
+    CalendarApiError for non-2xx responses.
+    """
+
+    # whether CalendarContext.service (a googleapiclient resource) is required
+    needs_service: bool = False
+
+    @abstractmethod
+    async def list_events(self, ctx: CalendarContext, **params: Any) -> dict:
+        """Fetch one page of events().list"""
+        ...
+
+    @abstractmethod
+    async def get_event(self, ctx: CalendarContext, event_id: str) -> dict:
+        """Fetch a single event"""
+        ...
+
+    @abstractmethod
+    async def insert_event(self, ctx: CalendarContext, body: dict) -> dict:
+        """Create an event"""
+        ...
+
+    @abstractmethod
+    async def update_event(self, ctx: CalendarContext, event_id: str, body: dict) -> dict:
+        """Replace an event with the full body"""
+        ...
+
+    @abstractmethod
+    async def patch_event(
+        self,
+        ctx: CalendarContext,
+        event_id: str,
+        body: dict,
+        etag: Optional[str] = None
+    ) -> dict:
+        """
+        Update only the fields present in body.
+
+        With an etag the write is conditional (If-Match) and a changed
+        event fails with a 412 CalendarApiError.
+        """
+        ...
+
+    @abstractmethod
+    async def delete_event(self, ctx: CalendarContext, event_id: str) -> None:
+        """Delete an event"""
+        ...
+
+    @abstractmethod
+    async def watch_events(self, ctx: CalendarContext, body: dict) -> dict:
+        """Open a push notification channel for the events collection"""
+        ...
+
+    @abstractmethod
+    async def stop_channel(self, ctx: CalendarContext, channel_id: str, resource_id: str) -> None:
+        """Stop a push notification channel"""
+        ...
+
+    @abstractmethod
+    async def batch(self, ctx: CalendarContext, calls: list[BatchCall]) -> list[tuple[int, Any]]:
+        """
+        Send mutations as one Google batch request.
+
+        Returns a (status, payload or error message) pair per call, in call
+        order. Only a failure of the batch request itself raises.
+        """
+        ...
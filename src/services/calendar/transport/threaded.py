@@ -0,0 +1,102 @@
+from typing import Any, Callable, Optional
+from googleapiclient.errors import HttpError
+
+from src.exceptions import CalendarApiError
+from src.services.calendar.context import CalendarContext
+from src.services.calendar.executor import google_executor
+from src.services.calendar.transport.base import BatchCall, CalendarTransport
+
+
+class ThreadedCalendarTransport(CalendarTransport):
+    """googleapiclient resource, every ``.execute()`` on the shared executor"""
+
+    needs_service = True
+
+    async def _run(self, func: Callable[[], Any]) -> Any:
+        try:
+            return await google_executor.run(func)
+        except HttpError as e:
+            raise CalendarApiError(status_code=e.resp.status, message=str(e), original_error=e)
+
+    async def _execute(self, request_factory: Callable[[], Any]) -> Any:
+        return await self._run(lambda: request_factory().execute())
+
+    async def list_events(self, ctx: CalendarContext, **params: Any) -> dict:
+        return await self._execute(
+            lambda: ctx.service.events().list(calendarId="primary", **params)
+        )
+
+    async def get_event(self, ctx: CalendarContext, event_id: str) -> dict:
+        return await self._execute(
+            lambda: ctx.service.events().get(calendarId="primary", eventId=event_id)
+        )
+
+    async def insert_event(self, ctx: CalendarContext, body: dict) -> dict:
+        return await self._execute(
+            lambda: ctx.service.events().insert(calendarId="primary", body=body)
+        )
+
+    async def update_event(self, ctx: CalendarContext, event_id: str, body: dict) -> dict:
+        return await self._execute(
+            lambda: ctx.service.events().update(calendarId="primary", eventId=event_id, body=body)
+        )
+
+    async def patch_event(
+        self,
+        ctx: CalendarContext,
+        event_id: str,
+        body: dict,
+        etag: Optional[str] = None
+    ) -> dict:
+        def request():
+            req = ctx.service.events().patch(calendarId="primary", eventId=event_id, body=body)
+            if etag:
+                req.headers["If-Match"] = etag
+            return req
+
+        return await self._execute(request)
+
+    async def delete_event(self, ctx: CalendarContext, event_id: str) -> None:
+        await self._execute(
+            lambda: ctx.service.events().delete(calendarId="primary", eventId=event_id)
+        )
+
+    async def watch_events(self, ctx: CalendarContext, body: dict) -> dict:
+        return await self._execute(
+            lambda: ctx.service.events().watch(calendarId="primary", body=body)
+        )
+
+    async def stop_channel(self, ctx: CalendarContext, channel_id: str, resource_id: str) -> None:
+        await self._execute(
+            lambda: ctx.service.channels().stop(body={"id": channel_id, "resourceId": resource_id})
+        )
+
+    @staticmethod
+    def _batch_request(events: Any, call: BatchCall) -> Any:
+        if call.method == "insert":
+            return events.insert(calendarId="primary", body=call.body)
+        if call.method == "patch":
+            return events.patch(calendarId="primary", eventId=call.event_id, body=call.body)
+        return events.delete(calendarId="primary", eventId=call.event_id)
+
+    async def batch(self, ctx: CalendarContext, calls: list[BatchCall]) -> list[tuple[int, Any]]:
+        results: dict[str, tuple[int, Any]] = {}
+
+        def callback(request_id: str, response: Any, exception: Exception) -> None:
+            if exception is None:
+                status = 204 if calls[int(request_id)].method == "delete" else 200
+                results[request_id] = (status, response or {})
+            elif isinstance(exception, HttpError):
+                results[request_id] = (exception.resp.status, str(exception))
+            else:
+                results[request_id] = (500, str(exception))
+
+        def execute() -> None:
+            batch = ctx.service.new_batch_http_request(callback=callback)
+            events = ctx.service.events()
+            for index, call in enumerate(calls):
+                batch.add(self._batch_request(events, call), request_id=str(index))
+            batch.execute()
+
+        await self._run(execute)
+        return [results.get(str(index), (500, "No response")) for index in range(len(calls))]
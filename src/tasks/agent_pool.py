@@ -0,0 +1,129 @@
+import time
+import asyncio
+from typing import Optional
+from collections import OrderedDict
+
+from loguru import logger
+from langgraph.graph.state import CompiledStateGraph
+
+from utils.const import AGENT_POOL_SIZE, AGENT_POOL_HEALTH_INTERVAL
+
+
+class AgentPool:
+    """
+    Worker-scoped warm state for agent calls.
+
+    LLMs, both MCP tool sessions and the checkpointer pool are opened once
+    per worker process, compiled agents are kept per user in an LRU. Before
+    handing out an agent the dependencies are health-checked at most every
+    ``health_interval`` seconds; a dropped MCP session or a dead checkpointer
+    pool is reopened and the compiled agents holding them are dropped.
+    Must be used from a single event loop (the WorkerLoop).
+    """
+
+    def __init__(self, size: int = AGENT_POOL_SIZE, health_interval: float = AGENT_POOL_HEALTH_INTERVAL):
+        self.size = size
+        self.health_interval = health_interval
+        self._agents: OrderedDict[tuple[int, int], CompiledStateGraph] = OrderedDict()
+        self._checked_at = 0.0
+        self._lock: Optional[asyncio.Lock] = None
+        self._stats = {"hits": 0, "builds": 0, "reconnects": 0}
+
+    async def start(self) -> None:
+        from src.agents.llms.initializer import LLMInitializer
+        from src.factories.tools_factory import get_tools
+        from src.factories.checkpointer_factory import get_checkpointer
+
+        self._lock = asyncio.Lock()
+        await LLMInitializer.initialize()
+        await get_tools()
+        await get_checkpointer()
+        self._checked_at = time.monotonic()
+        logger.info("Agent pool warmed up")
+
+    async def close(self) -> None:
+        from src.factories.tools_factory import reset_tools
+        from src.factories.checkpointer_factory import close_checkpointer
+
+        self._drop_agents()
+        await reset_tools()
+        await close_checkpointer()
+
+    def _drop_agents(self) -> None:
+        from src.factories.agents_factory import AgentsFactory
+
+        self._agents.clear()
+        # the factory caches its own instances with the old tools/checkpointer
+        AgentsFactory.reset()
+
+    async def _ensure_healthy(self) -> None:
+        if time.monotonic() - self._checked_at < self.health_interval:
+            return
+
+        from src.factories.tools_factory import get_tools, tools_alive, reset_tools
+        from src.factories.checkpointer_factory import get_checkpointer, check_checkpointer, close_checkpointer
+
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if time.monotonic() - self._checked_at < self.health_interval:
+                return
+
+            if not tools_alive():
+                logger.warning("MCP tool sessions are down, reconnecting")
+                self._drop_agents()
+                await reset_tools()
+                await get_tools()
+                self._stats["reconnects"] += 1
+
+            if not await check_checkpointer():
+                logger.warning("Checkpointer pool is down, reopening")
+                self._drop_agents()
+                await close_checkpointer()
+                await get_checkpointer()
+                self._stats["reconnects"] += 1
+
+            self._checked_at = time.monotonic()
+
+    async def get_agent(self, tg_id: int) -> CompiledStateGraph:
+        from src.agents.llms.initializer import LLMInitializer
+        from src.factories.agents_factory import AgentsFactory
+        from src.agents.prompts.system import AgentSystemPrompt
+        from src.factories.tools_factory import get_tools
+        from src.factories.checkpointer_factory import get_checkpointer
+
+        await LLMInitializer.initialize()
+        await self._ensure_healthy()
+
+        model = LLMInitializer.get_selected()
+        key = (tg_id, id(model))
+        agent = self._agents.get(key)
+        if agent is not None:
+            self._agents.move_to_end(key)
+            self._stats["hits"] += 1
+            return agent
+
+        AgentsFactory.reset(tg_id)
+        agent = await AgentsFactory(
+            name="tg-assistant",
+            model=model,
+            tools=await get_tools(),
+            system_prompt=AgentSystemPrompt(),
+            checkpointer=await get_checkpointer(),
+            tg_id=tg_id,
+        ).aget_agent()
+        self._stats["builds"] += 1
+
+        self._agents[key] = agent
+        while len(self._agents) > self.size:
+            (evicted, _), _ = self._agents.popitem(last=False)
+            AgentsFactory.reset(evicted)
+        return agent
+
+    @property
+    def stats(self) -> dict:
+        return {**self._stats, "agents": len(self._agents)}
+
+
+# the only instance of the pool
+agent_pool = AgentPool()
@@ -0,0 +1,292 @@
+"""
+Asyncio-native worker for the ``tasks.*`` jobs.
+
+    uv run python -m src.tasks.aio_worker
+
+Consumes the same Redis list Celery publishes to, with the same task
+names and payloads, but runs up to AIO_WORKER_CONCURRENCY tasks at once
+in one event loop instead of one per prefork process. Celery beat and
+``.delay()`` / ``.apply_async()`` callers are unchanged.
+"""
+import json
+import time
+import uuid
+import base64
+import signal
+import socket
+import asyncio
+from typing import Any, Optional
+from datetime import datetime, timezone
+
+from loguru import logger
+
+from utils.client_session import http_pool
+from utils.const import AIO_WORKER_CONCURRENCY, AIO_WORKER_QUEUE, AIO_WORKER_HEARTBEAT
+
+# moves due delayed messages back to the head of the queue
+_RELEASE_DUE = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+if #due == 0 then return 0 end
+redis.call('ZREM', KEYS[1], unpack(due))
+for _, raw in ipairs(due) do
+    redis.call('RPUSH', KEYS[2], raw)
+end
+return #due
+"""
+
+
+class TaskMessage:
+    """A Celery message as stored by kombu's Redis transport (protocol 2, JSON)."""
+
+    def __init__(self, raw: str):
+        self.raw = raw
+        self.envelope = json.loads(raw)
+        self.headers = self.envelope.get("headers") or {}
+
+        body = self.envelope["body"]
+        if (self.envelope.get("properties") or {}).get("body_encoding") == "base64":
+            body = base64.b64decode(body)
+        decoded = json.loads(body)
+
+        if "task" in self.headers:
+            self.args, self.kwargs = decoded[0], decoded[1]
+        else:
+            # protocol 1 keeps everything in the body
+            self.headers = {**decoded, **self.headers}
+            self.args, self.kwargs = decoded.get("args", []), decoded.get("kwargs", {})
+
+    @property
+    def name(self) -> str:
+        return self.headers["task"]
+
+    @property
+    def id(self) -> str:
+        return self.headers.get("id", "?")
+
+    @property
+    def retries(self) -> int:
+        return self.headers.get("retries") or 0
+
+    @property
+    def eta(self) -> Optional[float]:
+        eta = self.headers.get("eta")
+        if not eta:
+            return None
+        moment = datetime.fromisoformat(eta)
+        if moment.tzinfo is None:
+            moment = moment.replace(tzinfo=timezone.utc)
+        return moment.timestamp()
+
+    def for_retry(self, eta: float) -> str:
+        """The same message with the retry counter bumped and a new ETA."""
+        envelope = dict(self.envelope)
+        envelope["headers"] = {
+            **self.headers,
+            "retries": self.retries + 1,
+            "eta": datetime.fromtimestamp(eta, timezone.utc).isoformat(),
+        }
+        properties = dict(envelope.get("properties") or {})
+        properties["delivery_tag"] = str(uuid.uuid4())
+        envelope["properties"] = properties
+        return json.dumps(envelope)
+
+
+class AsyncTaskWorker:
+    """
+    Consumer with acks-late semantics.
+
+    A message is moved atomically (BLMOVE) from the queue to this worker's
+    processing list and removed from it only once the task finished, was
+    rescheduled or was given up on. Processing lists of workers whose
+    heartbeat expired are pushed back to the queue, so a crash re-delivers
+    in-flight tasks like ``task_acks_late`` does. Messages with a future
+    ETA and retries wait in a delayed sorted set.
+    """
+
+    DELAYED_KEY = "aio:delayed"
+
+    def __init__(
+        self,
+        handlers: dict,
+        retries: dict[str, tuple[int, float]],
+        queue: str = AIO_WORKER_QUEUE,
+        concurrency: int = AIO_WORKER_CONCURRENCY,
+        heartbeat: int = AIO_WORKER_HEARTBEAT,
+    ):
+        self.handlers = handlers
+        self.retries = retries
+        self.queue = queue
+        self.concurrency = concurrency
+        self.heartbeat = heartbeat
+        self.worker_id = f"{socket.gethostname()}:{uuid.uuid4().hex[:8]}"
+        self.processing_key = f"aio:processing:{self.worker_id}"
+        self._stopping = asyncio.Event()
+        self._inflight: set[asyncio.Task] = set()
+        self._release_script = None
+        self._stats = {"processed": 0, "failed": 0, "retried": 0, "delayed": 0, "unknown": 0}
+
+    @staticmethod
+    def _alive_key(worker_id: str) -> str:
+        return f"aio:alive:{worker_id}"
+
+    @staticmethod
+    def _redis():
+        from data import get_config
+        return get_config().redis_client
+
+    async def _ack(self, raw: str) -> None:
+        await self._redis().lrem(self.processing_key, 1, raw)
+
+    async def _delay(self, raw: str, eta: float, replacement: Optional[str] = None) -> None:
+        """Park a message until ``eta``, optionally as a rewritten copy, and ack the original."""
+        redis = self._redis()
+        async with redis.pipeline(transaction=True) as pipe:
+            pipe.zadd(self.DELAYED_KEY, {replacement or raw: eta})
+            pipe.lrem(self.processing_key, 1, raw)
+            await pipe.execute()
+
+    async def _handle(self, raw: str) -> None:
+        try:
+            message = TaskMessage(raw)
+        except Exception as e:
+            logger.error(f"Dropping a malformed message: {e}")
+            await self._ack(raw)
+            return
+
+        handler = self.handlers.get(message.name)
+        if handler is None:
+            self._stats["unknown"] += 1
+            logger.error(f"Received unregistered task {message.name!r} ({message.id}), dropped")
+            await self._ack(raw)
+            return
+
+        eta = message.eta
+        if eta is not None and eta > time.time():
+            self._stats["delayed"] += 1
+            await self._delay(raw, eta)
+            return
+
+        try:
+            await handler(*message.args, **message.kwargs)
+            self._stats["processed"] += 1
+            await self._ack(raw)
+        except Exception as e:
+            max_retries, delay = self.retries.get(message.name, (0, 0))
+            if message.retries < max_retries:
+                self._stats["retried"] += 1
+                logger.warning(f"{message.name}[{message.id}] failed, retry {message.retries + 1}/{max_retries} in {delay}s: {e}")
+                eta = time.time() + delay
+                await self._delay(raw, eta, replacement=message.for_retry(eta))
+            else:
+                self._stats["failed"] += 1
+                logger.error(f"{message.name}[{message.id}] failed: {e}")
+                await self._ack(raw)
+
+    async def _consume(self, semaphore: asyncio.Semaphore) -> None:
+        redis = self._redis()
+        while not self._stopping.is_set():
+            await semaphore.acquire()
+            try:
+                raw = await redis.blmove(self.queue, self.processing_key, 1, src="RIGHT", dest="LEFT")
+            except Exception as e:
+                semaphore.release()
+                logger.error(f"Consuming from {self.queue} failed: {e}")
+                await asyncio.sleep(1)
+                continue
+            if raw is None:
+                semaphore.release()
+                continue
+
+            task = asyncio.create_task(self._handle(raw))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+            task.add_done_callback(lambda _: semaphore.release())
+
+    async def _release_delayed(self) -> None:
+        redis = self._redis()
+        if self._release_script is None:
+            self._release_script = redis.register_script(_RELEASE_DUE)
+        while not self._stopping.is_set():
+            try:
+                await self._release_script(keys=[self.DELAYED_KEY, self.queue], args=[time.time(), 500])
+            except Exception as e:
+                logger.error(f"Releasing delayed tasks failed: {e}")
+            await asyncio.sleep(1)
+
+    async def _recover(self) -> int:
+        """Push processing lists of dead workers back onto the queue."""
+        redis = self._redis()
+        recovered = 0
+        async for key in redis.scan_iter(match="aio:processing:*"):
+            worker_id = key.removeprefix("aio:processing:")
+            if worker_id == self.worker_id or await redis.exists(self._alive_key(worker_id)):
+                continue
+            while await redis.lmove(key, self.queue, src="RIGHT", dest="RIGHT") is not None:
+                recovered += 1
+        if recovered:
+            logger.warning(f"Re-queued {recovered} tasks of dead workers")
+        return recovered
+
+    async def _heartbeat(self) -> None:
+        redis = self._redis()
+        while not self._stopping.is_set():
+            try:
+                await redis.set(self._alive_key(self.worker_id), "1", ex=self.heartbeat * 3)
+                await self._recover()
+            except Exception as e:
+                logger.error(f"Heartbeat failed: {e}")
+            await asyncio.sleep(self.heartbeat)
+
+    def stop(self) -> None:
+        self._stopping.set()
+
+    async def serve(self, grace: float = 30) -> None:
+        await self._redis().set(self._alive_key(self.worker_id), "1", ex=self.heartbeat * 3)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        background = [
+            asyncio.create_task(self._heartbeat(), name="aio-heartbeat"),
+            asyncio.create_task(self._release_delayed(), name="aio-delayed"),
+        ]
+        logger.info(f"Async worker {self.worker_id} consuming {self.queue!r}, concurrency={self.concurrency}")
+
+        try:
+            await self._consume(semaphore)
+        finally:
+            if self._inflight:
+                logger.info(f"Waiting for {len(self._inflight)} in-flight tasks")
+                # unfinished tasks stay in the processing list and are re-delivered
+                await asyncio.wait(self._inflight, timeout=grace)
+            for task in background:
+                task.cancel()
+            await self._redis().delete(self._alive_key(self.worker_id))
+            logger.info(f"Async worker stopped: {self.stats}")
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        return {**self._stats, "inflight": len(self._inflight)}
+
+
+async def main() -> None:
+    # registers the tasks and runs init() like the Celery worker does
+    from src.tasks.celery_app import app  # noqa: F401
+    from src.tasks.tasks import ASYNC_TASKS, ASYNC_RETRIES
+    from src.tasks.agent_pool import agent_pool
+
+    worker = AsyncTaskWorker(ASYNC_TASKS, ASYNC_RETRIES)
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, worker.stop)
+
+    async with http_pool:
+        try:
+            await agent_pool.start()
+        except Exception:
+            logger.exception("Failed to warm up the agent pool")
+        try:
+            await worker.serve()
+        finally:
+            await agent_pool.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
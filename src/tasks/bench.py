@@ -0,0 +1,61 @@
+"""
+Per-task overhead of the task bridge, before and after the worker loop.
+
+    uv run python -m src.tasks.bench -n 200
+
+Every simulated task does what a reminder does around the Telegram call:
+one request to the calendar service /health through AsyncHTTPClient.
+"before" runs each one through a fresh ``asyncio.run`` with its own pool
+(the old ``_run``), "after" submits it to a started WorkerLoop.
+"""
+import time
+import asyncio
+import argparse
+import statistics
+
+from utils.client_session import AsyncHTTPClient, http_pool
+from src.tasks.loop import WorkerLoop
+from src.tasks.digest import percentiles
+
+
+async def _task() -> None:
+    async with AsyncHTTPClient() as api:
+        status, _ = await api.get("/health")
+    if status != 200:
+        raise RuntimeError(f"calendar service answered {status}")
+
+
+async def _with_pool() -> None:
+    async with http_pool:
+        await _task()
+
+
+def _measure(run, n: int) -> dict:
+    timings = []
+    for _ in range(n):
+        started = time.perf_counter()
+        run()
+        timings.append((time.perf_counter() - started) * 1000)
+    return {"mean_ms": round(statistics.mean(timings), 3), **percentiles(timings)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("-n", type=int, default=200, help="tasks per mode")
+    args = parser.parse_args()
+
+    before = _measure(lambda: asyncio.run(_with_pool()), args.n)
+
+    loop = WorkerLoop()
+    loop.start()
+    try:
+        after = _measure(lambda: loop.run(_task()), args.n)
+    finally:
+        loop.stop()
+
+    print(f"asyncio.run per task: {before}")
+    print(f"worker loop:          {after}")
+
+
+if __name__ == "__main__":
+    main()
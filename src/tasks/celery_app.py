@@ -1,20 +1,65 @@
 from celery.schedules import crontab
+from celery.signals import worker_process_init, worker_process_shutdown
 from data import init
 from data.init_configs import get_config
+from utils.const import FOLLOWUP_DISPATCH_INTERVAL, FOLLOWUP_POLL_ENABLED, DIGEST_SCHEDULE_ENABLED, DIGEST_SLOT
 
 init()
 
 app = get_config().celery_app
 
+
+@worker_process_init.connect
+def _start_worker_loop(**_):
+    from loguru import logger
+    from src.tasks.loop import worker_loop
+    from src.tasks.agent_pool import agent_pool
+
+    worker_loop.start()
+    try:
+        worker_loop.run(agent_pool.start())
+    except Exception:
+        # tasks still work, the pool connects lazily on the first agent call
+        logger.exception("Failed to warm up the agent pool")
+
+
+@worker_process_shutdown.connect
+def _stop_worker_loop(**_):
+    from loguru import logger
+    from src.tasks.loop import worker_loop
+    from src.tasks.agent_pool import agent_pool
+
+    try:
+        worker_loop.run(agent_pool.close(), timeout=15)
+    except Exception:
+        logger.exception("Failed to close the agent pool")
+    worker_loop.stop()
+
+
 app.autodiscover_tasks(["src.tasks"])
 
 app.conf.beat_schedule = {
-    "check-finished-events": {
-        "task": "tasks.check_finished_events",
-        "schedule": 300,
+    "dispatch-followups": {
+        "task": "tasks.dispatch_followups",
+        "schedule": FOLLOWUP_DISPATCH_INTERVAL,
     },
-    "morning-digest": {
+}
+
+if DIGEST_SCHEDULE_ENABLED:
+    # every user at their local morning, see src.services.calendar.digest_schedule
+    app.conf.beat_schedule["dispatch-digests"] = {
+        "task": "tasks.dispatch_digests",
+        "schedule": DIGEST_SLOT,
+    }
+else:
+    app.conf.beat_schedule["morning-digest"] = {
         "task": "tasks.morning_digest",
         "schedule": crontab(hour=9, minute=0),
-    },
-}
\ No newline at end of file
+    }
+
+if FOLLOWUP_POLL_ENABLED:
+    # safety net for users whose events are never read through the calendar service
+    app.conf.beat_schedule["check-finished-events"] = {
+        "task": "tasks.check_finished_events",
+        "schedule": 300,
+    }
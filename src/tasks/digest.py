@@ -0,0 +1,180 @@
+import time
+from datetime import datetime, timezone, timedelta
+from typing import AsyncIterator, Awaitable, Callable, Iterable, Optional
+
+from loguru import logger
+
+from utils.helpers import format_event
+from utils.rate_limit import get_llm_limiter
+from utils.client_session import AsyncHTTPClient
+from utils.const import (
+    DIGEST_CONCURRENCY,
+    DIGEST_USER_TIMEOUT,
+    DIGEST_TOKENS_PER_CALL,
+    FOLLOWUP_STREAM_TIMEOUT,
+)
+
+from src.tasks.fanout import fan_out
+from src.services.calendar.digest_schedule import digest_schedule, local_day
+
+# (today, events) of a user, None when there is nothing to send
+DigestLoader = Callable[[int], Awaitable[Optional[tuple[str, list[dict]]]]]
+
+
+def digest_window(now: datetime) -> tuple[str, str, str]:
+    """Today's [00:00, 24:00) UTC window as query strings and the date itself."""
+    day = now.astimezone(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    # "Z" keeps the query string free of a "+" that would decode as a space
+    fmt = "%Y-%m-%dT%H:%M:%SZ"
+    return day.strftime(fmt), (day + timedelta(days=1)).strftime(fmt), day.strftime("%Y-%m-%d")
+
+
+async def iter_day_events(start: str, end: str) -> AsyncIterator[tuple[int, list[dict]]]:
+    """(tg_id, events) of every active user, page by page from the calendar service."""
+    cursor = 0
+    async with AsyncHTTPClient(timeout=FOLLOWUP_STREAM_TIMEOUT) as api:
+        while cursor is not None:
+            summary = None
+            async for item in api.iter_ndjson(
+                "/calendar/events/window",
+                params={"start": start, "end": end, "cursor": cursor}
+            ):
+                if "error" in item:
+                    raise RuntimeError(f"Digest prefetch failed at cursor {item['cursor']}: {item['error']}")
+                if "next_cursor" in item:
+                    summary = item
+                else:
+                    yield item["tg_id"], item["events"]
+            if summary is None:
+                # a cut stream is not the last page
+                raise RuntimeError(f"Digest prefetch stream at cursor {cursor} ended without a summary")
+            if summary.get("failed"):
+                logger.warning(f"Digest prefetch: events of {summary['failed']} users are missing")
+            cursor = summary.get("next_cursor")
+
+
+async def fetch_day_events(api: AsyncHTTPClient, tg_id: int, start: datetime, end: datetime) -> Optional[list[dict]]:
+    """Events of one user in [start, end), None when the user is no longer authorized."""
+    status, data = await api.post(
+        "/calendar/events/range",
+        json={"user_id": tg_id, "start": start.isoformat(), "end": end.isoformat()}
+    )
+    if status == 401:
+        return None
+    if status != 200:
+        raise RuntimeError(f"Calendar API error: {status} — {data}")
+    return data.get("events", [])
+
+
+def digest_prompt(today: str, events: list[dict]) -> str:
+    if events:
+        listing = "".join(format_event(event) for event in events)
+        agenda = f"События пользователя на сегодня (уже загружены, календарь запрашивать не нужно):{listing}\n"
+    else:
+        agenda = "На сегодня у пользователя нет событий.\n"
+    return (
+        f"[SYSTEM: Сейчас утро {today}.\n{agenda}"
+        f"Пришли краткую сводку дня. "
+        f"Учти предпочтения пользователя из памяти.]"
+    )
+
+
+def percentiles(values: list[float], points: tuple[int, ...] = (50, 90, 99)) -> dict:
+    """Nearest-rank percentiles, keyed p50/p90/... plus max."""
+    if not values:
+        return {}
+    ordered = sorted(values)
+    out = {
+        f"p{point}": round(ordered[min(len(ordered) - 1, max(0, -(-point * len(ordered) // 100) - 1))], 3)
+        for point in points
+    }
+    out["max"] = round(ordered[-1], 3)
+    return out
+
+
+async def digest_user(tg_id: int, today: str, events: list[dict], telegram: AsyncHTTPClient | None = None) -> None:
+    """Summarize one user's day within the provider's TPM budget and send it."""
+    from langchain_core.callbacks import UsageMetadataCallbackHandler
+    from src.agents.llms.initializer import LLMInitializer
+    from src.tasks.tasks import _invoke, _send_telegram
+
+    await LLMInitializer.initialize()
+    limiter = get_llm_limiter(type(LLMInitializer.get_selected()).__name__)
+
+    await limiter.acquire(DIGEST_TOKENS_PER_CALL)
+    used = DIGEST_TOKENS_PER_CALL
+    # the returned state holds the user's whole thread, count this call's LLM runs only
+    usage = UsageMetadataCallbackHandler()
+    try:
+        result = await _invoke(tg_id, digest_prompt(today, events), callbacks=[usage])
+        used = sum(
+            model_usage.get("total_tokens", 0) for model_usage in usage.usage_metadata.values()
+        ) or DIGEST_TOKENS_PER_CALL
+    finally:
+        limiter.settle(DIGEST_TOKENS_PER_CALL, used)
+
+    await _send_telegram(tg_id, result["messages"][-1].content, client=telegram)
+
+
+async def deliver(tg_ids: Iterable[int], load: DigestLoader, started: float) -> dict:
+    """
+    Run the agent for every user ``DIGEST_CONCURRENCY`` at a time under the
+    provider's TPM limiter, sending over one Telegram session. Completion
+    percentiles are seconds since ``started``.
+    """
+    completed: list[float] = []
+
+    async with AsyncHTTPClient() as telegram:
+        async def _one(tg_id: int) -> None:
+            loaded = await load(tg_id)
+            if loaded is None:
+                return
+            today, events = loaded
+            await digest_user(tg_id, today, events, telegram=telegram)
+            completed.append(time.perf_counter() - started)
+
+        outcome = await fan_out(tg_ids, _one, concurrency=DIGEST_CONCURRENCY, timeout=DIGEST_USER_TIMEOUT)
+
+    return {**outcome.as_metrics(), "sent": len(completed), **percentiles(completed)}
+
+
+async def run_digest(now: datetime | None = None) -> dict:
+    """
+    Morning digest for every active user in one process.
+
+    Today's UTC events are prefetched for all users through the bulk
+    calendar endpoint, then delivered. Returns the run metrics.
+    """
+    start, end, today = digest_window(now or datetime.now(timezone.utc))
+    started = time.perf_counter()
+
+    users = {tg_id: events async for tg_id, events in iter_day_events(start, end)}
+    prefetch = time.perf_counter() - started
+
+    async def _load(tg_id: int) -> tuple[str, list[dict]]:
+        return today, users[tg_id]
+
+    metrics = await deliver(users, _load, started)
+    return {**metrics, "users": len(users), "prefetch": round(prefetch, 3)}
+
+
+async def run_scheduled_digest(due: list[tuple[int, str]]) -> dict:
+    """
+    Digest for users whose local morning slot came up, each with the
+    events of their own local day. Users who revoked access are dropped
+    from the schedule.
+    """
+    zones = dict(due)
+    started = time.perf_counter()
+
+    async with AsyncHTTPClient() as api:
+        async def _load(tg_id: int) -> Optional[tuple[str, list[dict]]]:
+            start, end, today = local_day(zones[tg_id])
+            events = await fetch_day_events(api, tg_id, start, end)
+            if events is None:
+                await digest_schedule.unschedule(tg_id)
+                return None
+            return today, events
+
+        metrics = await deliver(zones, _load, started)
+    return {**metrics, "users": len(zones)}
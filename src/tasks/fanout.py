@@ -0,0 +1,66 @@
+import time
+import asyncio
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Iterable, TypeVar
+
+from loguru import logger
+
+T = TypeVar("T")
+
+
+@dataclass(slots=True)
+class FanOutResult:
+    """Outcome of one fan_out run, results are in completion order."""
+    results: list[Any] = field(default_factory=list)
+    processed: int = 0
+    failed: int = 0
+    timed_out: int = 0
+    duration: float = 0.0
+
+    @property
+    def rate(self) -> float:
+        return round(self.processed / self.duration, 2) if self.duration else 0.0
+
+    def as_metrics(self) -> dict:
+        return {
+            "processed": self.processed,
+            "failed": self.failed,
+            "timed_out": self.timed_out,
+            "duration": round(self.duration, 3),
+            "per_second": self.rate,
+        }
+
+
+async def fan_out(
+    items: Iterable[T],
+    worker: Callable[[T], Awaitable[Any]],
+    *,
+    concurrency: int,
+    timeout: float,
+) -> FanOutResult:
+    """
+    Run ``worker`` for every item with at most ``concurrency`` in flight.
+
+    Every call gets its own ``timeout``; a failed or timed out item is
+    logged and counted, it never cancels the others.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    outcome = FanOutResult()
+    started = time.perf_counter()
+
+    async def _one(item: T) -> None:
+        async with semaphore:
+            try:
+                outcome.results.append(await asyncio.wait_for(worker(item), timeout))
+            except asyncio.TimeoutError:
+                outcome.timed_out += 1
+                logger.warning(f"Fan-out item {item!r} timed out after {timeout}s")
+            except Exception as e:
+                outcome.failed += 1
+                logger.error(f"Fan-out item {item!r} failed: {e}")
+            finally:
+                outcome.processed += 1
+
+    await asyncio.gather(*(_one(item) for item in items))
+    outcome.duration = time.perf_counter() - started
+    return outcome
@@ -0,0 +1,58 @@
+"""
+Throughput of the task workers on I/O-bound jobs.
+
+    uv run python -m src.tasks.loadtest -n 1000 --delay 0.2
+
+Enqueues ``n`` tasks.probe jobs (sleep ``delay`` seconds, then bump a
+Redis counter) and waits until all of them are done. Run it once against
+the Celery worker and once against ``python -m src.tasks.aio_worker``
+with the other one stopped to compare the two modes.
+"""
+import time
+import asyncio
+import argparse
+
+COUNTER_KEY = "loadtest:done"
+
+
+async def _wait_for(redis, n: int, timeout: float) -> float:
+    started = time.perf_counter()
+    done = 0
+    while time.perf_counter() - started < timeout:
+        done = int(await redis.get(COUNTER_KEY) or 0)
+        if done >= n:
+            return time.perf_counter() - started
+        await asyncio.sleep(0.2)
+    raise TimeoutError(f"only {done}/{n} tasks finished in {timeout}s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("-n", type=int, default=1000, help="tasks to enqueue")
+    parser.add_argument("--delay", type=float, default=0.2, help="simulated I/O per task, seconds")
+    parser.add_argument("--timeout", type=float, default=600)
+    args = parser.parse_args()
+
+    from src.tasks.celery_app import app  # noqa: F401
+    from src.tasks.tasks import probe
+    from data import get_config
+
+    async def _load() -> tuple[float, float]:
+        redis = get_config().redis_client
+        await redis.delete(COUNTER_KEY)
+
+        started = time.perf_counter()
+        for _ in range(args.n):
+            probe.delay(args.delay)
+        enqueued = time.perf_counter() - started
+        return enqueued, await _wait_for(redis, args.n, args.timeout)
+
+    enqueued, elapsed = asyncio.run(_load())
+    print(
+        f"{args.n} tasks x {args.delay}s I/O: enqueued in {enqueued:.2f}s, "
+        f"done in {elapsed:.2f}s, {args.n / elapsed:.1f} tasks/s"
+    )
+
+
+if __name__ == "__main__":
+    main()
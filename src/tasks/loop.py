@@ -0,0 +1,81 @@
+import asyncio
+import threading
+from typing import Any, Coroutine, Optional, TypeVar
+
+from loguru import logger
+
+from utils.client_session import http_pool
+
+T = TypeVar("T")
+
+
+class WorkerLoop:
+    """
+    One event loop per Celery worker process, running in a daemon thread.
+
+    Tasks hand their coroutines over with ``run`` and block on the result,
+    so everything bound to a loop (the HTTP pool, the Redis client, LLM
+    clients, agents) is created once and reused by every task the process
+    executes. Started on ``worker_process_init``; outside a worker (eager
+    tasks, scripts) ``run`` falls back to a private ``asyncio.run``.
+    """
+
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def is_running(self) -> bool:
+        return self._loop is not None and self._loop.is_running()
+
+    def start(self) -> None:
+        if self.is_running:
+            return
+        self._loop = asyncio.new_event_loop()
+        ready = threading.Event()
+
+        def _serve():
+            asyncio.set_event_loop(self._loop)
+            self._loop.call_soon(ready.set)
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=_serve, name="worker-loop", daemon=True)
+        self._thread.start()
+        ready.wait()
+        # the pool stays open for the life of the process
+        self.run(http_pool.open())
+        logger.info("Worker event loop started")
+
+    def stop(self, timeout: float = 10) -> None:
+        if not self.is_running:
+            return
+        try:
+            self.run(http_pool.close(), timeout=timeout)
+        except Exception as e:
+            logger.warning(f"Closing the HTTP pool failed: {e}")
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout)
+        self._loop.close()
+        self._loop = self._thread = None
+        logger.info("Worker event loop stopped")
+
+    def run(self, coro: Coroutine[Any, Any, T], timeout: Optional[float] = None) -> T:
+        """Run ``coro`` on the worker loop and wait for its result."""
+        if not self.is_running:
+            return asyncio.run(self._with_pool(coro))
+
+        future = asyncio.run_coroutine_threadsafe(coro, self._loop)
+        try:
+            return future.result(timeout)
+        except TimeoutError:
+            future.cancel()
+            raise
+
+    @staticmethod
+    async def _with_pool(coro: Coroutine[Any, Any, T]) -> T:
+        async with http_pool:
+            return await coro
+
+
+# the only instance of the loop
+worker_loop = WorkerLoop()
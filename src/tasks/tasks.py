@@ -1,155 +1,389 @@
-import asyncio
+from typing import Optional
+
 from celery import shared_task
 from loguru import logger
 
+from src.tasks.loop import worker_loop
+
 
 def _run(coro):
-    return asyncio.run(coro)
+    # the worker's long-lived loop keeps HTTP/Redis connections and LLM clients warm
+    return worker_loop.run(coro)
 
 
-async def _send_telegram(tg_id: int, text: str):
-    """Send a message directly via Telegram Bot API."""
+async def _send_telegram(tg_id: int, text: str, client=None):
+    """Send a message directly via Telegram Bot API, over ``client`` when the caller holds one open."""
     from utils.client_session import AsyncHTTPClient
     from data import get_config
 
     cfg = get_config()
     token = cfg.TG_SETTINGS.BOT_TOKEN
-
-    async with AsyncHTTPClient() as client:
-        status, data = await client.post(
-            f"https://api.telegram.org/bot{token}/sendMessage",
-            json={"chat_id": tg_id, "text": text, "parse_mode": "HTML"}
-        )
+    url = f"https://api.telegram.org/bot{token}/sendMessage"
+    payload = {"chat_id": tg_id, "text": text, "parse_mode": "HTML"}
+
+    if client is None:
+        async with AsyncHTTPClient() as client:
+            status, data = await client.post(url, json=payload)
+    else:
+        status, data = await client.post(url, json=payload)
     if status != 200:
         raise RuntimeError(f"Telegram API error: {status} — {data}")
 
 
-async def _ask(tg_id: int, content: str) -> str:
-    """Invoke the agent for a user and return the response."""
-    from src.agents.llms.initializer import LLMInitializer
-    from src.services.telegram.bot.dependencies import get_agent
+async def _invoke(tg_id: int, content: str, callbacks: Optional[list] = None) -> dict:
+    """
+    Invoke the agent for a user and return the final graph state.
+
+    The state is the user's whole checkpointed thread, pass ``callbacks``
+    to observe only this call.
+    """
+    from src.tasks.agent_pool import agent_pool
     from data import get_config
 
-    await LLMInitializer.initialize()
-    agent = await get_agent(tg_id)
-    cfg = get_config()
+    agent = await agent_pool.get_agent(tg_id)
+    runnable_config = get_config().RUNNABLE_CONFIG
 
-    result = await agent.ainvoke(
+    return await agent.ainvoke(
         {"messages": [{"role": "user", "content": content}]},
         config={
             "configurable": {"thread_id": str(tg_id)},
-            **cfg.RUNNABLE_CONFIG,
+            **runnable_config,
+            "callbacks": [*(runnable_config.get("callbacks") or []), *(callbacks or [])],
         },
     )
+
+
+async def _ask(tg_id: int, content: str) -> str:
+    """Invoke the agent for a user and return the response."""
+    result = await _invoke(tg_id, content)
     return result["messages"][-1].content
 
 
-@shared_task(name="tasks.send_reminder", bind=True, max_retries=3)
+async def _reminder(tg_id: int, text: str) -> None:
+    await _send_telegram(tg_id, f"🔔 Reminder: {text}")
+    logger.info(f"Reminder sent to tg_id={tg_id}")
+
+
+async def _followup(tg_id: int, event_title: str) -> None:
+    content = (
+        f"[SYSTEM: Событие '{event_title}' только что завершилось. "
+        f"Напиши пользователю короткое неформальное сообщение — "
+        f"спроси как всё прошло. Одно-два предложения, без лишнего.]"
+    )
+    await _send_telegram(tg_id, await _ask(tg_id, content))
+    logger.info(f"Follow-up for '{event_title}' sent to tg_id={tg_id}")
+
+
+@shared_task(name="tasks.send_reminder", bind=True, max_retries=3, default_retry_delay=60)
 def send_reminder(self, tg_id: int, text: str):
     """Send a reminder message to the user via Telegram."""
     try:
-        _run(_send_telegram(tg_id, f"🔔 Reminder: {text}"))
-        logger.info(f"Reminder sent to tg_id={tg_id}")
+        _run(_reminder(tg_id, text))
     except Exception as e:
         logger.error(f"Failed to send reminder: {e}")
-        raise self.retry(exc=e, countdown=60)
+        raise self.retry(exc=e)
 
 
-@shared_task(name="tasks.followup_after_event", bind=True, max_retries=2)
+@shared_task(name="tasks.followup_after_event", bind=True, max_retries=2, default_retry_delay=120)
 def followup_after_event(self, tg_id: int, event_title: str):
     """Send a follow-up message after an event ends."""
     try:
-        content = (
-            f"[SYSTEM: Событие '{event_title}' только что завершилось. "
-            f"Напиши пользователю короткое неформальное сообщение — "
-            f"спроси как всё прошло. Одно-два предложения, без лишнего.]"
-        )
-        response = _run(_ask(tg_id, content))
-        _run(_send_telegram(tg_id, response))
-        logger.info(f"Follow-up for '{event_title}' sent to tg_id={tg_id}")
+        _run(_followup(tg_id, event_title))
     except Exception as e:
         logger.error(f"Follow-up failed: {e}")
-        raise self.retry(exc=e, countdown=120)
-
-
-@shared_task(name="tasks.check_finished_events")
-def check_finished_events():
-    """Check events that ended 10-20 min ago and schedule follow-ups. Runs every 5 min via Celery Beat."""
+        raise self.retry(exc=e)
+
+
+async def _schedule_followups(
+    redis, candidates: list[tuple[int, str, str]]
+) -> tuple[int, list[tuple[int, str, str]]]:
+    """
+    Dedup (tg_id, event_id, title) candidates in one Redis round trip and
+    enqueue the new ones.
+
+    Returns the number enqueued and the candidates whose enqueue failed;
+    their dedup keys are released again so a later pass can retry them.
+    """
+    if not candidates:
+        return 0, []
+
+    async with redis.pipeline(transaction=False) as pipe:
+        for tg_id, event_id, _ in candidates:
+            pipe.set(f"followup_sent:{tg_id}:{event_id}", "1", ex=86400, nx=True)
+        claimed = await pipe.execute()
+
+    scheduled, failed = 0, []
+    for (tg_id, event_id, title), is_new in zip(candidates, claimed):
+        if not is_new:
+            continue
+        try:
+            followup_after_event.delay(tg_id=tg_id, event_title=title)
+        except Exception as e:
+            logger.error(f"Failed to enqueue the follow-up of '{title}' for tg_id={tg_id}: {e}")
+            failed.append((tg_id, event_id, title))
+            continue
+        scheduled += 1
+        logger.info(f"Follow-up scheduled: '{title}' for tg_id={tg_id}")
+
+    if failed:
+        await redis.delete(*(f"followup_sent:{tg_id}:{event_id}" for tg_id, event_id, _ in failed))
+    return scheduled, failed
+
+
+async def _check_finished_events() -> None:
+    import time
     from datetime import datetime, timezone, timedelta
     from utils.client_session import AsyncHTTPClient
+    from utils.const import FOLLOWUP_STREAM_TIMEOUT
+    from data import get_config
 
-    async def _check():
-        now = datetime.now(timezone.utc)
-        start = (now - timedelta(minutes=20)).isoformat()
-        end = (now - timedelta(minutes=10)).isoformat()
+    now = datetime.now(timezone.utc)
+    # "Z" keeps the query string free of a "+" that would decode as a space
+    start = (now - timedelta(minutes=20)).strftime("%Y-%m-%dT%H:%M:%SZ")
+    end = (now - timedelta(minutes=10)).strftime("%Y-%m-%dT%H:%M:%SZ")
 
-        async with AsyncHTTPClient() as api:
-            status, data = await api.get("/calendar/users/active")
+    cfg = get_config()
+    redis = cfg.redis_client
+
+    started = time.perf_counter()
+    metrics = {"users": 0, "failed": 0, "events": 0, "scheduled": 0}
+    cursor = 0
+
+    # the calendar service fans out over users, one streaming request per page
+    async with AsyncHTTPClient(timeout=FOLLOWUP_STREAM_TIMEOUT) as api:
+        while cursor is not None:
+            candidates = []
+            summary = None
+            async for item in api.iter_ndjson(
+                "/calendar/events/ending",
+                params={"start": start, "end": end, "cursor": cursor}
+            ):
+                if "error" in item:
+                    raise RuntimeError(f"Events ending failed at cursor {item['cursor']}: {item['error']}")
+                if "next_cursor" in item:
+                    summary = item
+                else:
+                    candidates.append((item["tg_id"], item["event_id"], item["title"]))
+            if summary is None:
+                # a cut stream is not the last page
+                raise RuntimeError(f"Events ending stream at cursor {cursor} ended without a summary")
+
+            # failed ones are released and may be picked up by the next, overlapping window
+            scheduled, _ = await _schedule_followups(redis, candidates)
+            metrics["scheduled"] += scheduled
+            for key in ("users", "failed", "events"):
+                metrics[key] += summary.get(key, 0)
+            cursor = summary.get("next_cursor")
+
+    metrics["duration"] = round(time.perf_counter() - started, 3)
+    metrics["per_second"] = round(metrics["users"] / metrics["duration"], 2) if metrics["duration"] else 0.0
+    await redis.hset("metrics:check_finished_events", mapping=metrics)
+    logger.info(f"check_finished_events tick: {metrics}")
 
-        if status != 200 or not data:
-            logger.warning(f"Failed to get active users: {status}")
-            return
 
-        from data import get_config
-        cfg = get_config()
-        redis = cfg.redis_client
+@shared_task(name="tasks.check_finished_events")
+def check_finished_events():
+    """Check events that ended 10-20 min ago and schedule follow-ups. Runs every 5 min via Celery Beat."""
+    _run(_check_finished_events())
+
 
-        for user in data.get("users", []):
-            tg_id = user["tg_id"]
+async def _dispatch_followups() -> None:
+    import time
+    from utils.const import FOLLOWUP_DISPATCH_BATCH, FOLLOWUP_DISPATCH_INTERVAL
+    from src.services.calendar.followups import followup_scheduler
+    from data import get_config
 
-            async with AsyncHTTPClient() as api:
-                status, events_data = await api.post(
-                    "/calendar/events/range",
-                    json={"user_id": tg_id, "start": start, "end": end}
-                )
+    redis = get_config().redis_client
+
+    started = time.perf_counter()
+    popped = scheduled = 0
+    for shard in range(followup_scheduler.shards):
+        # drain the shard, a batch smaller than the limit means it is empty
+        while True:
+            due = await followup_scheduler.pop_due(shard, limit=FOLLOWUP_DISPATCH_BATCH)
+            popped += len(due)
+            enqueued, failed = await _schedule_followups(redis, due)
+            scheduled += enqueued
+            # popped already, they would be lost otherwise; retried next run
+            await followup_scheduler.requeue(failed, FOLLOWUP_DISPATCH_INTERVAL)
+            if len(due) < FOLLOWUP_DISPATCH_BATCH:
+                break
+
+    if popped:
+        logger.info(
+            f"dispatch_followups: {popped} due, {scheduled} enqueued "
+            f"in {time.perf_counter() - started:.3f}s"
+        )
 
-            if status != 200:
-                logger.warning(f"Failed to get events for tg_id={tg_id}: {status}")
-                continue
 
-            for event in events_data.get("events", []):
-                event_id = event.get("id")
-                title = event.get("title", "event")
-                key = f"followup_sent:{tg_id}:{event_id}"
+@shared_task(name="tasks.dispatch_followups")
+def dispatch_followups():
+    """Pop due follow-ups from every scheduler shard and enqueue them. Runs every FOLLOWUP_DISPATCH_INTERVAL via Celery Beat."""
+    _run(_dispatch_followups())
 
-                if await redis.exists(key):
-                    continue
 
-                followup_after_event.delay(tg_id=tg_id, event_title=title)
-                await redis.setex(key, 86400, "1")
-                logger.info(f"Follow-up scheduled: '{title}' for tg_id={tg_id}")
+async def _morning_digest() -> None:
+    from data import get_config
+    from src.tasks.digest import run_digest
 
-    _run(_check())
+    metrics = await run_digest()
+    await get_config().redis_client.hset("metrics:morning_digest", mapping=metrics)
+    logger.info(f"Morning digest: {metrics}")
 
 
 @shared_task(name="tasks.morning_digest")
 def morning_digest():
-    """Send morning digest of today's events to all active users. Runs daily at 09:00 UTC via Celery Beat."""
+    """Send morning digest of today's events to all active users at once. Used when DIGEST_SCHEDULE_ENABLED is off."""
     from datetime import datetime, timezone
+    from utils.const import DIGEST_USE_CHORD
+    from src.tasks.digest import digest_window, iter_day_events
 
-    async def _send():
-        from utils.client_session import AsyncHTTPClient
-        today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    async def _prefetch():
+        start, end, today = digest_window(datetime.now(timezone.utc))
+        return today, [(tg_id, events) async for tg_id, events in iter_day_events(start, end)]
 
+    if not DIGEST_USE_CHORD:
+        _run(_morning_digest())
+        return
+
+    today, users = _run(_prefetch())
+    _digest_chord([(tg_id, today, events) for tg_id, events in users])
+
+
+def _digest_chord(jobs: list[tuple[int, str, list[dict]]]) -> None:
+    """One subtask per user spreads the agent calls over every worker."""
+    import time
+    from celery import chord
+
+    if jobs:
+        chord(
+            digest_for_user.s(tg_id, today, events) for tg_id, today, events in jobs
+        )(digest_report.s(started_at=time.time()))
+    logger.info(f"Morning digest: {len(jobs)} subtasks enqueued")
+
+
+async def _pop_due_digests() -> list[tuple[int, str]]:
+    from utils.const import DIGEST_DISPATCH_BATCH
+    from src.services.calendar.digest_schedule import digest_schedule
+
+    due = []
+    # drain the slot, a batch smaller than the limit means nothing else is due
+    while True:
+        batch = await digest_schedule.pop_due(limit=DIGEST_DISPATCH_BATCH)
+        due.extend(batch)
+        if len(batch) < DIGEST_DISPATCH_BATCH:
+            return due
+
+
+async def _dispatch_digests() -> None:
+    from data import get_config
+    from src.tasks.digest import run_scheduled_digest
+
+    due = await _pop_due_digests()
+    if not due:
+        return
+    metrics = await run_scheduled_digest(due)
+    await get_config().redis_client.hset("metrics:morning_digest", mapping=metrics)
+    logger.info(f"Morning digest slot: {metrics}")
+
+
+@shared_task(name="tasks.dispatch_digests")
+def dispatch_digests():
+    """Send the digest to users whose local morning slot is due. Runs every DIGEST_SLOT via Celery Beat."""
+    from utils.const import DIGEST_USE_CHORD
+    from utils.client_session import AsyncHTTPClient
+    from src.services.calendar.digest_schedule import digest_schedule, local_day
+    from src.tasks.digest import fetch_day_events
+
+    async def _prefetch():
+        jobs = []
         async with AsyncHTTPClient() as api:
-            status, data = await api.get("/calendar/users/active")
-
-        if status != 200 or not data:
-            logger.warning(f"Failed to get active users: {status}")
-            return
-
-        for user in data.get("users", []):
-            tg_id = user["tg_id"]
-            try:
-                content = (
-                    f"[SYSTEM: Сейчас утро {today}. "
-                    f"Посмотри события пользователя на сегодня и пришли краткую сводку дня. "
-                    f"Учти предпочтения пользователя из памяти.]"
-                )
-                response = await _ask(tg_id, content)
-                await _send_telegram(tg_id, response)
-                logger.info(f"Morning digest sent to tg_id={tg_id}")
-            except Exception as e:
-                logger.error(f"Morning digest failed for tg_id={tg_id}: {e}")
-
-    _run(_send())
\ No newline at end of file
+            for tg_id, tz in await _pop_due_digests():
+                start, end, today = local_day(tz)
+                try:
+                    events = await fetch_day_events(api, tg_id, start, end)
+                except Exception as e:
+                    logger.error(f"Morning digest prefetch failed for tg_id={tg_id}: {e}")
+                    continue
+                if events is None:
+                    await digest_schedule.unschedule(tg_id)
+                    continue
+                jobs.append((tg_id, today, events))
+        return jobs
+
+    if DIGEST_USE_CHORD:
+        _digest_chord(_run(_prefetch()))
+    else:
+        _run(_dispatch_digests())
+
+
+@shared_task(name="tasks.digest_for_user", bind=True, max_retries=2, default_retry_delay=60)
+def digest_for_user(self, tg_id: int, today: str, events: list[dict]):
+    """Morning digest of one user, returns the wall-clock time it was sent at or None."""
+    import time
+    from src.tasks.digest import digest_user
+
+    try:
+        _run(digest_user(tg_id, today, events))
+        return time.time()
+    except Exception as e:
+        if self.request.retries < self.max_retries:
+            raise self.retry(exc=e)
+        # a failed user must not fail the chord callback
+        logger.error(f"Morning digest failed for tg_id={tg_id}: {e}")
+        return None
+
+
+async def _digest_report(sent_at: list, started_at: float) -> None:
+    from data import get_config
+    from src.tasks.digest import percentiles
+
+    completed = [moment - started_at for moment in sent_at if moment is not None]
+    metrics = {
+        "users": len(sent_at),
+        "sent": len(completed),
+        "failed": len(sent_at) - len(completed),
+        **percentiles(completed),
+    }
+    await get_config().redis_client.hset("metrics:morning_digest", mapping=metrics)
+    logger.info(f"Morning digest: {metrics}")
+
+
+@shared_task(name="tasks.digest_report")
+def digest_report(sent_at: list, started_at: float):
+    """Chord callback: completion-time percentiles of a chord-based morning digest."""
+    _run(_digest_report(sent_at, started_at))
+
+
+async def _probe(delay: float = 0.1) -> None:
+    import asyncio
+    from data import get_config
+
+    await asyncio.sleep(delay)
+    await get_config().redis_client.incr("loadtest:done")
+
+
+@shared_task(name="tasks.probe")
+def probe(delay: float = 0.1):
+    """Load-test task: simulated I/O wait, then a completion counter bump (see src.tasks.loadtest)."""
+    _run(_probe(delay))
+
+
+# async bodies of the tasks above, run directly by the asyncio worker (src.tasks.aio_worker)
+ASYNC_TASKS = {
+    "tasks.send_reminder": _reminder,
+    "tasks.followup_after_event": _followup,
+    "tasks.check_finished_events": _check_finished_events,
+    "tasks.dispatch_followups": _dispatch_followups,
+    # chords need Celery workers, the asyncio worker always runs the in-process pipeline
+    "tasks.morning_digest": _morning_digest,
+    "tasks.dispatch_digests": _dispatch_digests,
+    "tasks.digest_report": _digest_report,
+    "tasks.probe": _probe,
+}
+
+# tasks that retry under Celery keep the same policy in the asyncio worker
+ASYNC_RETRIES = {
+    task.name: (task.max_retries, task.default_retry_delay)
+    for task in (send_reminder, followup_after_event)
+}
@@ -1,19 +1,139 @@
+import json
+import logging
 import aiohttp
-from typing import Any, Optional
-from utils.const import GOOGLE_CALENDAR_URI
+from typing import Any, AsyncIterator, Optional
+from utils.const import (
+    GOOGLE_CALENDAR_URI,
+    HTTP_POOL_LIMIT,
+    HTTP_POOL_LIMIT_PER_HOST,
+    HTTP_POOL_KEEPALIVE_TIMEOUT,
+    HTTP_POOL_DNS_TTL,
+)
+
+
+class HTTPConnectionPool:
+    """
+    Process-wide keep-alive connector shared by every AsyncHTTPClient.
+
+    The pool is reference counted: ``async with http_pool`` opens the
+    connector on first entry and closes it when the last holder leaves,
+    so it can be held by a server lifespan and by a worker task alike.
+    While the pool is closed AsyncHTTPClient falls back to a private
+    session per ``async with`` block.
+    """
+
+    def __init__(
+        self,
+        limit: int = HTTP_POOL_LIMIT,
+        limit_per_host: int = HTTP_POOL_LIMIT_PER_HOST,
+        keepalive_timeout: float = HTTP_POOL_KEEPALIVE_TIMEOUT,
+        dns_ttl: int = HTTP_POOL_DNS_TTL,
+    ):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.dns_ttl = dns_ttl
+
+        self._connector: Optional[aiohttp.TCPConnector] = None
+        self._holders = 0
+        self._stats = {"requests": 0, "connections_created": 0, "connections_reused": 0}
+
+        self.trace_config = aiohttp.TraceConfig()
+        self.trace_config.on_request_start.append(self._on_request_start)
+        self.trace_config.on_connection_create_end.append(self._on_connection_create)
+        self.trace_config.on_connection_reuseconn.append(self._on_connection_reuse)
+
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    async def __aenter__(self) -> "HTTPConnectionPool":
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        await self.close()
+
+    async def open(self) -> None:
+        self._holders += 1
+        if self._connector is None or self._connector.closed:
+            self._connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=self.dns_ttl,
+            )
+            self.logger.info(
+                f"HTTP pool opened: limit={self.limit}, limit_per_host={self.limit_per_host}"
+            )
+
+    async def close(self) -> None:
+        self._holders = max(self._holders - 1, 0)
+        if self._holders or self._connector is None:
+            return
+
+        connector, self._connector = self._connector, None
+        await connector.close()
+        self.logger.info(f"HTTP pool closed: {self.stats}")
+
+    @property
+    def is_open(self) -> bool:
+        return self._connector is not None and not self._connector.closed
+
+    @property
+    def connector(self) -> aiohttp.TCPConnector:
+        if not self.is_open:
+            raise RuntimeError("HTTP pool is not opened")
+        return self._connector
+
+    @property
+    def stats(self) -> dict:
+        created = self._stats["connections_created"]
+        reused = self._stats["connections_reused"]
+        total = created + reused
+        return {**self._stats, "reuse_ratio": round(reused / total, 3) if total else 0.0}
+
+    async def _on_request_start(self, session, ctx, params) -> None:
+        self._stats["requests"] += 1
+
+    async def _on_connection_create(self, session, ctx, params) -> None:
+        self._stats["connections_created"] += 1
+
+    async def _on_connection_reuse(self, session, ctx, params) -> None:
+        self._stats["connections_reused"] += 1
+
+
+# the only instance of the pool
+http_pool = HTTPConnectionPool()
 
 
 class AsyncHTTPClient:
-    def __init__(self, base_url: str = GOOGLE_CALENDAR_URI, timeout: int = 30):
+    def __init__(
+        self,
+        base_url: str = GOOGLE_CALENDAR_URI,
+        timeout: int = 30,
+        headers: Optional[dict] = None
+    ):
         self.base_url = base_url.rstrip("/") + "/"
         self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.headers = headers
         self._session: Optional[aiohttp.ClientSession] = None
 
     async def __aenter__(self) -> "AsyncHTTPClient":
-        self._session = aiohttp.ClientSession(
-            base_url=self.base_url,
-            timeout=self.timeout
-        )
+        if http_pool.is_open:
+            # borrow the shared keep-alive connector, the pool owns its lifetime
+            self._session = aiohttp.ClientSession(
+                base_url=self.base_url,
+                timeout=self.timeout,
+                headers=self.headers,
+                connector=http_pool.connector,
+                connector_owner=False,
+                trace_configs=[http_pool.trace_config],
+            )
+        else:
+            self._session = aiohttp.ClientSession(
+                base_url=self.base_url,
+                timeout=self.timeout,
+                headers=self.headers
+            )
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
@@ -43,31 +163,60 @@ class AsyncHTTPClient:
     async def get(
         self,
         path: str,
-        params: Optional[dict] = None
+        params: Optional[dict] = None,
+        headers: Optional[dict] = None
     ) -> tuple[int, Any]:
-        async with self._get_session().get(path, params=params) as r:
+        async with self._get_session().get(path, params=params, headers=headers) as r:
             return await self._handle_response(r)
 
     async def post(
         self,
         path: str,
-        json: Optional[dict] = None
+        json: Optional[dict] = None,
+        data: Optional[Any] = None,
+        headers: Optional[dict] = None
     ) -> tuple[int, Any]:
-        async with self._get_session().post(path, json=json) as r:
+        async with self._get_session().post(path, json=json, data=data, headers=headers) as r:
+            return await self._handle_response(r)
+
+    async def put(
+        self,
+        path: str,
+        json: Optional[dict] = None,
+        headers: Optional[dict] = None
+    ) -> tuple[int, Any]:
+        async with self._get_session().put(path, json=json, headers=headers) as r:
             return await self._handle_response(r)
 
     async def patch(
         self,
         path: str,
-        json: Optional[dict] = None
+        json: Optional[dict] = None,
+        headers: Optional[dict] = None
     ) -> tuple[int, Any]:
-        async with self._get_session().patch(path, json=json) as r:
+        async with self._get_session().patch(path, json=json, headers=headers) as r:
             return await self._handle_response(r)
 
     async def delete(
         self,
         path: str,
-        params: Optional[dict] = None
+        params: Optional[dict] = None,
+        headers: Optional[dict] = None
     ) -> tuple[int, Any]:
-        async with self._get_session().delete(path, params=params) as r:
-            return await self._handle_response(r)
\ No newline at end of file
+        async with self._get_session().delete(path, params=params, headers=headers) as r:
+            return await self._handle_response(r)
+
+    async def iter_ndjson(
+        self,
+        path: str,
+        params: Optional[dict] = None
+    ) -> AsyncIterator[Any]:
+        """Stream a newline-delimited JSON response, one decoded value per line."""
+        async with self._get_session().get(path, params=params) as r:
+            if r.status != 200:
+                raise aiohttp.ClientResponseError(
+                    r.request_info, r.history, status=r.status, message=await r.text()
+                )
+            async for line in r.content:
+                if line.strip():
+                    yield json.loads(line)
@@ -13,9 +13,124 @@ GOOGLE_CALENDAR_REDIRECT_URI = os.getenv(
     f"http://localhost:{FASTAPI_CALENDAR_PORT}/calendar/oauth/callback"
 )
 
+# overridable so tests can point token refreshes at a local fake endpoint
+GOOGLE_TOKEN_URI = os.getenv("GOOGLE_TOKEN_URI", "https://oauth2.googleapis.com/token")
+
 GOOGLE_CALENDAR_URI = f"http://{_FASTAPI_HOST}:{FASTAPI_CALENDAR_PORT}"
 MCP_CALENDAR_URL = f"http://{_MCP_HOST}:{MCP_CALENDAR_PORT}/sse"
 
 MCP_REMINDERS_PORT = int(os.getenv("MCP_REMINDERS_PORT", "8003"))
 _MCP_REMINDERS_HOST = os.getenv("MCP_REMINDERS_HOST", "localhost")
-MCP_REMINDERS_URL = f"http://{_MCP_REMINDERS_HOST}:{MCP_REMINDERS_PORT}/sse"
\ No newline at end of file
+MCP_REMINDERS_URL = f"http://{_MCP_REMINDERS_HOST}:{MCP_REMINDERS_PORT}/sse"
+
+# Shared aiohttp connection pool (see utils.client_session.http_pool)
+HTTP_POOL_LIMIT = int(os.getenv("HTTP_POOL_LIMIT", "100"))
+HTTP_POOL_LIMIT_PER_HOST = int(os.getenv("HTTP_POOL_LIMIT_PER_HOST", "20"))
+HTTP_POOL_KEEPALIVE_TIMEOUT = float(os.getenv("HTTP_POOL_KEEPALIVE_TIMEOUT", "30"))
+HTTP_POOL_DNS_TTL = int(os.getenv("HTTP_POOL_DNS_TTL", "300"))
+
+# Built googleapiclient Calendar resources, cached per user
+CALENDAR_SERVICE_CACHE_SIZE = int(os.getenv("CALENDAR_SERVICE_CACHE_SIZE", "512"))
+CALENDAR_SERVICE_CACHE_TTL = float(os.getenv("CALENDAR_SERVICE_CACHE_TTL", "3600"))
+
+# Background renewal of Google tokens ahead of token_expiry
+TOKEN_RENEW_LEAD_MINUTES = int(os.getenv("TOKEN_RENEW_LEAD_MINUTES", "10"))
+TOKEN_RENEW_INTERVAL = float(os.getenv("TOKEN_RENEW_INTERVAL", "60"))
+TOKEN_RENEW_BATCH_SIZE = int(os.getenv("TOKEN_RENEW_BATCH_SIZE", "100"))
+# failed renewals back off exponentially up to this, revoked grants go straight to it
+TOKEN_RENEW_MAX_BACKOFF = float(os.getenv("TOKEN_RENEW_MAX_BACKOFF", "86400"))
+
+# Shared thread pool for blocking googleapiclient calls
+GOOGLE_EXECUTOR_WORKERS = int(os.getenv("GOOGLE_EXECUTOR_WORKERS", "16"))
+GOOGLE_CALL_TIMEOUT = float(os.getenv("GOOGLE_CALL_TIMEOUT", "30"))
+
+# Calendar v3 transport: "threaded" (googleapiclient + executor) or "aiohttp"
+GOOGLE_CALENDAR_TRANSPORT = os.getenv("GOOGLE_CALENDAR_TRANSPORT", "threaded")
+GOOGLE_CALENDAR_API_URL = os.getenv("GOOGLE_CALENDAR_API_URL", "https://www.googleapis.com/calendar/v3")
+
+# events().list page size (Google caps it at 2500)
+CALENDAR_PAGE_SIZE = int(os.getenv("CALENDAR_PAGE_SIZE", "250"))
+
+# Local event store kept current with Google syncToken deltas
+CALENDAR_LOCAL_STORE = os.getenv("CALENDAR_LOCAL_STORE", "true").lower() == "true"
+CALENDAR_SYNC_TTL = float(os.getenv("CALENDAR_SYNC_TTL", "60"))
+# a full sync only pulls events from this many days back, older reads go to Google
+CALENDAR_SYNC_HISTORY_DAYS = int(os.getenv("CALENDAR_SYNC_HISTORY_DAYS", "90"))
+
+# events.watch push channels; leave the webhook URL empty to disable them.
+# Google only delivers to a public HTTPS address.
+CALENDAR_WEBHOOK_URL = os.getenv("CALENDAR_WEBHOOK_URL", "")
+CALENDAR_WATCH_TTL = int(os.getenv("CALENDAR_WATCH_TTL", "604800"))
+CALENDAR_WATCH_RENEW_LEAD = int(os.getenv("CALENDAR_WATCH_RENEW_LEAD", "3600"))
+# first retry delay after a failed events.watch, doubled per failure up to the watched TTL
+CALENDAR_WATCH_RETRY = float(os.getenv("CALENDAR_WATCH_RETRY", "60"))
+# while a channel is open the store only needs a safety-net sync
+CALENDAR_WATCHED_SYNC_TTL = float(os.getenv("CALENDAR_WATCHED_SYNC_TTL", "3600"))
+
+# In-memory [timeMin, timeMax) windows per user in front of the store/Google
+CALENDAR_RANGE_CACHE_USERS = int(os.getenv("CALENDAR_RANGE_CACHE_USERS", "1024"))
+CALENDAR_RANGE_CACHE_TTL = float(os.getenv("CALENDAR_RANGE_CACHE_TTL", "60"))
+
+# Google caps Calendar batch requests at 50 calls
+GOOGLE_CALENDAR_BATCH_URL = os.getenv("GOOGLE_CALENDAR_BATCH_URL", "https://www.googleapis.com/batch/calendar/v3")
+CALENDAR_BATCH_LIMIT = int(os.getenv("CALENDAR_BATCH_LIMIT", "50"))
+
+# Bulk "events ending in window" endpoint
+CALENDAR_BULK_CONCURRENCY = int(os.getenv("CALENDAR_BULK_CONCURRENCY", "10"))
+CALENDAR_BULK_USER_TIMEOUT = float(os.getenv("CALENDAR_BULK_USER_TIMEOUT", "15"))
+CALENDAR_BULK_PAGE_SIZE = int(os.getenv("CALENDAR_BULK_PAGE_SIZE", "500"))
+FOLLOWUP_STREAM_TIMEOUT = int(os.getenv("FOLLOWUP_STREAM_TIMEOUT", "240"))
+
+# Follow-ups scheduled by event end time (see src.services.calendar.followups)
+FOLLOWUP_SHARDS = int(os.getenv("FOLLOWUP_SHARDS", "16"))
+FOLLOWUP_DELAY = float(os.getenv("FOLLOWUP_DELAY", "600"))
+FOLLOWUP_HORIZON = float(os.getenv("FOLLOWUP_HORIZON", "172800"))
+FOLLOWUP_DISPATCH_INTERVAL = float(os.getenv("FOLLOWUP_DISPATCH_INTERVAL", "30"))
+FOLLOWUP_DISPATCH_BATCH = int(os.getenv("FOLLOWUP_DISPATCH_BATCH", "500"))
+# the old 5-minute poll over all users, kept as a safety net
+FOLLOWUP_POLL_ENABLED = os.getenv("FOLLOWUP_POLL_ENABLED", "false").lower() == "true"
+
+# Morning digest pipeline (see src.tasks.digest)
+DIGEST_CONCURRENCY = int(os.getenv("DIGEST_CONCURRENCY", "8"))
+DIGEST_USER_TIMEOUT = float(os.getenv("DIGEST_USER_TIMEOUT", "120"))
+# estimate reserved per agent call, settled against the real usage afterwards
+DIGEST_TOKENS_PER_CALL = int(os.getenv("DIGEST_TOKENS_PER_CALL", "4000"))
+# per-user Celery subtasks joined by a chord instead of one in-process fan-out
+DIGEST_USE_CHORD = os.getenv("DIGEST_USE_CHORD", "false").lower() == "true"
+
+# Tokens per minute per LLM provider, "ChatOpenAI=200000,ChatXAI=100000"
+LLM_TPM_LIMITS = {
+    name.strip(): int(limit)
+    for name, _, limit in (
+        item.partition("=") for item in os.getenv("LLM_TPM_LIMITS", "").split(",") if "=" in item
+    )
+}
+LLM_TPM_DEFAULT = int(os.getenv("LLM_TPM_DEFAULT", "100000"))
+
+# Per-user digest at local DIGEST_LOCAL_HOUR (see src.services.calendar.digest_schedule)
+DIGEST_SCHEDULE_ENABLED = os.getenv("DIGEST_SCHEDULE_ENABLED", "true").lower() == "true"
+DIGEST_LOCAL_HOUR = int(os.getenv("DIGEST_LOCAL_HOUR", "9"))
+# users of one zone are spread over DIGEST_SPREAD seconds in DIGEST_SLOT buckets
+DIGEST_SLOT = int(os.getenv("DIGEST_SLOT", "300"))
+DIGEST_SPREAD = int(os.getenv("DIGEST_SPREAD", "3600"))
+DIGEST_DEFAULT_TZ = os.getenv("DIGEST_DEFAULT_TZ", "UTC")
+DIGEST_DISPATCH_BATCH = int(os.getenv("DIGEST_DISPATCH_BATCH", "500"))
+
+# Compiled agents kept warm per Celery worker process (see src.tasks.agent_pool)
+AGENT_POOL_SIZE = int(os.getenv("AGENT_POOL_SIZE", "256"))
+AGENT_POOL_HEALTH_INTERVAL = float(os.getenv("AGENT_POOL_HEALTH_INTERVAL", "30"))
+
+# asyncio-native worker for tasks.* (see src.tasks.aio_worker)
+AIO_WORKER_CONCURRENCY = int(os.getenv("AIO_WORKER_CONCURRENCY", "200"))
+AIO_WORKER_QUEUE = os.getenv("AIO_WORKER_QUEUE", "celery")
+AIO_WORKER_HEARTBEAT = int(os.getenv("AIO_WORKER_HEARTBEAT", "10"))
+
+# Read-through cache of users by tg_id and tokens by user_id (see db.cache)
+REPO_CACHE_ENABLED = os.getenv("REPO_CACHE_ENABLED", "true").lower() == "true"
+REPO_CACHE_SIZE = int(os.getenv("REPO_CACHE_SIZE", "10000"))
+# the in-process tier is not invalidated by other processes' writes
+REPO_CACHE_TTL = float(os.getenv("REPO_CACHE_TTL", "30"))
+REPO_CACHE_NEGATIVE_TTL = float(os.getenv("REPO_CACHE_NEGATIVE_TTL", "10"))
+# shared tier, stores access tokens in Redis
+REPO_CACHE_REDIS = os.getenv("REPO_CACHE_REDIS", "false").lower() == "true"
+REPO_CACHE_REDIS_TTL = int(os.getenv("REPO_CACHE_REDIS_TTL", "300"))
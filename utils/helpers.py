@@ -2,7 +2,7 @@ from typing import Any, Optional
 from datetime import timezone, datetime
 
 from src.models import EventModel
-from utils.const import GOOGLE_CALENDAR_REDIRECT_URI
+from utils.const import GOOGLE_CALENDAR_REDIRECT_URI, GOOGLE_TOKEN_URI
 
 def preprocess_event_data(raw_events: list[dict[str, Any]]) -> list[EventModel]:
     return [EventModel.model_validate(event) for event in raw_events]
@@ -20,6 +20,7 @@ def format_event(e: dict) -> str:
         f"\n   Конец: {end_time}"
         + (f"\n   Место: {e.get('location')}" if e.get("location") else "")
         + (f"\n   Описание: {e.get('description')}" if e.get("description") else "")
+        + (f"\n   ETag: {e.get('etag')}" if e.get("etag") else "")
     )
 
 
@@ -31,7 +32,7 @@ class DataCreator:
                 "client_id": client_id,
                 "client_secret": client_secret,
                 "auth_uri": "https://accounts.google.com/o/oauth2/auth",
-                "token_uri": "https://oauth2.googleapis.com/token",
+                "token_uri": GOOGLE_TOKEN_URI,
                 "redirect_uris": [GOOGLE_CALENDAR_REDIRECT_URI],
             }
         }
@@ -41,7 +42,7 @@ class DataCreator:
         return {
             "token": token_data.access_token,
             "refresh_token": token_data.refresh_token,
-            "token_uri": "https://oauth2.googleapis.com/token",
+            "token_uri": GOOGLE_TOKEN_URI,
             "client_id": client_id,
             "client_secret": client_secret,
         }
@@ -60,4 +61,22 @@ class DateTimeNormalizer:
         """naive → aware UTC when reading from the database"""
         if expiry and expiry.tzinfo is None:
             return expiry.replace(tzinfo=timezone.utc)
-        return expiry
\ No newline at end of file
+        return expiry
+
+    @staticmethod
+    def to_naive_utc(moment: datetime) -> datetime:
+        """aware → naive UTC, naive values are taken as UTC already"""
+        if moment.tzinfo is not None:
+            return moment.astimezone(timezone.utc).replace(tzinfo=None)
+        return moment
+
+    @staticmethod
+    def event_time(value: Optional[dict]) -> Optional[datetime]:
+        """Google event start/end → naive UTC, all-day dates become midnight"""
+        if not value:
+            return None
+        if value.get("dateTime"):
+            return DateTimeNormalizer.to_naive_utc(datetime.fromisoformat(value["dateTime"]))
+        if value.get("date"):
+            return datetime.fromisoformat(value["date"])
+        return None
@@ -0,0 +1,73 @@
+import time
+import asyncio
+import logging
+
+from utils.const import LLM_TPM_LIMITS, LLM_TPM_DEFAULT
+
+
+class TokenRateLimiter:
+    """
+    Async token bucket refilled at ``tokens_per_minute``.
+
+    ``acquire`` reserves an estimate before a call and ``settle`` corrects
+    the balance once the real usage is known, so the bucket may go
+    negative and the next callers wait it off. A reservation larger than
+    the whole bucket is clamped to it instead of waiting forever.
+    """
+
+    def __init__(self, tokens_per_minute: int):
+        self.capacity = float(tokens_per_minute)
+        self.rate = tokens_per_minute / 60.0
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+        self._loop = None
+        self._waited = 0.0
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, tokens: int) -> None:
+        tokens = min(float(tokens), self.capacity)
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # a Celery task runs every call in a fresh loop, the lock must not outlive it
+            self._lock, self._loop = asyncio.Lock(), loop
+        # the lock keeps waiters in FIFO order, a big request is not starved by small ones
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                delay = (tokens - self._tokens) / self.rate
+                self._waited += delay
+                await asyncio.sleep(delay)
+
+    def settle(self, reserved: int, used: int) -> None:
+        self._refill()
+        self._tokens = min(self.capacity, self._tokens + reserved - used)
+
+    @property
+    def stats(self) -> dict:
+        self._refill()
+        return {
+            "tokens_per_minute": int(self.capacity),
+            "available": int(self._tokens),
+            "waited": round(self._waited, 3),
+        }
+
+
+_limiters: dict[str, TokenRateLimiter] = {}
+
+
+def get_llm_limiter(provider: str) -> TokenRateLimiter:
+    """Limiter shared by every caller of one LLM provider in this process."""
+    limiter = _limiters.get(provider)
+    if limiter is None:
+        limit = LLM_TPM_LIMITS.get(provider, LLM_TPM_DEFAULT)
+        limiter = _limiters[provider] = TokenRateLimiter(limit)
+        logging.getLogger(TokenRateLimiter.__name__).info(f"TPM limiter for {provider}: {limit}")
+    return limiter